@@ -0,0 +1,9 @@
+"""
+성능 측정(benchmark) 모음: ru_analyzer의 주요 경로를 합성 러시아어 코퍼스로 측정합니다.
+
+    python -m benchmarks                          # 1k/10k/100k 단어, 결과 JSON 저장
+    python -m benchmarks --sizes 1000 --fake-morphology -o bench.json
+    python -m benchmarks --compare before.json -o after.json
+
+Gemini/Vision 호출은 네트워크 없이 결정적인 가짜 클라이언트(benchmarks.fakes)로 대체합니다.
+"""
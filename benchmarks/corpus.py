@@ -0,0 +1,110 @@
+"""
+합성 러시아어 코퍼스: 같은 크기/시드면 항상 같은 텍스트를 만듭니다.
+
+어휘는 자주 쓰는 실제 단어 + 어간 × 어미로 만든 명사/동사/형용사 변화형(수천 개)이고, 단어는 Zipf 분포로
+뽑습니다. 그래서 텍스트가 길어질수록 새 형태가 계속 나오며, 캐시/기본형 조회/하이라이트 측정이
+작은 어휘의 반복 조회만 재지 않습니다.
+"""
+import itertools
+import random
+
+# (표면형, 기본형, Mystem 품사 태그) - 실제 교재처럼 같은 기본형의 여러 형태가 섞이도록 구성 (가장 자주 나오는 순)
+COMMON_FORMS = (
+    ("человек", "человек", "S"), ("человека", "человек", "S"), ("люди", "человек", "S"),
+    ("город", "город", "S"), ("города", "город", "S"), ("городе", "город", "S"),
+    ("книга", "книга", "S"), ("книгу", "книга", "S"), ("книги", "книга", "S"),
+    ("улица", "улица", "S"), ("улице", "улица", "S"), ("улицы", "улица", "S"),
+    ("дом", "дом", "S"), ("дома", "дом", "S"), ("доме", "дом", "S"),
+    ("время", "время", "S"), ("времени", "время", "S"), ("день", "день", "S"), ("дня", "день", "S"),
+    ("работа", "работа", "S"), ("работу", "работа", "S"), ("друг", "друг", "S"), ("друзья", "друг", "S"),
+    ("студент", "студент", "S"), ("студенты", "студент", "S"), ("студентов", "студент", "S"),
+    ("идёт", "идти", "V"), ("шёл", "идти", "V"), ("идут", "идти", "V"),
+    ("читаю", "читать", "V"), ("читает", "читать", "V"), ("прочитал", "прочитать", "V"),
+    ("живёт", "жить", "V"), ("живут", "жить", "V"), ("жил", "жить", "V"),
+    ("говорит", "говорить", "V"), ("сказал", "сказать", "V"), ("знаю", "знать", "V"),
+    ("работает", "работать", "V"), ("видел", "видеть", "V"), ("хочет", "хотеть", "V"),
+    ("новый", "новый", "A"), ("новую", "новый", "A"), ("новом", "новый", "A"),
+    ("большой", "большой", "A"), ("большого", "большой", "A"), ("старые", "старый", "A"),
+    ("хороший", "хороший", "A"), ("русский", "русский", "A"), ("русского", "русский", "A"),
+    ("часто", "часто", "ADV"), ("уже", "уже", "ADV"), ("очень", "очень", "ADV"), ("сегодня", "сегодня", "ADV"),
+    ("в", "в", "PR"), ("на", "на", "PR"), ("по", "по", "PR"), ("с", "с", "PR"), ("о", "о", "PR"),
+    ("и", "и", "CONJ"), ("но", "но", "CONJ"), ("что", "что", "CONJ"),
+    ("не", "не", "PART"), ("же", "же", "PART"),
+    ("я", "я", "SPRO"), ("он", "он", "SPRO"), ("мы", "мы", "SPRO"), ("эту", "этот", "APRO"),
+)
+
+# 어간 × 어미로 만드는 변화형: 품사 → (기본형 어미, 변화 어미들)
+PARADIGMS = (
+    ("S", "", ("", "а", "у", "ом", "е", "ы", "ов", "ам", "ами", "ах")),
+    ("V", "ать", ("ать", "аю", "аешь", "ает", "аем", "аете", "ают", "ал", "ала", "али")),
+    ("A", "ый", ("ый", "ая", "ое", "ые", "ого", "ому", "ым", "ом", "ую", "ой", "ых")),
+)
+GENERATED_LEMMAS = 1200
+ZIPF_EXPONENT = 1.0
+
+
+def _stems(n, seed=0) -> list:
+    """자음-모음-자음-모음-자음 다섯 글자 어간 n개 (길이가 같아 서로 다른 어간의 변화형이 겹치지 않음)"""
+    consonants, vowels = "бвгдзклмнпрстфхчшж", "аоуиеы"
+    stems = ["".join(letters) for letters in itertools.product(consonants, vowels, consonants, vowels, consonants)]
+    random.Random(f"stems:{seed}").shuffle(stems)
+    return stems[:n]
+
+
+def _generated_forms(n_lemmas) -> list:
+    forms = []
+    for i, stem in enumerate(_stems(n_lemmas)):
+        pos, lemma_ending, endings = PARADIGMS[i % len(PARADIGMS)]
+        forms.extend((stem + ending, stem + lemma_ending, pos) for ending in endings)
+    return forms
+
+
+WORD_FORMS = COMMON_FORMS + tuple(_generated_forms(GENERATED_LEMMAS))
+# Zipf 가중치 (순위 r → 1/r^s), random.choices용 누적 가중치
+_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(WORD_FORMS))))
+_SURFACES = [surface for surface, _, _ in WORD_FORMS]
+
+# 괄호 엑셀 변환용: 괄호 안에 넣을 단어 묶음
+BRACKET_CONTENTS = (
+    "книги", "в городе", "старые дома", "студентов", "на улице", "новую работу",
+    "русского друга", "большие города", "о времени", "читающий", "прочитав",
+)
+
+
+def synthetic_text(n_words, seed=0, min_sentence=5, max_sentence=14) -> str:
+    """문장 길이 5~14 단어의 텍스트. 문단은 대략 8문장마다 줄바꿈으로 나눕니다."""
+    rng = random.Random(f"text:{n_words}:{seed}")
+    sentences = []
+    produced = 0
+    while produced < n_words:
+        length = min(rng.randint(min_sentence, max_sentence), n_words - produced)
+        words = rng.choices(_SURFACES, cum_weights=_CUM_WEIGHTS, k=length)
+        words[0] = words[0].capitalize()
+        sentences.append(" ".join(words) + rng.choice(".....!?"))
+        produced += length
+    paragraphs = [" ".join(sentences[i:i + 8]) for i in range(0, len(sentences), 8)]
+    return "\n".join(paragraphs)
+
+
+def synthetic_bracket_lines(n_words, seed=0) -> list:
+    """'... (괄호 안 단어) ...' 형식의 교재 줄 목록 (대략 n_words 단어 분량)"""
+    rng = random.Random(f"brackets:{n_words}:{seed}")
+    lines = []
+    for line in synthetic_text(n_words, seed).split("\n"):
+        words = line.split(" ")
+        for _ in range(max(1, len(words) // 6)):
+            position = rng.randrange(len(words))
+            words.insert(position, f"({rng.choice(BRACKET_CONTENTS)})")
+        lines.append(" ".join(words))
+    return lines
+
+
+def selected_words(n) -> list:
+    """하이라이트/단어 목록용 선택 단어 n개 (자주 나오는 형태부터, 모자라면 텍스트에 없는 단어로 채움)"""
+    surfaces = [surface for surface, _, pos in WORD_FORMS if pos in ("S", "V", "A", "ADV")]
+    words = []
+    for i in range(n):
+        surface = surfaces[i % len(surfaces)]
+        # 텍스트에 없는 단어: 하이라이트 패턴 크기만 키움
+        words.append(surface + "ка" * (i // len(surfaces)))
+    return words
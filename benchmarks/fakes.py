@@ -0,0 +1,185 @@
+"""
+네트워크/외부 바이너리 없이 쓰는 결정적인 가짜 클라이언트.
+
+- FakeGeminiClient: genai.Client 대신 (client.models.generate_content / generate_content_stream)
+- FakeVisionClient: vision.ImageAnnotatorClient 대신 (client.text_detection)
+- FakeMystem / FakeMorphAnalyzer: Mystem 바이너리나 pymorphy2가 없는 환경용 (--fake-morphology)
+- FakeAccentizer: ruaccent 모델 대신 (강세 표시)
+
+같은 입력에는 항상 같은 응답을 돌려주고, latency 인자로 API 왕복 시간을 흉내 낼 수 있습니다.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from .corpus import WORD_FORMS
+
+
+class FakeModels:
+    def __init__(self, latency=0.0, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents, config=None):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and calls % self.fail_every == 0:
+            # GeminiExecutor가 재시도하는 일시적 오류 (재시도/백오프 경로 측정용)
+            raise RuntimeError("503 UNAVAILABLE: fake overload")
+        schema = (config or {}).get("response_schema")
+        if schema is None:
+            return SimpleNamespace(text=f"[KO] {contents.strip()[:80]}")
+        if schema.get("type") == "array" and schema["items"].get("type") == "string":
+            # 문장 번역 청크: 프롬프트 마지막 줄의 JSON 배열 길이만큼 번역문을 돌려줌
+            payload = json.loads(contents.rsplit("\n", 1)[-1])
+            return SimpleNamespace(text=json.dumps([f"[KO] {item['text']}" for item in payload], ensure_ascii=False))
+        if schema.get("type") == "array":
+            # 단어 정보 일괄 조회: "1. 러시아어 단어: X." 줄마다 한 항목
+            words = re.findall(r"^\d+\. 러시아어 단어: (.+?)\. 기본형:", contents, flags=re.MULTILINE)
+            return SimpleNamespace(text=json.dumps([{"word": w, **fake_word_info(w)} for w in words], ensure_ascii=False))
+        word = re.search(r"러시아어 단어: (.+?)\. 기본형:", contents)
+        return SimpleNamespace(text=json.dumps(fake_word_info(word.group(1) if word else ""), ensure_ascii=False))
+
+    def generate_content_stream(self, model, contents, config=None, piece_chars=7):
+        """
+        스트리밍 번역 흉내: "[n] 문장" 줄마다 "[n] <PHRASE_START>[KO]<PHRASE_END> 문장"을 만들어
+        piece_chars 글자씩(마커 중간에서도) 잘라 보냅니다. 첫 조각까지 latency의 절반,
+        나머지 조각들에 걸쳐 남은 절반을 기다립니다 (전체 시간은 generate_content와 같음).
+        """
+        with self.lock:
+            self.calls += 1
+        numbered = re.findall(r"^\[(\d+)\] (.+)$", contents, flags=re.MULTILINE)
+        if numbered:
+            text = "\n".join(f"[{n}] <PHRASE_START>[KO]<PHRASE_END> {sentence}" for n, sentence in numbered)
+        else:
+            text = f"[KO] {contents.strip()[:80]}"
+        pieces = [text[i:i + piece_chars] for i in range(0, len(text), piece_chars)]
+        for i, piece in enumerate(pieces):
+            if self.latency:
+                time.sleep(self.latency / 2 if i == 0 else self.latency / 2 / max(1, len(pieces) - 1))
+            yield SimpleNamespace(text=piece)
+
+
+class FakeGeminiClient:
+    """genai.Client의 models.generate_content만 흉내 냅니다. fail_every=n이면 n번째 호출마다 503 오류를 냅니다."""
+
+    def __init__(self, latency=0.0, fail_every=0):
+        self.models = FakeModels(latency, fail_every)
+
+
+def fake_word_info(word):
+    return {
+        "ko_meanings": [f"뜻:{word}", f"뜻2:{word}"],
+        "grammatical_info": "주격",
+        "examples": [{"ru": f"{word}.", "ko": f"{word}."}],
+    }
+
+
+class FakeVisionClient:
+    """vision.ImageAnnotatorClient.text_detection 대신 이미지 해시로 만든 텍스트를 돌려줍니다."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def text_detection(self, image, image_context=None, timeout=None):
+        with self.lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        digest = hashlib.sha1(image.content).hexdigest()[:8]
+        return SimpleNamespace(text=f"Страница {digest}. Человек идёт по улице.", error=SimpleNamespace(message=""))
+
+
+# 가짜 형태소 분석용 사전: 표면형 → (기본형, Mystem 품사 태그)
+_FORMS = {surface: (lemma, gr) for surface, lemma, gr in WORD_FORMS}
+_TOKEN_RE = re.compile(r"\w+|[^\w]+", flags=re.UNICODE)
+
+
+class FakeMystem:
+    """pymystem3.Mystem.analyze와 같은 형식(text, analysis[lex, gr])의 결과를 사전 조회로 만듭니다."""
+
+    def analyze(self, text):
+        items = []
+        for surface in _TOKEN_RE.findall(text):
+            if surface[0].isalnum() or surface[0] == "_":
+                lemma, gr = _FORMS.get(surface.lower(), (surface.lower(), "S,мр,неод=им,ед"))
+                items.append({"text": surface, "analysis": [{"lex": lemma, "gr": f"{gr}="}]})
+            else:
+                items.append({"text": surface})
+        items.append({"text": "\n"})
+        return items
+
+
+# Mystem 품사 → OpenCorpora 품사 (FakeMorphAnalyzer용)
+_OPENCORPORA_POS = {"S": "NOUN", "V": "VERB", "A": "ADJF", "ADV": "ADVB", "PR": "PREP", "CONJ": "CONJ",
+                    "PART": "PRCL", "SPRO": "NPRO", "APRO": "ADJF"}
+
+
+class FakeTag(set):
+    """pymorphy2 OpencorporaTag처럼 'in' 검사와 .POS를 지원"""
+
+    def __init__(self, pos, grammemes=()):
+        super().__init__({pos, *grammemes})
+        self.POS = pos
+
+    def __str__(self):
+        return ",".join(sorted(self))
+
+
+class FakeParse:
+    def __init__(self, word):
+        lemma, gr = _FORMS.get(word.lower(), (word.lower(), "S"))
+        self.word = word
+        self.normal_form = lemma
+        tags = set()
+        if word.lower().endswith(("ы", "и", "ов")):
+            tags.add("plur")
+        if word.lower().endswith("щий"):
+            tags.add("PRTF")
+        if word.lower().endswith("ав"):
+            tags.add("GRND")
+        self.tag = FakeTag(_OPENCORPORA_POS.get(gr, "NOUN"), tags)
+
+    def inflect(self, grammemes):
+        return SimpleNamespace(word=self.normal_form + "ы") if "plur" in grammemes else None
+
+
+class FakeMorphAnalyzer:
+    """pymorphy2.MorphAnalyzer.parse 대신 (normal_form, tag, inflect)만 흉내 냅니다."""
+
+    def parse(self, word):
+        return [FakeParse(word)]
+
+
+class FakeAccentizer:
+    """
+    ruaccent.RUAccent.process_all 흉내: 모음이 둘 이상인 단어의 마지막 모음 앞에 '+'를 넣고,
+    ruaccent처럼 허용 목록 밖의 기호('–', '…', '%', '№' 등)와 문장부호 앞 공백을 지웁니다.
+    calls로 모델 호출(문장) 수를 셉니다.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def process_all(self, text):
+        self.calls += 1
+
+        def accent(match):
+            word = match.group()
+            vowels = [i for i, ch in enumerate(word) if ch.lower() in "аеёиоуыэюя"]
+            if len(vowels) < 2:
+                return word
+            return word[:vowels[-1]] + "+" + word[vowels[-1]:]
+
+        text = re.sub(r"[–—…%№«»]", "", text)
+        return re.sub(r"\s+([.,!?;:])", r"\1", re.sub(r"\w+", accent, text))
@@ -0,0 +1,422 @@
+"""
+벤치마크 실행기: 경우마다 repeat번 측정해 최소/중앙값을 JSON으로 저장하고,
+--compare로 이전 결과(다른 커밋)와 비교합니다.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from ru_analyzer import highlight, morphology
+from ru_analyzer.backends import MystemBackend, Pymorphy2Backend
+from ru_analyzer.brackets import iter_bracket_rows, make_bracket_lemmatizer, save_to_excel
+from ru_analyzer.gemini import WORD_INFO_BATCH_SIZE, GeminiExecutor, WordInfoFetcher
+from ru_analyzer.paging import Document
+from ru_analyzer.prefetch import prefetch_items
+from ru_analyzer.stress import StressAnnotator
+from ru_analyzer.translation import translate_sentences, translate_sentences_stream
+from ru_analyzer.wordlist import WordList, build_word_rows
+
+from . import corpus
+from .fakes import FakeAccentizer, FakeGeminiClient, FakeMorphAnalyzer, FakeMystem, FakeVisionClient
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+HIGHLIGHT_COUNTS = (1, 10, 100, 1000)
+PAGE_SENTENCES = 40
+# 캐시 없이(analyze_word 직접 호출) 조회할 서로 다른 단어 수 상한 (실제 Mystem은 호출마다 파이프 왕복)
+COLD_LOOKUP_LIMIT = 2000
+# 단어 정보 일괄 조회(fetch_many)로 묻는 내용어 수 상한과 단건 조회(fetch)로 비교할 단어 수
+WORD_INFO_LIMIT = 500
+WORD_INFO_SINGLE = 20
+
+
+class DictMemory:
+    """translate_sentences용 메모리 번역 메모리 (get/set)"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+def measure(fn, repeat, setup=None):
+    """setup()은 측정 시간에서 빼고 매 반복 전에 호출합니다. 마지막 fn() 반환값도 돌려줍니다."""
+    runs, result = [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return runs, result
+
+
+def clear_morphology_caches():
+    morphology.SENTENCE_TOKENS.data.clear()
+    morphology.analyze_word_with.cache_clear()
+
+
+def clear_word_caches():
+    morphology.analyze_word_with.cache_clear()
+    backend = morphology.get_word_backend()
+    if hasattr(backend.analyze_word, "cache_clear"):
+        backend.analyze_word.cache_clear()
+
+
+class Suite:
+    def __init__(self, repeat, backend, morph):
+        self.repeat = repeat
+        self.backend = backend
+        self.morph = morph
+        self.results = []
+
+    def record(self, name, size, fn, setup=None, **params):
+        runs, result = measure(fn, self.repeat, setup)
+        self.record_runs(name, size, runs, **params)
+        return result
+
+    def record_runs(self, name, size, runs, **params):
+        """직접 잰 시간 목록(초)을 결과에 추가 (예: 스트리밍 첫 글자까지 걸린 시간)"""
+        entry = {
+            "name": name,
+            "size": size,
+            "params": params,
+            "min_s": min(runs),
+            "median_s": statistics.median(runs),
+            "runs_s": runs,
+        }
+        self.results.append(entry)
+        print(f"  {name:<32} size={size:<7} {format_params(params):<18} "
+              f"min {entry['min_s'] * 1000:9.2f} ms  median {entry['median_s'] * 1000:9.2f} ms", flush=True)
+
+    # ---- 형태소 분석 ----
+    def bench_morphology(self, size, text):
+        token_table = self.record(
+            "analyze_text.cold", size,
+            lambda: morphology.analyze_text(text, self.backend), setup=clear_morphology_caches,
+        )
+        self.record("analyze_text.warm", size, lambda: morphology.analyze_text(text, self.backend))
+
+        words = [token["text"] for token in token_table["tokens"]]
+
+        def lookup_all():
+            for word in words:
+                morphology.lemmatize_ru(word, token_table)
+                morphology.get_pos_ru(word, token_table)
+
+        self.record("lemmatize_pos.token_table", size, lookup_all, words=len(words))
+
+        unique = list(dict.fromkeys(word.lower() for word in words))[:COLD_LOOKUP_LIMIT]
+
+        def lookup_cold():
+            for word in unique:
+                morphology.lemmatize_ru(word)
+                morphology.get_pos_ru(word)
+
+        self.record("lemmatize_pos.no_table", size, lookup_cold, setup=clear_word_caches,
+                    words=len(unique))
+
+    # ---- 하이라이트 ----
+    def bench_highlight(self, size, text):
+        for count in HIGHLIGHT_COUNTS:
+            words = corpus.selected_words(count)
+            self.record(
+                "get_highlighted_html", size,
+                lambda: highlight.get_highlighted_html(text, words),
+                setup=highlight.compile_highlighter.cache_clear, selected=count,
+            )
+
+        # 강세 표시: 문장별 캐시 적중 시 정렬/조회 비용과 강세가 들어간 HTML 생성 (모델은 가짜)
+        annotator = StressAnnotator(FakeAccentizer())
+        marks = annotator.annotate(text)
+        self.record("stress_annotate.warm", size, lambda: annotator.annotate(text), marks=len(marks))
+        words = corpus.selected_words(10)
+        self.record("get_highlighted_html.stress", size,
+                    lambda: highlight.get_highlighted_html(text, words, marks), selected=10)
+
+    # ---- 긴 문서 페이지 단위 ----
+    def bench_paging(self, size, text):
+        document = self.record("document.build", size, lambda: Document(text, PAGE_SENTENCES),
+                               page_sentences=PAGE_SENTENCES)
+        page = document.page_count // 2
+        words = corpus.selected_words(10)
+
+        # 한 페이지 보기: 분석(캐시 없음) + 하이라이팅 — 문서 크기와 무관해야 함
+        def view_page():
+            page_text = document.page_text(page)
+            page_table = morphology.analyze_text(page_text, self.backend)
+            document.record_page(page, page_table)
+            return highlight.get_highlighted_html(page_text, words)
+
+        self.record("document.view_page", size, view_page, setup=clear_morphology_caches,
+                    pages=document.page_count)
+        self.record("document.find_pages", size, lambda: [document.find_pages(word) for word in words],
+                    words=len(words))
+        document.index_all(lambda page_text: morphology.analyze_text(page_text, self.backend))
+        self.record("document.token_table", size, document.token_table, forms=len(document.index))
+
+    # ---- 괄호 → 엑셀 ----
+    def bench_brackets(self, size):
+        lines = corpus.synthetic_bracket_lines(size)
+        rows = self.record(
+            "iter_bracket_rows", size,
+            lambda: list(iter_bracket_rows(lines, make_bracket_lemmatizer(self.morph))),
+        )
+        self.record("save_to_excel", size, lambda: save_to_excel(rows), rows=len(rows))
+
+        def pipeline():
+            source = io.StringIO("\n".join(lines))
+            return save_to_excel(iter_bracket_rows((line.rstrip("\n") for line in source),
+                                                   make_bracket_lemmatizer(self.morph)))
+
+        self.record("bracket_pipeline", size, pipeline)
+
+    # ---- 단어 목록/Quizlet ----
+    def bench_wordlist(self, size, token_table):
+        lemmas = list(token_table["lemmas"])
+        selected = [token["text"] for token in token_table["tokens"]]
+        word_info = {lemma: {"pos": "명사", "ko_meanings": [f"뜻:{lemma}", "둘째 뜻"]} for lemma in lemmas}
+
+        self.record(
+            "build_word_rows", size,
+            lambda: build_word_rows(selected, word_info, token_table), selected=len(selected),
+        )
+        # 앱과 같은 경로: WordList.sync로 행을 만들고 export()로 내보내기 (형식별 캐시는 매번 비움)
+        word_list = WordList()
+        rows = word_list.sync(selected, word_info, token_table)
+
+        def clear_exports():
+            word_list.exports = {}
+
+        for fmt in ("quizlet", "csv"):
+            self.record(f"WordList.export.{fmt}", size, lambda fmt=fmt: word_list.export(fmt),
+                        setup=clear_exports, rows=len(rows))
+
+    # ---- 번역 (가짜 Gemini) ----
+    def bench_translation(self, size, text, latency):
+        client = FakeGeminiClient(latency=latency)
+        highlights = corpus.selected_words(10)
+        memory = DictMemory()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            def translate():
+                return translate_sentences(text, highlights, client, pool.submit, memory)
+
+            self.record("translate_sentences.cold", size, translate, setup=memory.data.clear,
+                        latency_ms=int(latency * 1000))
+            calls_before = client.models.calls
+            self.record("translate_sentences.warm", size, translate)
+            assert client.models.calls == calls_before, "번역 메모리가 적중하지 않았습니다"
+
+            # 스트리밍: 전체 시간과 첫 번역문이 화면에 나오기까지의 시간
+            first_text = []
+
+            def translate_stream():
+                start = time.perf_counter()
+                seen = []
+
+                def on_update(html):
+                    if not seen and "[KO]" in html:
+                        seen.append(time.perf_counter() - start)
+
+                result = translate_sentences_stream(text, highlights, client, pool.submit, memory, on_update)
+                first_text.extend(seen)
+                return result
+
+            self.record("translate_stream.cold", size, translate_stream, setup=memory.data.clear,
+                        latency_ms=int(latency * 1000))
+            self.record_runs("translate_stream.first_text", size, first_text, latency_ms=int(latency * 1000))
+
+    # ---- 단어 정보 (가짜 Gemini, 공유 실행기 경유) ----
+    def bench_word_info(self, size, token_table, latency):
+        items = prefetch_items(token_table, WORD_INFO_LIMIT)
+        if not items:
+            return
+        for fail_every, suffix in ((0, ""), (3, ".retry")):
+            # 속도 제한은 측정에 끼지 않도록 크게, 백오프는 짧게 (재시도 경로 자체의 비용만 보이도록)
+            client = FakeGeminiClient(latency=latency, fail_every=fail_every)
+            executor = GeminiExecutor(max_workers=4, requests_per_minute=1_000_000, base_delay=0.01, max_delay=0.05)
+            cache = DictMemory()
+            fetcher = WordInfoFetcher(client, executor, cache)
+            params = {"words": len(items), "latency_ms": int(latency * 1000)}
+
+            results = self.record(f"fetch_many.cold{suffix}", size, lambda: fetcher.fetch_many(items),
+                                  setup=cache.data.clear, batch=WORD_INFO_BATCH_SIZE, **params)
+            assert all("뜻:" in str(info["ko_meanings"]) for info in results), "일괄 조회 결과가 비었습니다"
+            if not fail_every:
+                calls_before = client.models.calls
+                self.record("fetch_many.warm", size, lambda: fetcher.fetch_many(items), **params)
+                assert client.models.calls == calls_before, "단어 정보 캐시가 적중하지 않았습니다"
+                # 같은 단어들을 한 단어씩 물었을 때 (일괄 조회 이전 방식)
+                single = items[:WORD_INFO_SINGLE]
+                self.record("fetch.cold", size, lambda: [fetcher.fetch(*item) for item in single],
+                            setup=cache.data.clear, words=len(single), latency_ms=int(latency * 1000))
+            executor.pool.shutdown()
+
+    # ---- OCR (가짜 Vision) ----
+    def bench_ocr(self, pages, latency):
+        from ru_analyzer.ocr import ocr_image, ocr_pages
+
+        images = synthetic_page_images(pages)
+        client = FakeVisionClient(latency=latency)
+        store = DictMemory()
+
+        def run():
+            return ocr_pages(images, lambda image_bytes: ocr_image(image_bytes, client, store))
+
+        self.record("ocr_pages.cold", pages, run, setup=store.data.clear, latency_ms=int(latency * 1000))
+        self.record("ocr_pages.warm", pages, run)
+
+
+def synthetic_page_images(pages, size=(2480, 3508)):
+    """A4 300dpi 크기의 스캔 페이지 흉내 (PNG, 페이지마다 내용이 다름)"""
+    from PIL import Image, ImageDraw
+
+    images = []
+    for i in range(pages):
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        for line in range(60):
+            y = 150 + line * 52
+            draw.rectangle([200, y, 200 + (line * 37 + i * 101) % 2000, y + 20], fill="black")
+        output = io.BytesIO()
+        img.save(output, format="PNG")
+        images.append((f"page_{i + 1}.png", output.getvalue()))
+    return images
+
+
+def format_params(params):
+    return " ".join(f"{k}={v}" for k, v in params.items())
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except Exception:
+        return None
+
+
+def result_key(entry):
+    return entry["name"], entry["size"], json.dumps(entry["params"], sort_keys=True)
+
+
+def compare(baseline, results, threshold):
+    """중앙값 비율(현재/기준)을 출력하고, threshold를 넘게 느려진 경우 수를 반환합니다."""
+    before = {result_key(entry): entry for entry in baseline["results"]}
+    if baseline["meta"].get("morphology") != results["meta"]["morphology"]:
+        print("경고: 형태소 분석기 종류가 달라 결과를 직접 비교하기 어렵습니다.")
+    print(f"\n기준: {baseline['meta'].get('commit')}  →  현재: {results['meta'].get('commit')}")
+    regressions = 0
+    for entry in results["results"]:
+        old = before.get(result_key(entry))
+        if old is None or not old["median_s"]:
+            continue
+        ratio = entry["median_s"] / old["median_s"]
+        flag = ""
+        if ratio > threshold:
+            flag = "  ← 느려짐"
+            regressions += 1
+        print(f"  {entry['name']:<32} size={entry['size']:<7} {format_params(entry['params']):<18} x{ratio:6.2f}{flag}")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="러시아어 텍스트 분석기 성능 측정")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="코퍼스 단어 수")
+    parser.add_argument("--repeat", type=int, default=3, help="경우마다 반복 측정 횟수 (최소/중앙값 기록)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="결과 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="--compare 시 이 배율보다 느려지면 종료 코드 1 (기본 1.25)")
+    parser.add_argument("--backend", choices=("mystem", "pymorphy2"), default="mystem",
+                        help="형태소 분석 백엔드 (텍스트 분석과 단어 조회 모두)")
+    parser.add_argument("--fake-morphology", action="store_true",
+                        help="Mystem/pymorphy2 대신 사전 기반 가짜 분석기 사용 (바이너리가 없는 CI용)")
+    parser.add_argument("--api-latency", type=float, default=0.0,
+                        help="가짜 Gemini/Vision 응답 지연(초). 0이면 순수 로컬 처리 시간만 측정")
+    parser.add_argument("--ocr-pages", type=int, default=8, help="OCR 경우의 페이지 수 (0이면 건너뜀)")
+    parser.add_argument("--only", nargs="+",
+                        choices=("morphology", "highlight", "paging", "brackets", "wordlist", "wordinfo", "translation",
+                                 "ocr"),
+                        help="일부 경우만 실행")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    selected = set(args.only or ("morphology", "highlight", "paging", "brackets", "wordlist", "wordinfo", "translation",
+                                 "ocr"))
+
+    if args.fake_morphology:
+        mystem, morph = FakeMystem(), FakeMorphAnalyzer()
+    else:
+        import pymorphy2
+        mystem, morph = morphology.get_mystem(), pymorphy2.MorphAnalyzer()
+    if args.backend == "pymorphy2":
+        backend = Pymorphy2Backend(morph)
+    else:
+        backend = MystemBackend(mystem)
+    # 토큰 테이블에 없는 단어 조회(analyze_word)도 같은 백엔드를 쓰도록
+    morphology.set_backend(backend)
+
+    suite = Suite(args.repeat, backend, morph)
+    for size in args.sizes:
+        print(f"[{size} 단어]", flush=True)
+        text = corpus.synthetic_text(size)
+        clear_morphology_caches()
+        token_table = morphology.analyze_text(text, backend)
+        if "morphology" in selected:
+            suite.bench_morphology(size, text)
+        if "highlight" in selected:
+            suite.bench_highlight(size, text)
+        if "paging" in selected:
+            suite.bench_paging(size, text)
+        if "brackets" in selected:
+            suite.bench_brackets(size)
+        if "wordlist" in selected:
+            suite.bench_wordlist(size, token_table)
+        if "wordinfo" in selected:
+            suite.bench_word_info(size, token_table, args.api_latency)
+        if "translation" in selected:
+            suite.bench_translation(size, text, args.api_latency)
+    if "ocr" in selected and args.ocr_pages:
+        print(f"[OCR {args.ocr_pages} 페이지]", flush=True)
+        suite.bench_ocr(args.ocr_pages, args.api_latency)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "morphology": f"{args.backend}{' (fake)' if args.fake_morphology else ''}",
+            "repeat": args.repeat,
+            "api_latency_s": args.api_latency,
+        },
+        "results": suite.results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
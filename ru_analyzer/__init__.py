@@ -0,0 +1,54 @@
+"""
+러시아어 텍스트 분석기의 핵심 기능 (Streamlit 없이 import 가능).
+
+Streamlit 앱(ru_text_analyzer.py)과 명령행 배치 처리(python -m ru_analyzer)가 함께 사용합니다.
+"""
+from .backends import MystemBackend, Pymorphy2Backend, compare_backends, create_backend
+from .cache import PersistentCache
+from .export import EXPORT_FORMATS, export_bytes
+from .brackets import iter_bracket_rows, iter_text_lines, make_bracket_lemmatizer, save_to_excel
+from .gemini import GeminiExecutor, WordInfoFetcher
+from .glossary import Glossary
+from .paging import Document
+from .prefetch import Prefetcher
+from .highlight import get_highlighted_html, highlight_spans
+from .morphology import POS_MAP, MystemPool, analyze_text, get_pos_ru, lemmatize_ru, set_backend, text_hash
+from .stress import StressAnnotator
+from .vocabulary import build_vocabulary, build_vocabulary_from_rows
+from .wordlist import WordList, build_lemma_rows, build_word_rows, is_error_info, quizlet_text
+
+__all__ = [
+    "Document",
+    "EXPORT_FORMATS",
+    "GeminiExecutor",
+    "Glossary",
+    "MystemBackend",
+    "MystemPool",
+    "PersistentCache",
+    "POS_MAP",
+    "Prefetcher",
+    "Pymorphy2Backend",
+    "StressAnnotator",
+    "WordInfoFetcher",
+    "WordList",
+    "analyze_text",
+    "build_lemma_rows",
+    "build_vocabulary",
+    "build_vocabulary_from_rows",
+    "build_word_rows",
+    "compare_backends",
+    "create_backend",
+    "export_bytes",
+    "get_highlighted_html",
+    "get_pos_ru",
+    "highlight_spans",
+    "is_error_info",
+    "iter_bracket_rows",
+    "iter_text_lines",
+    "lemmatize_ru",
+    "make_bracket_lemmatizer",
+    "quizlet_text",
+    "save_to_excel",
+    "set_backend",
+    "text_hash",
+]
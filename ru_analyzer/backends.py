@@ -0,0 +1,152 @@
+"""
+형태소 분석 백엔드: Mystem(외부 프로세스, 문맥 기반 중의성 해소)과 pymorphy2(프로세스 내부, 사전 조회).
+
+두 백엔드 모두 토큰 {text, start, end, lemma, gr, pos}를 만들고, pos는 POS_MAP의 한국어 품사명을 씁니다.
+gr은 각 분석기의 원래 문법 태그입니다 (Mystem 'S,жен,неод=им,ед' / pymorphy2 'NOUN,inan,femn sing,nomn').
+
+    python -m ru_analyzer compare 본문.txt          # 두 백엔드의 일치율/처리 속도 비교
+"""
+import re
+import time
+import functools
+from collections import Counter
+
+from . import metrics
+from .morphology import POS_MAP, UNKNOWN_POS, get_mystem, token_from_analysis, tokenize_with_offsets
+
+WORD_RE = re.compile(r'\w+', flags=re.UNICODE)
+
+# pymorphy2(OpenCorpora) 품사 → Mystem 품사 약어 (POS_MAP 키). 형동사/부동사는 Mystem처럼 동사로 봅니다.
+OPENCORPORA_TO_MYSTEM = {
+    'NOUN': 'S', 'ADJF': 'A', 'ADJS': 'A', 'COMP': 'COMP', 'VERB': 'V', 'INFN': 'V',
+    'PRTF': 'V', 'PRTS': 'V', 'GRND': 'V', 'NUMR': 'NUM', 'ADVB': 'ADV', 'NPRO': 'SPRO',
+    'PRED': 'ADV', 'PREP': 'PR', 'CONJ': 'CONJ', 'PRCL': 'PART', 'INTJ': 'INTJ',
+}
+
+
+class MystemBackend:
+    """Mystem 백엔드. analyzer를 주지 않으면 기본 분석기(get_mystem(), 보통 MystemPool)를 씁니다."""
+
+    name = "mystem"
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer
+
+    def tokenize(self, text) -> list:
+        return tokenize_with_offsets(text, self.analyzer or get_mystem())
+
+    def analyze_word(self, word) -> dict:
+        analysis = (self.analyzer or get_mystem()).analyze(word)
+        if analysis:
+            return token_from_analysis(analysis[0])
+        return {"text": word, "lemma": word, "gr": "", "pos": UNKNOWN_POS}
+
+
+class Pymorphy2Backend:
+    """
+    pymorphy2 백엔드. 파이프 왕복 없이 프로세스 안에서 사전을 조회하므로 단어 하나 조회가 훨씬 빠릅니다.
+    문맥을 보지 않으므로 동형이의어는 가장 확률이 높은 분석을 고릅니다.
+    """
+
+    name = "pymorphy2"
+
+    def __init__(self, morph=None, cache_size=100_000):
+        if morph is None:
+            import pymorphy2
+            morph = pymorphy2.MorphAnalyzer()
+        self.morph = morph
+        self.analyze_word = functools.lru_cache(maxsize=cache_size)(self._analyze_word)
+
+    def _analyze_word(self, word) -> dict:
+        parsed = self.morph.parse(word)[0]
+        pos_tag = OPENCORPORA_TO_MYSTEM.get(parsed.tag.POS)
+        return {
+            "text": word,
+            "lemma": parsed.normal_form,
+            "gr": str(parsed.tag),
+            "pos": POS_MAP[pos_tag] if pos_tag else UNKNOWN_POS,
+        }
+
+    def tokenize(self, text) -> list:
+        tokens = []
+        with metrics.timed("pymorphy2"):
+            for match in WORD_RE.finditer(text):
+                token = dict(self.analyze_word(match.group()))
+                token["start"], token["end"] = match.span()
+                tokens.append(token)
+        return tokens
+
+
+BACKENDS = {"mystem": MystemBackend, "pymorphy2": Pymorphy2Backend}
+
+
+def create_backend(name, **kwargs):
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"알 수 없는 형태소 분석 백엔드: {name} (가능: {', '.join(BACKENDS)})") from None
+
+
+def compare_backends(text, backends, reference=None, max_words=2000) -> dict:
+    """
+    같은 텍스트를 여러 백엔드로 분석해 처리 속도와 기준 백엔드(reference, 기본은 첫 번째) 대비
+    기본형/품사 일치율, 자주 어긋나는 (표면형, 기준 기본형, 비교 기본형) 목록을 구합니다.
+    단어 조회 속도는 캐시 없이 서로 다른 단어 max_words개를 한 번씩 조회한 시간입니다.
+    """
+    reference = reference or backends[0].name
+    if reference not in {backend.name for backend in backends}:
+        raise ValueError(f"기준 백엔드 {reference}가 비교할 백엔드 목록에 없습니다")
+    results = {}
+    tokens_by_backend = {}
+    for backend in backends:
+        start = time.perf_counter()
+        tokens = backend.tokenize(text)
+        text_seconds = time.perf_counter() - start
+        tokens_by_backend[backend.name] = tokens
+
+        words = list(dict.fromkeys(token["text"].lower() for token in tokens))[:max_words]
+        lookup = getattr(backend, "_analyze_word", backend.analyze_word)  # lru_cache를 거치지 않고 측정
+        start = time.perf_counter()
+        for word in words:
+            lookup(word)
+        word_seconds = time.perf_counter() - start
+
+        results[backend.name] = {
+            "tokens": len(tokens),
+            "text_seconds": text_seconds,
+            "tokens_per_second": len(tokens) / text_seconds if text_seconds else None,
+            "word_lookups": len(words),
+            "word_lookup_ms": word_seconds / len(words) * 1000 if words else None,
+        }
+
+    ref_tokens = {token["start"]: token for token in tokens_by_backend[reference]}
+    for name, tokens in tokens_by_backend.items():
+        if name == reference:
+            continue
+        aligned = lemma_same = pos_same = 0
+        lemma_diffs, pos_diffs = Counter(), Counter()
+        for token in tokens:
+            ref = ref_tokens.get(token["start"])
+            if ref is None or ref["end"] != token["end"]:
+                continue
+            aligned += 1
+            if ref["lemma"].lower().replace("ё", "е") == token["lemma"].lower().replace("ё", "е"):
+                lemma_same += 1
+            else:
+                lemma_diffs[(token["text"].lower(), ref["lemma"], token["lemma"])] += 1
+            if ref["pos"] == token["pos"]:
+                pos_same += 1
+            else:
+                pos_diffs[(ref["pos"], token["pos"])] += 1
+        results[name]["vs"] = reference
+        results[name]["aligned_tokens"] = aligned
+        results[name]["lemma_agreement"] = lemma_same / aligned if aligned else None
+        results[name]["pos_agreement"] = pos_same / aligned if aligned else None
+        results[name]["top_lemma_differences"] = [
+            {"text": text_, reference: ref_lemma, name: lemma, "count": n}
+            for (text_, ref_lemma, lemma), n in lemma_diffs.most_common(20)
+        ]
+        results[name]["top_pos_differences"] = [
+            {reference: ref_pos, name: pos, "count": n} for (ref_pos, pos), n in pos_diffs.most_common(10)
+        ]
+    return results
@@ -0,0 +1,161 @@
+"""
+괄호 텍스트 → 엑셀 변환 파이프라인 (교재 정리용).
+
+Streamlit에 의존하지 않으므로 프로세스 풀 워커에서도 import할 수 있습니다.
+"""
+import io
+import re
+import functools
+from collections import deque
+
+# 괄호 안에서 분석 대상에서 제외하는 전치사
+RUSSIAN_PREPOSITIONS = {
+    "в", "во", "на", "с", "со", "к", "ко", "по", "о", "об", "обо", "от", "ото", "до",
+    "из", "изо", "у", "за", "над", "надо", "под", "подо", "перед", "передо", "при", "про",
+    "через", "без", "безо", "для", "между", "среди", "около", "вокруг", "после", "вместо",
+    "кроме", "сквозь", "ради", "против", "из-за", "из-под",
+}
+SENTENCE_SPLIT_RE = re.compile(r'(?<!\w\.\w.)(?<![А-Яа-я]\.)(?<![A-Za-z]\.)(?<!\.\d)[.!?]\s+')
+BRACKET_RE = re.compile(r'\((.*?)\)')
+EXCEL_COLUMNS = ("Sentence", "Original Words")
+
+
+def make_bracket_lemmatizer(morph, maxsize=100_000):
+    """
+    괄호 안 단어 → 기본형 변환 함수를 만듭니다.
+    교재에는 같은 단어가 반복되므로 결과를 LRU로 메모이즈합니다.
+    """
+
+    @functools.lru_cache(maxsize=maxsize)
+    def lemmatize_bracket_word(word):
+        p = morph.parse(word)[0]
+        lex = p.normal_form
+        if "PRTF" in p.tag: lex = f"{lex} (형동사)"
+        if "GRND" in p.tag: lex = f"{lex} (부동사)"
+        if "plur" in p.tag:  # 복수 주격 변환 (lexeme 전체를 훑지 않고 inflect 한 번)
+            plural = p.inflect({"plur", "nomn"})
+            if plural:
+                lex = plural.word
+        return lex
+
+    return lemmatize_bracket_word
+
+
+def iter_text_lines(binary_file, encoding="utf-8"):
+    """업로드 파일 전체를 decode하지 않고 한 줄씩 읽습니다."""
+    binary_file.seek(0)
+    text_stream = io.TextIOWrapper(binary_file, encoding=encoding)
+    try:
+        for line in text_stream:
+            yield line.rstrip("\r\n")
+    finally:
+        text_stream.detach()  # 업로드 파일 객체는 닫지 않음
+
+
+def iter_bracket_rows(lines, lemmatize_word):
+    """줄 → 문장 단위로 괄호 안 단어를 기본형으로 바꾼 행을 하나씩 생성합니다."""
+    for line in lines:
+        if not line.strip(): continue
+        for sentence in SENTENCE_SPLIT_RE.split(line.strip()):
+            if not sentence: continue
+            original_bracket_contents = []
+
+            def lemmatize_brackets(match):
+                original_text = match.group(1)
+                words = original_text.split()
+                filtered_words = [w for w in words if w.lower() not in RUSSIAN_PREPOSITIONS]
+                if not filtered_words: return ""
+
+                lemmatized_words = [lemmatize_word(word) for word in filtered_words]
+                original_bracket_contents.append(original_text)
+                return f"({', '.join(lemmatized_words)})"
+
+            proc_sent = BRACKET_RE.sub(lemmatize_brackets, sentence)
+            if original_bracket_contents:
+                yield {
+                    "Sentence": proc_sent.strip(),
+                    "Original Words": ", ".join(original_bracket_contents),
+                }
+
+
+def save_to_excel(rows):
+    """
+    write-only 워크북에 행을 만들어지는 대로 기록합니다. 열 너비/줄바꿈 서식은 한 번만 정하고,
+    전체 시트를 다시 훑지 않습니다. (엑셀 바이트, 기록한 행 수)를 반환합니다.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Processed Data')
+    ws.column_dimensions['A'].width = 100
+    ws.column_dimensions['B'].width = 50
+    ws.append(list(EXCEL_COLUMNS))
+
+    wrap = Alignment(wrap_text=True)
+    row_count = 0
+    for row in rows:
+        sentence_cell = WriteOnlyCell(ws, value=row[EXCEL_COLUMNS[0]])
+        sentence_cell.alignment = wrap
+        ws.append([sentence_cell] + [row[col] for col in EXCEL_COLUMNS[1:]])
+        row_count += 1
+
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue(), row_count
+
+
+# ---------------------- 멀티코어 처리 (프로세스 풀) ----------------------
+
+_worker_lemmatizer = None
+
+
+def init_bracket_worker():
+    """프로세스 풀 워커 초기화: 워커마다 MorphAnalyzer를 한 번만 로드합니다."""
+    global _worker_lemmatizer
+    import pymorphy2
+    _worker_lemmatizer = make_bracket_lemmatizer(pymorphy2.MorphAnalyzer())
+
+
+def process_line_chunk(lines):
+    return list(iter_bracket_rows(lines, _worker_lemmatizer))
+
+
+def iter_line_chunks(lines, chunk_lines=2000):
+    """줄 단위로 자른 청크와 그 청크의 UTF-8 바이트 수를 생성합니다."""
+    chunk, chunk_bytes = [], 0
+    for line in lines:
+        chunk.append(line)
+        chunk_bytes += len(line.encode("utf-8")) + 1
+        if len(chunk) >= chunk_lines:
+            yield chunk, chunk_bytes
+            chunk, chunk_bytes = [], 0
+    if chunk:
+        yield chunk, chunk_bytes
+
+
+def iter_bracket_rows_parallel(lines, executor, chunk_lines=2000, max_pending=8, on_progress=None):
+    """
+    iter_bracket_rows의 병렬 버전. 청크를 executor(프로세스 풀)에 나누어 보내고,
+    결과는 원래 순서대로 내보냅니다. 동시에 대기하는 청크는 max_pending개로 제한해
+    메모리 사용량을 일정하게 유지합니다. on_progress(처리한 바이트 수)를 호출합니다.
+    """
+    pending = deque()
+    bytes_done = 0
+
+    def drain_one():
+        nonlocal bytes_done
+        future, chunk_bytes = pending.popleft()
+        rows = future.result()
+        bytes_done += chunk_bytes
+        if on_progress:
+            on_progress(bytes_done)
+        return rows
+
+    for chunk, chunk_bytes in iter_line_chunks(lines, chunk_lines):
+        pending.append((executor.submit(process_line_chunk, chunk), chunk_bytes))
+        if len(pending) >= max_pending:
+            yield from drain_one()
+    while pending:
+        yield from drain_one()
@@ -0,0 +1,71 @@
+"""
+SQLite 파일 기반 영구 키-값 캐시 (단어 정보, 번역 메모리, OCR 결과가 함께 사용).
+
+값은 JSON으로 저장하므로 세션/프로세스 재시작/레플리카 간에 공유됩니다.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from . import metrics
+
+
+class PersistentCache:
+    """
+    SQLite 파일 기반 키-값 캐시. 세션/프로세스 재시작/레플리카 간에 공유됩니다.
+    - ttl(초)이 지난 항목은 조회 시 삭제
+    - max_entries를 넘으면 가장 오래 조회되지 않은 항목부터 삭제 (LRU)
+    """
+
+    def __init__(self, path, table="cache", ttl=None, max_entries=None):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+
+    def get(self, key):
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                metrics.cache_event(self.table, "miss")
+                return None
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self.conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                metrics.cache_event(self.table, "miss")
+                metrics.cache_event(self.table, "eviction")
+                return None
+            self.conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        metrics.cache_event(self.table, "hit")
+        return json.loads(value)
+
+    def set(self, key, value):
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.max_entries:
+                (count,) = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+                if count > self.max_entries:
+                    self.conn.execute(
+                        f"DELETE FROM {self.table} WHERE key IN "
+                        f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+                    metrics.cache_event(self.table, "eviction", count - self.max_entries)
@@ -0,0 +1,161 @@
+"""
+명령행 배치 처리: 텍스트 파일(또는 폴더 전체)을 브라우저 없이 분석해 CSV/TSV/XLSX로 저장합니다.
+
+    python -m ru_analyzer brackets 교재폴더/ -o out/ --format xlsx --workers 8
+    python -m ru_analyzer words 교재폴더/ -o out/ --format csv --backend pymorphy2
+    python -m ru_analyzer compare 교재폴더/ --backends mystem pymorphy2
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from .brackets import (
+    EXCEL_COLUMNS,
+    init_bracket_worker,
+    iter_bracket_rows,
+    iter_bracket_rows_parallel,
+    iter_text_lines,
+    make_bracket_lemmatizer,
+    save_to_excel,
+)
+from .backends import BACKENDS, compare_backends, create_backend
+from .export import write_table
+from .morphology import analyze_text
+from .wordlist import LEMMA_LIST_COLUMNS, build_lemma_rows
+
+FORMATS = ("xlsx", "csv", "tsv")
+
+
+def iter_input_files(paths, pattern="*.txt"):
+    """(입력 파일, 기준 폴더) 쌍을 생성합니다. 폴더는 pattern으로 재귀 검색합니다."""
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for file_path in sorted(path.rglob(pattern)):
+                if file_path.is_file():
+                    yield file_path, path
+        elif path.is_file():
+            yield path, path.parent
+        else:
+            print(f"경고: '{raw}' 파일/폴더를 찾을 수 없습니다.", file=sys.stderr)
+
+
+def output_path(out_dir, file_path, base_dir, prefix, fmt):
+    """입력 폴더 구조를 유지한 출력 경로 (예: out/1과/analysis_본문.xlsx)"""
+    relative_parent = file_path.parent.relative_to(base_dir)
+    target_dir = Path(out_dir) / relative_parent
+    target_dir.mkdir(parents=True, exist_ok=True)
+    return target_dir / f"{prefix}_{file_path.stem}.{fmt}"
+
+
+def run_brackets(args):
+    executor = None
+    lemmatizer = None
+    if args.workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=init_bracket_worker)
+    else:
+        import pymorphy2
+        lemmatizer = make_bracket_lemmatizer(pymorphy2.MorphAnalyzer())
+
+    try:
+        for file_path, base_dir in iter_input_files(args.inputs, args.pattern):
+            target = output_path(args.output, file_path, base_dir, "analysis", args.format)
+            with open(file_path, "rb") as f:
+                lines = iter_text_lines(f, encoding=args.encoding)
+                if executor is not None:
+                    rows = iter_bracket_rows_parallel(lines, executor, max_pending=args.workers * 2)
+                else:
+                    rows = iter_bracket_rows(lines, lemmatizer)
+
+                if args.format == "xlsx":
+                    excel_bytes, row_count = save_to_excel(rows)
+                    target.write_bytes(excel_bytes)
+                else:
+                    row_count = write_table(rows, EXCEL_COLUMNS, target, args.format)
+            print(f"{file_path} → {target} ({row_count}행)", file=sys.stderr)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def run_words(args):
+    backend = create_backend(args.backend)
+    for file_path, base_dir in iter_input_files(args.inputs, args.pattern):
+        text = file_path.read_text(encoding=args.encoding)
+        rows = build_lemma_rows(analyze_text(text, backend))
+        target = output_path(args.output, file_path, base_dir, "words", args.format)
+        write_table(rows, LEMMA_LIST_COLUMNS, target, args.format)
+        print(f"{file_path} → {target} ({len(rows)}개 기본형)", file=sys.stderr)
+
+
+def run_compare(args):
+    if args.reference and args.reference not in args.backends:
+        args.parser.error(f"--reference {args.reference}는 --backends에 있어야 합니다 ({', '.join(args.backends)})")
+    text = "\n".join(
+        file_path.read_text(encoding=args.encoding)
+        for file_path, _ in iter_input_files(args.inputs, args.pattern)
+    )
+    backends = [create_backend(name) for name in args.backends]
+    results = compare_backends(text, backends, reference=args.reference, max_words=args.max_words)
+
+    for name, r in results.items():
+        speed = f"{r['tokens_per_second']:,.0f} 토큰/초" if r["tokens_per_second"] else "-"
+        lookup = f"{r['word_lookup_ms']:.3f} ms" if r["word_lookup_ms"] is not None else "-"
+        print(f"[{name}] 토큰 {r['tokens']:,}개, 텍스트 분석 {r['text_seconds']:.2f}초 ({speed}), "
+              f"단어 하나 조회 평균 {lookup}")
+        if "vs" in r and r["aligned_tokens"]:
+            print(f"  {r['vs']} 대비 (맞춰진 토큰 {r['aligned_tokens']:,}개): "
+                  f"기본형 일치 {r['lemma_agreement']:.1%}, 품사 일치 {r['pos_agreement']:.1%}")
+            for diff in r["top_lemma_differences"][:10]:
+                print(f"    {diff['text']}: {r['vs']}={diff[r['vs']]} / {name}={diff[name]} ({diff['count']}회)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ru_analyzer", description="러시아어 텍스트 분석기 배치 처리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(sub):
+        sub.add_argument("inputs", nargs="+", help="텍스트 파일 또는 폴더")
+        sub.add_argument("-o", "--output", default="output", help="출력 폴더 (기본: output)")
+        sub.add_argument("-f", "--format", choices=FORMATS, default="xlsx")
+        sub.add_argument("--pattern", default="*.txt", help="폴더에서 찾을 파일 패턴 (기본: *.txt)")
+        sub.add_argument("--encoding", default="utf-8")
+
+    brackets = subparsers.add_parser("brackets", help="괄호 안 단어를 기본형으로 바꾼 문장 목록")
+    add_common(brackets)
+    brackets.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                          help="병렬 처리 프로세스 수 (1이면 단일 프로세스)")
+    brackets.set_defaults(func=run_brackets)
+
+    words = subparsers.add_parser("words", help="텍스트 전체의 기본형/품사/빈도 목록")
+    add_common(words)
+    words.add_argument("--backend", choices=list(BACKENDS), default="mystem", help="형태소 분석 백엔드")
+    words.set_defaults(func=run_words)
+
+    compare = subparsers.add_parser("compare", help="형태소 분석 백엔드 간 일치율/처리 속도 비교")
+    compare.add_argument("inputs", nargs="+", help="비교에 쓸 텍스트 파일 또는 폴더")
+    compare.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    compare.add_argument("--reference", choices=list(BACKENDS), help="기준 백엔드 (기본: 첫 번째)")
+    compare.add_argument("--max-words", type=int, default=2000, help="단어 조회 속도를 잴 서로 다른 단어 수")
+    compare.add_argument("--json", help="결과를 JSON으로도 저장할 경로")
+    compare.add_argument("--pattern", default="*.txt", help="폴더에서 찾을 파일 패턴 (기본: *.txt)")
+    compare.add_argument("--encoding", default="utf-8")
+    compare.set_defaults(func=run_compare, parser=compare)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+단어 목록 내보내기: Quizlet TSV / CSV / XLSX / Anki 패키지(.apkg).
+
+모든 함수는 행 목록(dict: 기본형, 대표 뜻, 예문)을 받아 다운로드용 바이트를 돌려줍니다.
+행은 만들어지는 대로 기록하므로 단어 수천 개도 한 번에 내보낼 수 있습니다.
+CSV/TSV는 앱(WordList)과 명령행(cli) 모두 write_delimited 하나로 기록합니다 (따옴표/BOM/열 순서가 같도록).
+"""
+import csv
+import hashlib
+import importlib.util
+import io
+
+EXPORT_COLUMNS = ("기본형", "대표 뜻", "예문")
+
+# 형식 → (버튼 이름, 확장자, MIME)
+EXPORT_FORMATS = {
+    "quizlet": ("Quizlet (TSV)", "tsv", "text/tab-separated-values"),
+    "csv": ("CSV", "csv", "text/csv"),
+    "xlsx": ("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "apkg": ("Anki (.apkg)", "apkg", "application/octet-stream"),
+}
+
+# 형식 → 필요한 선택 패키지 (설치되지 않았으면 그 형식은 내보낼 수 없음)
+EXPORT_DEPENDENCIES = {"xlsx": "openpyxl", "apkg": "genanki"}
+
+ANKI_CSS = """.card { font-family: sans-serif; font-size: 22px; text-align: center; }
+.meaning { font-size: 20px; }
+.example { font-size: 16px; color: #555; margin-top: 12px; }"""
+
+
+def _one_line(value) -> str:
+    """Quizlet 가져오기는 탭/줄바꿈으로 항목을 나누므로 필드 안의 탭/줄바꿈은 공백으로 바꿈"""
+    return " ".join(str(value or "").split())
+
+
+def quizlet_lines(rows) -> str:
+    """Quizlet '가져오기'용 텍스트: 단어<TAB>뜻, 한 줄에 하나 (머리글 없음)"""
+    return "".join(f"{_one_line(row['기본형'])}\t{_one_line(row['대표 뜻'])}\n" for row in rows)
+
+
+def to_quizlet_tsv(rows) -> bytes:
+    return quizlet_lines(rows).encode("utf-8")
+
+
+# 형식 → 파일 인코딩 (Excel에서 한글/키릴 문자가 깨지지 않도록 CSV는 BOM 포함)
+DELIMITED_ENCODINGS = {"csv": "utf-8-sig", "tsv": "utf-8"}
+
+
+def write_delimited(rows, f, columns=EXPORT_COLUMNS, fmt="csv") -> int:
+    """머리글 + 행을 텍스트 파일 객체 f에 만들어지는 대로 기록하고 행 수를 반환합니다 (columns에 없는 키는 무시)."""
+    writer = csv.DictWriter(f, fieldnames=list(columns), delimiter="\t" if fmt == "tsv" else ",", extrasaction="ignore")
+    writer.writeheader()
+    row_count = 0
+    for row in rows:
+        writer.writerow(row)
+        row_count += 1
+    return row_count
+
+
+def to_csv(rows, columns=EXPORT_COLUMNS) -> bytes:
+    output = io.StringIO(newline="")
+    write_delimited(rows, output, columns, "csv")
+    return output.getvalue().encode(DELIMITED_ENCODINGS["csv"])
+
+
+def write_table(rows, columns, path, fmt) -> int:
+    """행을 csv/tsv/xlsx 파일로 저장하고 행 수를 반환합니다 (명령행 배치 처리용)."""
+    if fmt == "xlsx":
+        rows = list(rows)
+        with open(path, "wb") as f:
+            f.write(to_xlsx(rows, columns))
+        return len(rows)
+    with open(path, "w", encoding=DELIMITED_ENCODINGS[fmt], newline="") as f:
+        return write_delimited(rows, f, columns, fmt)
+
+
+def to_xlsx(rows, columns=EXPORT_COLUMNS) -> bytes:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("단어 목록")
+    for letter, width in zip("ABC", (30, 50, 80)):
+        ws.column_dimensions[letter].width = width
+    ws.append(list(columns))
+    for row in rows:
+        ws.append([row.get(col, "") for col in columns])
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def _stable_id(name) -> int:
+    """Anki 모델/덱 ID: 이름에서 만든 고정 정수 (다시 내보내도 같은 덱으로 가져와지도록)"""
+    return int(hashlib.sha1(name.encode("utf-8")).hexdigest()[:8], 16) + (1 << 30)
+
+
+def to_apkg(rows, deck_name="러시아어 단어장") -> bytes:
+    """
+    오프라인 Anki 패키지. 앞면은 기본형, 뒷면은 뜻과 예문입니다.
+    노트 GUID를 기본형으로 만들기 때문에 같은 덱을 다시 가져오면 중복 없이 갱신됩니다.
+    """
+    import genanki
+
+    model = genanki.Model(
+        _stable_id("ru_analyzer word model v1"),
+        "러시아어 단어 (ru_analyzer)",
+        fields=[{"name": "Russian"}, {"name": "Korean"}, {"name": "Example"}],
+        templates=[{
+            "name": "러시아어 → 한국어",
+            "qfmt": "{{Russian}}",
+            "afmt": '{{FrontSide}}<hr id="answer"><div class="meaning">{{Korean}}</div>'
+                    '<div class="example">{{Example}}</div>',
+        }],
+        css=ANKI_CSS,
+    )
+    deck = genanki.Deck(_stable_id(deck_name), deck_name)
+    for row in rows:
+        deck.add_note(genanki.Note(
+            model=model,
+            fields=[_html_escape(row["기본형"]), _html_escape(row["대표 뜻"]), _html_escape(row.get("예문", ""))],
+            guid=genanki.guid_for(row["기본형"]),
+        ))
+    output = io.BytesIO()
+    genanki.Package(deck).write_to_file(output)
+    return output.getvalue()
+
+
+def _html_escape(value) -> str:
+    return str(value or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def export_available(fmt) -> bool:
+    """fmt 형식에 필요한 패키지가 설치되어 있는지 (import하지 않고 확인)"""
+    module = EXPORT_DEPENDENCIES.get(fmt)
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def export_bytes(rows, fmt, deck_name="러시아어 단어장") -> bytes:
+    if fmt == "quizlet":
+        return to_quizlet_tsv(rows)
+    if fmt == "csv":
+        return to_csv(rows)
+    if fmt == "xlsx":
+        return to_xlsx(rows)
+    if fmt == "apkg":
+        return to_apkg(rows, deck_name)
+    raise ValueError(f"알 수 없는 내보내기 형식: {fmt}")
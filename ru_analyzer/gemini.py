@@ -0,0 +1,415 @@
+"""
+Gemini 호출 실행기와 단어 정보 조회.
+
+- GeminiExecutor: 모든 Gemini 호출이 거쳐 가는 공유 실행기 (동시성 제한 + 토큰 버킷 + 재시도)
+- WordInfoFetcher: (단어, 기본형, 품사) → 단어 정보. 영구 캐시(PersistentCache)와 용어집(Glossary)을 먼저 확인하고,
+  없는 단어만 Gemini에 묻습니다. 여러 단어는 batch_size개씩 한 번의 요청으로 묶어 동시에 보냅니다.
+
+Streamlit 앱은 실행기/캐시/용어집을 st.cache_resource로 하나씩 만들어 넘겨 주고,
+명령행/벤치마크는 같은 클래스를 직접 만들어 씁니다.
+
+    fetcher = WordInfoFetcher(genai.Client(api_key=...), GeminiExecutor(), PersistentCache("words.sqlite3"))
+    fetcher.fetch("книгу", "книга", "명사")
+    fetcher.fetch_many([("книгу", "книга", "명사"), ("читаю", "читать", "동사")])
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import metrics
+from .wordlist import is_error_info
+
+# 단어 정보 스키마(get_word_info_schema)나 프롬프트가 바뀌면 올려서 영구 캐시를 무효화합니다.
+WORD_INFO_SCHEMA_VERSION = 1
+WORD_INFO_MODEL = "gemini-2.0-flash"
+# 한 번의 요청에 담을 최대 단어 수 (더 많으면 여러 요청으로 나누어 동시에 보냄)
+WORD_INFO_BATCH_SIZE = 25
+
+# 격 변화 분석을 강조하는 시스템 인스트럭션
+WORD_INFO_SYSTEM_INSTRUCTION = (
+    "너는 러시아어-한국어 학습 도우미이다. 요청된 단어의 정보를 JSON으로만 출력한다. "
+    "중요: 입력된 단어(word)가 명사/형용사/대명사라면 해당 형태가 문장에서 어떤 '격(Case)'으로 쓰였는지(예: 주격, 생격, 역격, 대격, 조격, 전치격) 분석하여 'grammatical_info'에 적어라. "
+    "동사라면 시제와 인칭을 적어라. 한국어 뜻은 간단히 핵심만 제공한다."
+)
+
+
+# ---------------------- 호출 실행기 (동시성 제한 + 토큰 버킷 + 재시도) ----------------------
+
+class TokenBucket:
+    """분당 요청 수(rate_per_minute) 기준 토큰 버킷. capacity만큼 순간적인 몰림을 허용합니다."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(rate_per_minute // 6))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, reserve=0) -> bool:
+        """토큰을 하나 쓰되, 쓰고 나서도 reserve개 이상 남을 때만 (백그라운드 작업이 남는 할당량만 쓰도록)"""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1 + reserve:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable_error(e) -> bool:
+    """할당량 초과(RESOURCE_EXHAUSTED/429), 일시적 서버 오류, 타임아웃이면 재시도 대상"""
+    if isinstance(e, TimeoutError) or getattr(e, 'code', None) in (429, 500, 503, 504):
+        return True
+    error_msg = str(e)
+    return any(marker in error_msg for marker in (
+        "RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "timed out", "Timeout", "timeout",
+    ))
+
+
+class GeminiExecutor:
+    """
+    모든 Gemini 호출이 거쳐 가는 공유 실행기.
+    - max_workers: 동시에 진행되는 요청 수 상한 (스레드 풀)
+    - bucket: 요청(재시도 포함)마다 토큰 하나를 소비하는 속도 제한
+    - 재시도 가능한 오류는 지터가 있는 지수 백오프로 max_retries번까지 재시도
+    - run_background(): 사용자 요청이 하나도 없고 토큰이 background_reserve개보다 많이 남을 때만
+      보내는 낮은 우선순위 요청 (미리 가져오기용). 사용자 요청은 항상 먼저 처리됩니다.
+    """
+
+    def __init__(self, max_workers=4, requests_per_minute=15, max_retries=4, base_delay=1.0, max_delay=30.0,
+                 background_reserve=1):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+        self.bucket = TokenBucket(requests_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.background_reserve = background_reserve
+        self.foreground = 0  # 대기 중이거나 실행 중인 사용자 요청 수
+        self.lock = threading.Lock()
+
+    def _acquire_spare(self):
+        while True:
+            if not self.foreground and self.bucket.try_acquire(self.background_reserve):
+                return
+            time.sleep(0.25)
+
+    def _run_with_retry(self, acquire, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            acquire()
+            try:
+                with metrics.api_call("gemini"):
+                    return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                # Full jitter: 0 ~ min(max_delay, base_delay * 2^attempt)
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                attempt += 1
+
+    def _foreground_done(self, future):
+        with self.lock:
+            self.foreground -= 1
+
+    def submit(self, fn, *args, **kwargs):
+        with self.lock:
+            self.foreground += 1
+        future = self.pool.submit(self._run_with_retry, self.bucket.acquire, fn, *args, **kwargs)
+        future.add_done_callback(self._foreground_done)
+        return future
+
+    def run_background(self, fn, *args, **kwargs):
+        """호출한 스레드에서 낮은 우선순위로 실행합니다 (재시도 포함, 결과를 기다림)."""
+        return self._run_with_retry(self._acquire_spare, fn, *args, **kwargs)
+
+    def call(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+
+# ---------------------- 단어 정보 요청/응답 (JSON Schema) ----------------------
+
+def get_word_info_schema(is_verb: bool):
+    """Gemini 응답의 JSON 스키마: grammatical_info(격 정보) 필드 추가"""
+    schema = {
+        "type": "object",
+        "properties": {
+            "ko_meanings": {"type": "array", "items": {"type": "string"}, "description": "단어의 한국어 뜻 목록"},
+            "grammatical_info": {"type": "string", "description": "단어의 문법적 분석 (예: 명사 대격, 형용사 생격, 동사 현재 3인칭 등)"},
+            "examples": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "ru": {"type": "string", "description": "러시아어 예문"},
+                        "ko": {"type": "string", "description": "한국어 번역"}
+                    },
+                    "required": ["ru", "ko"]
+                },
+                "description": "최대 두 개의 예문과 그 번역"
+            }
+        },
+        "required": ["ko_meanings", "grammatical_info", "examples"]
+    }
+
+    if is_verb:
+        schema['properties']['aspect_pair'] = {
+            "type": "object",
+            "properties": {
+                "imp": {"type": "string", "description": "불완료상 동사"},
+                "perf": {"type": "string", "description": "완료상 동사"}
+            },
+            "required": ["imp", "perf"]
+        }
+        schema['required'].append('aspect_pair')
+
+    return schema
+
+
+def get_word_info_list_schema():
+    """단어별 스키마(get_word_info_schema)를 배열로 감싼 일괄 조회용 스키마"""
+    item_schema = get_word_info_schema(is_verb=True)
+    item_schema['properties']['word'] = {"type": "string", "description": "요청된 러시아어 단어 (입력 그대로)"}
+    # aspect_pair는 동사에만 채우므로 필수에서 제외
+    item_schema['required'] = ['word'] + [r for r in item_schema['required'] if r != 'aspect_pair']
+    return {"type": "array", "items": item_schema}
+
+
+def word_info_cache_key(word, lemma, pos):
+    return json.dumps([WORD_INFO_SCHEMA_VERSION, word, lemma, pos], ensure_ascii=False)
+
+
+def no_api_key_info():
+    return {"ko_meanings": ["API 키 없음"], "grammatical_info": "분석 불가", "examples": []}
+
+
+def gemini_error_info(e):
+    error_msg = str(e)
+    if "RESOURCE_EXHAUSTED" in error_msg:
+        return {"ko_meanings": [f"API 할당량 초과 오류: {error_msg.split(',')[0]}..."], "examples": []}
+    return {"ko_meanings": [f"API 호출 또는 JSON 파싱 오류: {error_msg}"], "examples": []}
+
+
+def word_info_request(word, lemma, pos):
+    """단어 하나에 대한 generate_content 인자"""
+    is_verb = (pos == '동사')
+
+    config = {
+        "system_instruction": WORD_INFO_SYSTEM_INSTRUCTION,
+        "response_mime_type": "application/json",
+        "response_schema": get_word_info_schema(is_verb),
+    }
+
+    prompt = f"러시아어 단어: {word}. 기본형: {lemma}. 품사: {pos}. 정보를 요청합니다."
+    return {"model": WORD_INFO_MODEL, "contents": prompt, "config": config}
+
+
+def parse_word_info(response_text):
+    data = json.loads(response_text)
+
+    if 'examples' in data and len(data['examples']) > 2:
+        data['examples'] = data['examples'][:2]
+
+    return data
+
+
+def word_info_batch_request(items):
+    """(word, lemma, pos) 여러 개에 대한 generate_content 인자 (하나면 단건 요청)"""
+    if len(items) == 1:
+        return word_info_request(*items[0])
+
+    config = {
+        "system_instruction": WORD_INFO_SYSTEM_INSTRUCTION,
+        "response_mime_type": "application/json",
+        "response_schema": get_word_info_list_schema(),
+    }
+
+    word_lines = "\n".join(
+        f"{i}. 러시아어 단어: {word}. 기본형: {lemma}. 품사: {pos}."
+        for i, (word, lemma, pos) in enumerate(items, start=1)
+    )
+    prompt = (
+        f"아래 {len(items)}개 단어의 정보를 요청합니다. 입력 순서대로 단어마다 배열 원소 하나씩 출력하고, "
+        "'word'에는 입력 단어를 그대로 적어라. 'aspect_pair'는 동사일 때만 적어라.\n"
+        f"{word_lines}"
+    )
+    return {"model": WORD_INFO_MODEL, "contents": prompt, "config": config}
+
+
+def parse_word_info_batch(items, response_text):
+    """일괄 응답을 입력 순서대로 나눕니다. 응답에서 빠진 단어는 None."""
+    if len(items) == 1:
+        return [parse_word_info(response_text)]
+
+    entries = json.loads(response_text)
+    if not isinstance(entries, list):
+        entries = []
+
+    # 순서가 어긋나도 'word' 값으로 다시 맞춥니다.
+    by_word = {}
+    for entry in entries:
+        if isinstance(entry, dict):
+            by_word.setdefault(entry.get('word'), entry)
+
+    results = []
+    for i, (word, lemma, pos) in enumerate(items):
+        entry = by_word.get(word)
+        if entry is None and i < len(entries) and isinstance(entries[i], dict) and entries[i].get('word') in (None, word):
+            entry = entries[i]
+        if entry is None:
+            results.append(None)
+            continue
+        data = {k: v for k, v in entry.items() if k != 'word'}
+        if pos != '동사':
+            data.pop('aspect_pair', None)
+        if 'examples' in data and len(data['examples']) > 2:
+            data['examples'] = data['examples'][:2]
+        results.append(data)
+    return results
+
+
+# ---------------------- 단어 정보 조회 (영구 캐시 → Gemini) ----------------------
+
+class WordInfoFetcher:
+    """
+    (단어, 기본형, 품사) → 단어 정보. client가 None(API 키 없음)이면 Gemini 대신 "API 키 없음" 정보를 돌려줍니다.
+    glossary(Glossary)를 주면 새로 받은 정보를 용어집에도 색인합니다. 오류 응답은 어디에도 저장하지 않습니다.
+    """
+
+    def __init__(self, client, executor, cache, glossary=None, batch_size=WORD_INFO_BATCH_SIZE):
+        self.client = client
+        self.executor = executor
+        self.cache = cache
+        self.glossary = glossary
+        self.batch_size = batch_size
+
+    def _store(self, item, data):
+        self.cache.set(word_info_cache_key(*item), data)
+        if self.glossary is not None:
+            self.glossary.add(*item, data)
+
+    def request(self, word, lemma, pos):
+        """캐시 없이 단어 하나를 Gemini에 묻습니다 (공유 실행기 경유)."""
+        if not self.client:
+            return no_api_key_info()
+        try:
+            res = self.executor.call(self.client.models.generate_content, **word_info_request(word, lemma, pos))
+            return parse_word_info(res.text)
+        except Exception as e:
+            return gemini_error_info(e)
+
+    def request_batches(self, items, batch_size=None, on_progress=None):
+        """
+        (word, lemma, pos) 목록을 batch_size개씩 나누어 공유 실행기로 동시에 요청하고,
+        입력 순서대로 반환합니다. on_progress(완료 단어 수, 전체 단어 수)
+        """
+        if not self.client:
+            return [no_api_key_info() for _ in items]
+
+        batch_size = batch_size or self.batch_size
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        futures = [
+            self.executor.submit(self.client.models.generate_content, **word_info_batch_request(batch))
+            for batch in batches
+        ]
+
+        results = []
+        for batch, future in zip(batches, futures):
+            try:
+                parsed = parse_word_info_batch(batch, future.result().text)
+            except Exception as e:
+                parsed = [gemini_error_info(e)] * len(batch)
+            for item, data in zip(batch, parsed):
+                # 응답에서 빠진 단어는 단건 조회로 보충
+                results.append(data if data is not None else self.request(*item))
+            if on_progress:
+                on_progress(len(results), len(items))
+        return results
+
+    def fetch(self, word, lemma, pos):
+        """
+        1차: 이 형태 그대로의 영구 캐시, 2차: 용어집의 같은 (기본형, 품사) 항목 (네트워크 없이),
+        3차: Gemini. 용어집에는 Gemini에서 새로 받은 정보만 더합니다.
+        """
+        cached = self.cache.get(word_info_cache_key(word, lemma, pos))
+        if cached is not None:
+            return cached
+        if self.glossary is not None:
+            cached = self.glossary.lookup(word, lemma, pos)
+            if cached is not None:
+                return cached
+
+        with metrics.timed("word_info"):
+            data = self.request(word, lemma, pos)
+        if not is_error_info(data):
+            self._store((word, lemma, pos), data)
+        return data
+
+    def fetch_many(self, items, batch_size=None, on_progress=None):
+        """
+        fetch의 일괄 버전. 영구 캐시에 없는 (word, lemma, pos)만 모아
+        batch_size개씩 한 번의 요청으로 조회하고, 결과를 단어별 캐시에 나누어 저장합니다.
+        """
+        results = [None] * len(items)
+        missing = {}
+        for i, item in enumerate(items):
+            cached = self.cache.get(word_info_cache_key(*item))
+            if cached is not None:
+                results[i] = cached
+            else:
+                missing.setdefault(tuple(item), []).append(i)
+
+        if missing:
+            pending = list(missing)
+            with metrics.timed("word_info.batch"):
+                fetched = self.request_batches(pending, batch_size, on_progress)
+            for item, data in zip(pending, fetched):
+                if not is_error_info(data):
+                    self._store(item, data)
+                for i in missing[item]:
+                    results[i] = data
+        return results
+
+    def prefetch_batch(self, items):
+        """
+        미리 가져오기 한 묶음 (Prefetcher의 fetch_batch): 영구 캐시에 없는 단어만 한 번의 요청으로 조회해
+        영구 캐시와 용어집에 저장합니다. 사용자 요청보다 뒤로 밀리며(run_background),
+        응답에서 빠진 단어는 단건으로 다시 묻지 않습니다.
+        """
+        missing = []
+        for item in items:
+            cached = self.cache.get(word_info_cache_key(*item))
+            if cached is not None:
+                if self.glossary is not None:
+                    self.glossary.add(*item, cached)
+            else:
+                missing.append(item)
+        if not missing or not self.client:
+            return
+        res = self.executor.run_background(self.client.models.generate_content, **word_info_batch_request(missing))
+        for item, data in zip(missing, parse_word_info_batch(missing, res.text)):
+            if data is not None and not is_error_info(data):
+                self._store(item, data)
+
+    def load_stored(self, key):
+        """LemmaStore에서 밀려난 (단어, 기본형, 품사) 정보를 영구 캐시(없으면 용어집)에서 다시 읽어 옵니다."""
+        word, lemma, pos = key
+        cached = self.cache.get(word_info_cache_key(word, lemma, pos))
+        if cached is None and self.glossary is not None:
+            cached = self.glossary.lookup(word, lemma, pos)
+        return {**cached, "loaded_token": word, "pos": pos} if cached is not None else None
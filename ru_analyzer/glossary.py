@@ -0,0 +1,192 @@
+"""
+로컬 용어집: 한 번 조회에 성공한 단어 정보를 SQLite FTS5로 색인해 둡니다.
+
+(기본형, 품사)마다 항목 하나에 지금까지 검색된 표면형과 한국어 뜻을 함께 색인하므로,
+다른 사람이 'книга'를 찾아 둔 뒤에는 'книгу'/'книг'를 검색해도 네트워크 없이 바로 답합니다.
+격/시제 분석(grammatical_info)은 형태마다 다르므로 표면형별로 따로 저장하고, 아직 조회되지 않은 형태에는
+기본형 수준 정보(뜻/예문/상 짝)만 돌려줍니다.
+검색어는 소문자 + ё→е로 정규화하며, 접두어 검색(자동 완성)은 기본형/표면형/한국어 뜻 모두에 걸립니다.
+
+    glossary = Glossary("glossary.sqlite3")
+    glossary.add("книгу", "книга", "명사", info)
+    glossary.lookup("книги", "книга", "명사")   # → 기본형 수준 info (grammatical_info 없음)
+    glossary.suggest("кни")                     # → [{"lemma": "книга", "pos": "명사", "meaning": "책"}, ...]
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from . import metrics
+
+_TERM_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+# 조회한 표면형에만 맞는 필드 (다른 형태에 돌려줄 때는 뺌)
+FORM_FIELDS = ("grammatical_info", "loaded_token")
+# 조회 횟수(자동 완성 순서)를 이만큼 모아서 한 번에 기록 (검색마다 쓰기 잠금을 잡지 않도록)
+HITS_FLUSH_EVERY = 50
+
+
+def normalize(text) -> str:
+    return str(text or "").lower().replace("ё", "е").strip()
+
+
+def _terms(text) -> list:
+    return _TERM_RE.findall(normalize(text))
+
+
+def lemma_level(info) -> dict:
+    """단어 정보에서 표면형에 따라 달라지는 필드를 뺀 사본"""
+    return {key: value for key, value in info.items() if key not in FORM_FIELDS}
+
+
+def _fts_query(terms, column=None, prefix=False) -> str:
+    """단어 목록 → FTS5 MATCH 식 (모든 단어를 포함, 따옴표로 감싸 특수 문자를 무력화)"""
+    star = "*" if prefix else ""
+    scope = f"{column}: " if column else ""
+    return " AND ".join(f'{scope}"{term}"{star}' for term in terms)
+
+
+class Glossary:
+    """
+    (기본형, 품사) → 기본형 수준 정보 + 표면형 목록, (항목, 표면형) → 그 형태의 전체 정보.
+    스레드 안전하며 여러 세션/프로세스가 같은 파일을 공유합니다.
+    오류 응답은 호출하는 쪽에서 걸러서 add()하지 않아야 합니다.
+    """
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.pending_hits = {}  # 항목 id → 아직 기록하지 않은 조회 횟수
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS glossary ("
+                "id INTEGER PRIMARY KEY, lemma TEXT NOT NULL, lemma_norm TEXT NOT NULL, pos TEXT NOT NULL, "
+                "forms TEXT NOT NULL, info TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, "
+                "UNIQUE (lemma_norm, pos))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS glossary_forms ("
+                "entry_id INTEGER NOT NULL, form TEXT NOT NULL, info TEXT NOT NULL, PRIMARY KEY (entry_id, form))"
+            )
+            # 색인 전용 테이블 (rowid = glossary.id)
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS glossary_fts USING fts5(lemma, forms, meanings)"
+            )
+
+    def add(self, word, lemma, pos, info):
+        """단어 정보를 저장/갱신합니다. 이미 같은 표면형과 정보가 있으면 아무것도 쓰지 않습니다."""
+        lemma_norm = normalize(lemma)
+        form = normalize(word)
+        form_payload = json.dumps(info, ensure_ascii=False)
+        payload = json.dumps(lemma_level(info), ensure_ascii=False)
+        with self.lock, self.conn:
+            self._flush_hits()
+            row = self.conn.execute(
+                "SELECT id, forms, info FROM glossary WHERE lemma_norm = ? AND pos = ?", (lemma_norm, pos)
+            ).fetchone()
+            forms = row[1].split("\t") if row else []
+            if row:
+                stored = self.conn.execute(
+                    "SELECT info FROM glossary_forms WHERE entry_id = ? AND form = ?", (row[0], form)
+                ).fetchone()
+                if form in forms and row[2] == payload and stored is not None and stored[0] == form_payload:
+                    return
+            if form not in forms:
+                forms.append(form)
+            forms_text = "\t".join(forms)
+            if row:
+                entry_id = row[0]
+                self.conn.execute(
+                    "UPDATE glossary SET forms = ?, info = ?, updated_at = ? WHERE id = ?",
+                    (forms_text, payload, time.time(), entry_id),
+                )
+                self.conn.execute("DELETE FROM glossary_fts WHERE rowid = ?", (entry_id,))
+            else:
+                entry_id = self.conn.execute(
+                    "INSERT INTO glossary (lemma, lemma_norm, pos, forms, info, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (lemma, lemma_norm, pos, forms_text, payload, time.time()),
+                ).lastrowid
+            meanings = " ".join(str(m) for m in info.get("ko_meanings") or ())
+            self.conn.execute(
+                "INSERT INTO glossary_fts (rowid, lemma, forms, meanings) VALUES (?, ?, ?, ?)",
+                (entry_id, lemma_norm, " ".join(forms), meanings),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO glossary_forms (entry_id, form, info) VALUES (?, ?, ?)",
+                (entry_id, form, form_payload),
+            )
+
+    def contains(self, lemma, pos) -> bool:
+        """(기본형, 품사) 항목이 있는지 (조회 횟수/지표에 영향 없음)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM glossary WHERE lemma_norm = ? AND pos = ?", (normalize(lemma), pos)
+            ).fetchone()
+        return row is not None
+
+    def lookup(self, word, lemma, pos):
+        """
+        (기본형, 품사)가 정확히 일치하는 항목의 단어 정보 (없으면 None). 이 표면형으로 저장된 정보가 있으면 그대로,
+        없으면 기본형 수준 정보(grammatical_info 없음)를 줍니다. 표면형/기본형만 맞는 다른 품사 항목(동형이의어)은
+        답으로 쓰지 않고 suggest()의 후보로만 보여 줍니다.
+        """
+        with metrics.timed("glossary"):
+            found = self._lookup(normalize(word), normalize(lemma), pos)
+        metrics.cache_event("glossary", "miss" if found is None else "hit")
+        return found
+
+    def _lookup(self, form, lemma_norm, pos):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT id, info FROM glossary WHERE lemma_norm = ? AND pos = ?", (lemma_norm, pos)
+            ).fetchone()
+            if row is None:
+                return None
+            stored = self.conn.execute(
+                "SELECT info FROM glossary_forms WHERE entry_id = ? AND form = ?", (row[0], form)
+            ).fetchone()
+            self._count_hit(row[0])
+        if stored is not None:
+            return json.loads(stored[0])
+        # 예전 파일은 기본형 행에 형태별 필드가 남아 있을 수 있으므로 읽을 때도 뺌
+        return lemma_level(json.loads(row[1]))
+
+    def _count_hit(self, entry_id):
+        """조회 횟수는 메모리에 모았다가 HITS_FLUSH_EVERY번마다(또는 add() 때) 한 번에 씁니다. self.lock 안에서 호출"""
+        self.pending_hits[entry_id] = self.pending_hits.get(entry_id, 0) + 1
+        if sum(self.pending_hits.values()) >= HITS_FLUSH_EVERY:
+            with self.conn:
+                self._flush_hits()
+
+    def _flush_hits(self):
+        """self.lock과 쓰기 트랜잭션 안에서 호출"""
+        if self.pending_hits:
+            self.conn.executemany(
+                "UPDATE glossary SET hits = hits + ? WHERE id = ?",
+                [(n, entry_id) for entry_id, n in self.pending_hits.items()],
+            )
+            self.pending_hits = {}
+
+    def suggest(self, prefix, limit=8) -> list:
+        """접두어 자동 완성 후보 (기본형/표면형/한국어 뜻). 자주 조회된 항목이 앞에 옵니다."""
+        terms = _terms(prefix)
+        if not terms:
+            return []
+        with metrics.timed("glossary.suggest"), self.lock:
+            rows = self.conn.execute(
+                "SELECT g.lemma, g.pos, g.info FROM glossary_fts f JOIN glossary g ON g.id = f.rowid "
+                "WHERE glossary_fts MATCH ? ORDER BY g.hits DESC, bm25(glossary_fts) LIMIT ?",
+                (_fts_query(terms, prefix=True), limit),
+            ).fetchall()
+        return [
+            {"lemma": lemma, "pos": pos, "meaning": "; ".join((json.loads(info).get("ko_meanings") or [])[:2])}
+            for lemma, pos, info in rows
+        ]
+
+    def stats(self) -> dict:
+        with self.lock:
+            (entries,) = self.conn.execute("SELECT COUNT(*) FROM glossary").fetchone()
+        return {"entries": entries}
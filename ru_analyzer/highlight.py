@@ -0,0 +1,73 @@
+"""
+선택된 단어/구 하이라이팅 (한 번의 정규식 스캔).
+"""
+import re
+import bisect
+import functools
+
+from . import metrics
+
+SELECTED_CLASS = "word-selected"
+# 강세 모음 뒤에 붙이는 결합 양음 부호 (ru_analyzer.stress)
+STRESS_MARK = "\u0301"
+
+
+@functools.lru_cache(maxsize=32)
+def compile_highlighter(highlight_candidates: tuple):
+    """
+    선택된 단어/구 전체를 하나의 정규식(긴 것 우선 alternation)으로 컴파일합니다.
+    선택 목록이 바뀌지 않으면 컴파일된 패턴을 재사용합니다.
+    """
+    alternatives = []
+    for phrase in sorted(highlight_candidates, key=len, reverse=True):
+        escaped_phrase = re.escape(phrase)
+        if ' ' in phrase:
+            # 구(Phrase) 검색
+            alternatives.append(escaped_phrase)
+        else:
+            # 단어(Word) 검색 (\b는 단어 경계)
+            alternatives.append(r'\b' + escaped_phrase + r'\b')
+    return re.compile('|'.join(alternatives)) if alternatives else None
+
+
+metrics.register_lru("compile_highlighter", compile_highlighter)
+
+
+def highlight_spans(text_to_process, highlight_words):
+    """텍스트를 한 번만 훑어 하이라이트할 (시작, 끝) 구간 목록을 반환합니다."""
+    candidates = tuple(sorted({word for word in highlight_words if word.strip()}))
+    pattern = compile_highlighter(candidates)
+    if pattern is None:
+        return []
+    return [m.span() for m in pattern.finditer(text_to_process)]
+
+
+def _with_stress(text, start, end, stress_marks):
+    """text[start:end]에 강세 표시 삽입 (stress_marks: 정렬된 강세 모음 위치)"""
+    if not stress_marks:
+        return text[start:end]
+    parts = []
+    cursor = start
+    for i in range(bisect.bisect_left(stress_marks, start), len(stress_marks)):
+        offset = stress_marks[i]
+        if offset >= end:
+            break
+        parts.append(text[cursor:offset + 1])
+        parts.append(STRESS_MARK)
+        cursor = offset + 1
+    parts.append(text[cursor:end])
+    return "".join(parts)
+
+
+def get_highlighted_html(text_to_process, highlight_words, stress_marks=None):
+    """stress_marks(강세 모음 위치 목록)를 주면 하이라이트와 함께 강세도 표시합니다."""
+    parts = []
+    cursor = 0
+    for start, end in highlight_spans(text_to_process, highlight_words):
+        parts.append(_with_stress(text_to_process, cursor, start, stress_marks))
+        parts.append(f'<span class="{SELECTED_CLASS}">{_with_stress(text_to_process, start, end, stress_marks)}</span>')
+        cursor = end
+    parts.append(_with_stress(text_to_process, cursor, len(text_to_process), stress_marks))
+    display_html = "".join(parts)
+
+    return f'<div class="text-container">{display_html}</div>'
@@ -0,0 +1,83 @@
+"""
+텍스트 수정 시 분석 상태 유지.
+
+이전/새 텍스트를 문장 단위로 비교(diff)하고, 바뀐 문장의 토큰만 살펴서
+더 이상 텍스트에 없는 단어의 선택/정보만 정리합니다. 토큰 오프셋과 번역은
+문장 해시 기반 캐시(morphology.SENTENCE_TOKENS, 번역 메모리)가 바뀐 문장만 다시 계산합니다.
+"""
+import difflib
+
+from .highlight import highlight_spans
+from .morphology import analyze_sentences, lemmatize_ru
+from .sentences import split_sentences
+
+
+def diff_sentences(old_text, new_text):
+    """(삭제/변경된 이전 문장 목록, 추가/변경된 새 문장 목록)"""
+    old = [old_text[start:end] for start, end in split_sentences(old_text)]
+    new = [new_text[start:end] for start, end in split_sentences(new_text)]
+    removed, added = [], []
+    matcher = difflib.SequenceMatcher(a=old, b=new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            removed.extend(old[i1:i2])
+            added.extend(new[j1:j2])
+    return removed, added
+
+
+def carry_over_state(old_text, new_text, new_token_table, selected_words, word_info, clicked_word, backend=None,
+                     contains_lemma=None):
+    """
+    텍스트가 바뀌었을 때 유지할 선택 단어/단어 정보/클릭 단어를 계산합니다.
+    - 바뀐 문장에만 있던 기본형 중 새 텍스트에서 사라진 것의 단어 정보만 삭제
+    - 선택한 단어/구는 새 텍스트에 여전히 등장하면 유지
+    - 원래 텍스트에 없던 검색어(직접 검색한 단어)는 그대로 유지
+    new_token_table이 텍스트 일부만 분석한 표(긴 문서의 문서 색인)이면 contains_lemma(기본형, 표면형)로
+    새 텍스트 전체에 그 기본형이 남아 있는지 확인하고, 남아 있으면 지우지 않습니다 (paging.Document.contains_lemma).
+    """
+    new_lemmas = new_token_table.get("lemmas", {})
+
+    def lemma_gone(lemma, surface=None):
+        if lemma in new_lemmas:
+            return False
+        return contains_lemma is None or not contains_lemma(lemma, surface)
+
+    removed, added = diff_sentences(old_text, new_text)
+    result = {
+        "selected_words": list(selected_words),
+        "word_info": word_info.copy(),  # dict 또는 SessionWordInfo (공유 저장소의 정보를 복사하지 않음)
+        "clicked_word": clicked_word,
+        "changed_sentences": max(len(removed), len(added)),
+    }
+    if not removed:
+        return result
+
+    # 토큰 단위: 삭제/변경된 문장에 있던 기본형 중 새 텍스트에 남지 않은 것
+    removed_lemmas = set()
+    removed_surfaces = set()
+    for sentence_tokens in analyze_sentences(removed, backend):
+        for token in sentence_tokens:
+            removed_surfaces.add(token["text"].lower())
+            if lemma_gone(token["lemma"], token["text"]):
+                removed_lemmas.add(token["lemma"])
+
+    removed_text = "\n".join(removed)
+    kept_words = []
+    for word in selected_words:
+        was_in_changed = bool(highlight_spans(removed_text, [word])) or word.lower() in removed_surfaces
+        if was_in_changed and not highlight_spans(new_text, [word]):
+            lemma = lemmatize_ru(word, new_token_table)
+            if lemma_gone(lemma):
+                result["word_info"].pop(lemma, None)
+            continue
+        kept_words.append(word)
+    result["selected_words"] = kept_words
+
+    # 남아 있는 선택 단어(직접 검색한 단어 포함)의 정보는 지우지 않음
+    kept_lemmas = {lemmatize_ru(word, new_token_table) for word in kept_words}
+    for lemma in removed_lemmas - kept_lemmas:
+        result["word_info"].pop(lemma, None)
+
+    if clicked_word not in kept_words:
+        result["clicked_word"] = None
+    return result
@@ -0,0 +1,166 @@
+"""
+프로세스 전체가 함께 쓰는 단어 정보 저장소.
+
+세션마다 Gemini 응답(뜻, 예문, 상 짝)을 통째로 들고 있으면 같은 단어가 세션 수만큼 중복되고
+지워지지도 않습니다. LemmaStore는 (단어, 기본형, 품사) 키마다 정보 하나만 __slots__ 레코드로
+보관하고(문자열은 intern), 전체 메모리 예산을 넘으면 가장 오래 쓰지 않은 항목부터 지웁니다.
+세션은 SessionWordInfo로 {기본형: 저장소 키}만 들고 있으며, 지워진 항목은 loader(보통 SQLite
+영구 캐시)에서 다시 읽어 옵니다. 서버 메모리는 사용자 수가 아니라 단어 수에 비례합니다.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from . import metrics
+from .morphology import UNKNOWN_POS
+
+# WordEntry 필드로 따로 두는 키 (나머지 키는 extra에 (키, 값) 튜플로 보관)
+ENTRY_FIELDS = ("ko_meanings", "grammatical_info", "examples", "aspect_pair", "loaded_token", "pos")
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class WordEntry:
+    """단어 정보 하나 (Gemini 응답 dict의 압축 표현)"""
+
+    __slots__ = ("ko_meanings", "grammatical_info", "examples", "aspect_pair", "loaded_token", "pos", "extra", "nbytes")
+
+    def __init__(self, info: dict):
+        self.ko_meanings = tuple(_intern(str(m)) for m in info.get("ko_meanings") or ())
+        self.grammatical_info = _intern(info.get("grammatical_info"))
+        self.examples = tuple(
+            (_intern(ex.get("ru", "")), _intern(ex.get("ko", "")))
+            for ex in info.get("examples") or () if isinstance(ex, dict)
+        )
+        aspect_pair = info.get("aspect_pair")
+        self.aspect_pair = (
+            (_intern(aspect_pair.get("imp")), _intern(aspect_pair.get("perf"))) if isinstance(aspect_pair, dict) else None
+        )
+        self.loaded_token = _intern(info.get("loaded_token"))
+        self.pos = _intern(info.get("pos"))
+        self.extra = tuple((_intern(k), v) for k, v in info.items() if k not in ENTRY_FIELDS) or None
+        self.nbytes = self._estimate_size()
+
+    def _estimate_size(self) -> int:
+        """레코드와 그 안의 튜플/문자열 크기 합 (intern으로 공유되는 문자열도 각각 셈 = 상한)"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.ko_meanings) + sys.getsizeof(self.examples)
+        strings = [*self.ko_meanings, self.grammatical_info, self.loaded_token, self.pos]
+        for pair in self.examples:
+            size += sys.getsizeof(pair)
+            strings.extend(pair)
+        if self.aspect_pair:
+            size += sys.getsizeof(self.aspect_pair)
+            strings.extend(self.aspect_pair)
+        if self.extra:
+            size += sys.getsizeof(self.extra) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.extra)
+        return size + sum(sys.getsizeof(s) for s in strings if s is not None)
+
+    def to_dict(self) -> dict:
+        info = {"ko_meanings": list(self.ko_meanings), "examples": [{"ru": ru, "ko": ko} for ru, ko in self.examples]}
+        if self.grammatical_info is not None:
+            info["grammatical_info"] = self.grammatical_info
+        if self.aspect_pair:
+            info["aspect_pair"] = {"imp": self.aspect_pair[0], "perf": self.aspect_pair[1]}
+        if self.loaded_token is not None:
+            info["loaded_token"] = self.loaded_token
+        if self.pos is not None:
+            info["pos"] = self.pos
+        if self.extra:
+            info.update(self.extra)
+        return info
+
+
+class LemmaStore:
+    """
+    (단어, 기본형, 품사) → WordEntry. 스레드 안전한 LRU이며 max_bytes(추정치)를 넘으면 오래된 항목부터 삭제합니다.
+    loader(key)가 있으면 없는/삭제된 항목을 다시 읽어 옵니다 (정보 dict 또는 None을 반환).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, loader=None):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(word, lemma, pos) -> tuple:
+        return _intern(word), _intern(lemma), _intern(pos)
+
+    def put(self, key, info) -> tuple:
+        self._put(key, info)
+        return key
+
+    def _put(self, key, info) -> WordEntry:
+        entry = WordEntry(info)
+        evicted = 0
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self.entries[key] = entry
+            self.nbytes += entry.nbytes
+            while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                _, dropped = self.entries.popitem(last=False)
+                self.nbytes -= dropped.nbytes
+                evicted += 1
+        metrics.cache_event("lemma_store", "eviction", evicted)
+        return entry
+
+    def get(self, key):
+        """정보 dict (매번 새로 만든 사본) 또는 None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        metrics.cache_event("lemma_store", "miss" if entry is None else "hit")
+        if entry is not None:
+            return entry.to_dict()
+        if self.loader is None:
+            return None
+        info = self.loader(key)
+        if info is None:
+            return None
+        return self._put(key, info).to_dict()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.nbytes, "max_bytes": self.max_bytes}
+
+
+class SessionWordInfo(MutableMapping):
+    """
+    세션별 {기본형: 단어 정보} 보기. dict처럼 쓰지만 세션에는 {기본형: 저장소 키}만 남고,
+    정보는 공유 LemmaStore에 한 번만 저장됩니다.
+    """
+
+    __slots__ = ("store", "refs")
+
+    def __init__(self, store, refs=None):
+        self.store = store
+        self.refs = dict(refs or {})
+
+    def __getitem__(self, lemma):
+        info = self.store.get(self.refs[lemma])
+        if info is None:
+            raise KeyError(lemma)
+        return info
+
+    def __setitem__(self, lemma, info):
+        key = LemmaStore.make_key(info.get("loaded_token", lemma), lemma, info.get("pos", UNKNOWN_POS))
+        self.refs[_intern(lemma)] = self.store.put(key, info)
+
+    def __delitem__(self, lemma):
+        del self.refs[lemma]
+
+    def __iter__(self):
+        return iter(self.refs)
+
+    def __len__(self):
+        return len(self.refs)
+
+    def copy(self):
+        return SessionWordInfo(self.store, self.refs)
@@ -0,0 +1,262 @@
+"""
+단계별 소요 시간, 캐시 적중/실패/삭제 횟수, 외부 API 지연 시간과 오류 종류를 모으는 계측 모듈.
+
+값은 프로세스 전체에서 공유되며(모듈 전역 레지스트리), 앱의 디버그 패널과
+Prometheus 텍스트 파일(node_exporter textfile collector)/JSON 파일로 내보냅니다.
+
+    with metrics.timed("morphology"):
+        ...
+    metrics.cache_event("word_info", "hit")
+    metrics.observe_api("gemini", seconds, error=e)
+"""
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# 초 단위 히스토그램 구간 (마지막 +Inf는 암묵적)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CACHE_EVENTS = ("hit", "miss", "eviction")
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """구간 상한으로 근사한 분위수 (관측값이 없으면 None)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (self.max,), self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum_s": self.sum,
+            "mean_s": self.sum / self.count if self.count else None,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "max_s": self.max,
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+def classify_error(e) -> str:
+    """예외 → 오류 종류 라벨 (RESOURCE_EXHAUSTED, TIMEOUT, UNAVAILABLE, INVALID_ARGUMENT, 그 외 예외 클래스명)"""
+    if e is None:
+        return "OK"
+    message = str(e)
+    code = getattr(e, "code", None)
+    if code == 429 or "RESOURCE_EXHAUSTED" in message:
+        return "RESOURCE_EXHAUSTED"
+    if isinstance(e, TimeoutError) or code == 504 or re.search(r"DEADLINE_EXCEEDED|[Tt]ime(d )?out", message):
+        return "TIMEOUT"
+    if code in (500, 503) or "UNAVAILABLE" in message:
+        return "UNAVAILABLE"
+    if code == 400 or "INVALID_ARGUMENT" in message:
+        return "INVALID_ARGUMENT"
+    return type(e).__name__
+
+
+class MetricsRegistry:
+    """스레드 안전한 프로세스 전역 지표 저장소"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.stages = {}        # 단계 → Histogram
+        self.caches = {}        # 캐시 이름 → {hit, miss, eviction}
+        self.api_latency = {}   # API → Histogram
+        self.api_errors = {}    # (API, 오류 종류) → 횟수
+        self.lru_sources = {}   # 캐시 이름 → functools.lru_cache 함수 (cache_info()로 읽음)
+        self.local = threading.local()
+        self.last_written = float("-inf")
+
+    # ---- 단계 시간 ----
+    def observe_stage(self, stage, seconds):
+        with self.lock:
+            self.stages.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - start)
+
+    # ---- 캐시 ----
+    def cache_event(self, name, event, n=1):
+        if n <= 0:
+            return
+        with self.lock:
+            counts = self.caches.setdefault(name, dict.fromkeys(CACHE_EVENTS, 0))
+            counts[event] += n
+
+    @contextmanager
+    def cached_call(self, name):
+        """
+        st.cache_data 함수처럼 적중 여부를 직접 알 수 없는 캐시용.
+        블록 안에서 mark_miss(name)가 불리지 않으면(캐시된 함수 본문이 실행되지 않으면) 적중으로 셉니다.
+        """
+        missed = getattr(self.local, "missed", None)
+        if missed is None:
+            missed = self.local.missed = set()
+        missed.discard(name)
+        yield
+        self.cache_event(name, "miss" if name in missed else "hit")
+        missed.discard(name)
+
+    def mark_miss(self, name):
+        missed = getattr(self.local, "missed", None)
+        if missed is None:
+            missed = self.local.missed = set()
+        missed.add(name)
+
+    def register_lru(self, name, cached_fn):
+        self.lru_sources[name] = cached_fn
+
+    # ---- 외부 API ----
+    def observe_api(self, api, seconds, error=None):
+        label = classify_error(error)
+        with self.lock:
+            self.api_latency.setdefault(api, Histogram()).observe(seconds)
+            key = (api, label)
+            self.api_errors[key] = self.api_errors.get(key, 0) + 1
+
+    @contextmanager
+    def api_call(self, api):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.observe_api(api, time.perf_counter() - start, error=e)
+            raise
+        self.observe_api(api, time.perf_counter() - start)
+
+    # ---- 내보내기 ----
+    def cache_counts(self):
+        with self.lock:
+            caches = {name: dict(counts) for name, counts in self.caches.items()}
+        for name, fn in self.lru_sources.items():
+            info = fn.cache_info()
+            caches[name] = {
+                "hit": info.hits,
+                "miss": info.misses,
+                # lru_cache는 삭제 횟수를 따로 세지 않으므로 (실패 횟수 - 현재 크기)로 근사
+                "eviction": max(0, info.misses - info.currsize) if info.maxsize else 0,
+            }
+        for counts in caches.values():
+            total = counts["hit"] + counts["miss"]
+            counts["hit_ratio"] = counts["hit"] / total if total else None
+        return caches
+
+    def snapshot(self) -> dict:
+        caches = self.cache_counts()
+        with self.lock:
+            api = {}
+            for name, histogram in self.api_latency.items():
+                api[name] = {"latency": histogram.to_dict(), "results": {}}
+            for (name, label), n in self.api_errors.items():
+                api.setdefault(name, {"latency": None, "results": {}})["results"][label] = n
+            return {
+                "uptime_s": time.time() - self.started,
+                "stages": {name: h.to_dict() for name, h in self.stages.items()},
+                "caches": caches,
+                "api": api,
+            }
+
+    def to_prometheus(self, prefix="ru_analyzer") -> str:
+        lines = []
+
+        def histogram_lines(metric, label_name, histograms):
+            lines.append(f"# TYPE {prefix}_{metric} histogram")
+            for name, h in sorted(histograms.items()):
+                cumulative = 0
+                for bound, n in zip([*map(str, h.buckets), "+Inf"], h.counts):
+                    cumulative += n
+                    lines.append(f'{prefix}_{metric}_bucket{{{label_name}="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_{metric}_sum{{{label_name}="{name}"}} {h.sum:.6f}')
+                lines.append(f'{prefix}_{metric}_count{{{label_name}="{name}"}} {h.count}')
+
+        caches = self.cache_counts()
+        with self.lock:
+            histogram_lines("stage_seconds", "stage", dict(self.stages))
+            histogram_lines("api_latency_seconds", "api", dict(self.api_latency))
+            lines.append(f"# TYPE {prefix}_api_requests_total counter")
+            for (name, label), n in sorted(self.api_errors.items()):
+                lines.append(f'{prefix}_api_requests_total{{api="{name}",result="{label}"}} {n}')
+        lines.append(f"# TYPE {prefix}_cache_events_total counter")
+        for name, counts in sorted(caches.items()):
+            for event in CACHE_EVENTS:
+                lines.append(f'{prefix}_cache_events_total{{cache="{name}",event="{event}"}} {counts[event]}')
+        return "\n".join(lines) + "\n"
+
+    def write_files(self, textfile_path=None, json_path=None):
+        """Prometheus 텍스트 파일/JSON 파일을 원자적으로(임시 파일 → rename) 씁니다."""
+        for path, render in ((textfile_path, self.to_prometheus),
+                             (json_path, lambda: json.dumps(self.snapshot(), ensure_ascii=False, indent=2))):
+            if not path:
+                continue
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(render())
+            os.replace(tmp_path, path)
+
+    def maybe_write_files(self, textfile_path=None, json_path=None, min_interval=15.0):
+        """마지막으로 쓴 지 min_interval초가 지났을 때만 write_files (매 rerun마다 불러도 됨)"""
+        if not (textfile_path or json_path):
+            return False
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_written < min_interval:
+                return False
+            self.last_written = now
+        self.write_files(textfile_path, json_path)
+        return True
+
+    def reset(self):
+        """누적 지표를 지웁니다 (lru_cache 함수의 통계는 캐시를 비우지 않는 한 그대로 남음)."""
+        with self.lock:
+            self.started = time.time()
+            self.stages.clear()
+            self.caches.clear()
+            self.api_latency.clear()
+            self.api_errors.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+timed = REGISTRY.timed
+observe_stage = REGISTRY.observe_stage
+cache_event = REGISTRY.cache_event
+cached_call = REGISTRY.cached_call
+mark_miss = REGISTRY.mark_miss
+register_lru = REGISTRY.register_lru
+observe_api = REGISTRY.observe_api
+api_call = REGISTRY.api_call
+snapshot = REGISTRY.snapshot
+to_prometheus = REGISTRY.to_prometheus
+write_files = REGISTRY.write_files
+maybe_write_files = REGISTRY.maybe_write_files
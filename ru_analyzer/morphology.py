@@ -0,0 +1,387 @@
+"""
+형태소 분석: 텍스트 전체 토큰 테이블, 기본형(lemma)/품사 조회.
+
+분석 자체는 백엔드(ru_analyzer.backends: Mystem 또는 pymorphy2)가 하고, 이 모듈은 캐시와 조회를 맡습니다.
+텍스트 분석과 단어 하나 조회(검색어 등)에 서로 다른 백엔드를 쓸 수 있습니다 (set_backend).
+
+Mystem은 파이프로 요청/응답을 주고받는 외부 프로세스라서 동시에 한 요청만 처리할 수 있습니다.
+MystemPool은 여러 Mystem 프로세스를 두고 요청마다 하나씩 빌려 쓰며, 죽은 프로세스는 새로 띄웁니다.
+"""
+import os
+import re
+import queue
+import bisect
+import hashlib
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
+from typing import Union
+
+from . import metrics
+from .sentences import split_sentences
+
+# ---------------------- 품사 변환 딕셔너리 ----------------------
+POS_MAP = {
+    'S': '명사', 'V': '동사', 'A': '형용사', 'ADV': '부사', 'PR': '전치사',
+    'CONJ': '접속사', 'INTJ': '감탄사', 'PART': '불변화사', 'NUM': '수사',
+    'APRO': '대명사적 형용사', 'ANUM': '서수사', 'SPRO': '대명사',
+    'PRICL': '동사부사',
+    'COMP': '비교급', 'A=cmp': '비교급 형용사', 'ADV=cmp': '비교급 부사',
+    'ADVB': '부사',
+    'NONLEX': '비단어',
+    'INIT': '머리글자',
+    'P': '불변화사/전치사',
+    'ADJ': '형용사',
+    'N': '명사',
+}
+
+PHRASE_POS = '구 형태'
+UNKNOWN_POS = '품사'
+
+
+def default_pool_size(limit=8) -> int:
+    """이 프로세스가 쓸 수 있는 CPU 코어 수 (Mystem 프로세스 하나가 수십 MB이므로 limit개까지)"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS/Windows
+        cores = os.cpu_count() or 1
+    return max(1, min(cores, limit))
+
+
+def new_mystem():
+    from pymystem3 import Mystem
+    return Mystem()
+
+
+class MystemPool:
+    """
+    Mystem 프로세스 풀. analyze()는 Mystem.analyze와 같은 결과를 돌려주므로 Mystem 대신 쓸 수 있습니다.
+    - 프로세스는 필요할 때 size개까지 만들고, 쉬는 프로세스는 최근 것부터 재사용 (LIFO)
+    - 빌려줄 때 프로세스가 죽었는지 확인하고, 죽었으면 버리고 새로 띄움
+    - 사용 중 예외가 나면 파이프 상태를 믿을 수 없으므로 그 프로세스는 닫고 버림
+    """
+
+    def __init__(self, size=None, factory=new_mystem, checkout_timeout=30.0):
+        self.size = size or default_pool_size()
+        self.factory = factory
+        self.checkout_timeout = checkout_timeout
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.live = 0       # 만들어져 있는(쉬는 + 사용 중) 프로세스 수
+        self.in_use = 0
+        self.restarts = 0   # 죽었거나 오류로 버린 뒤 새로 띄운 횟수
+
+    @staticmethod
+    def is_healthy(worker) -> bool:
+        """아직 시작하지 않았거나(_proc 없음) 프로세스가 살아 있으면 True"""
+        proc = getattr(worker, "_proc", None)
+        return proc is None or proc.poll() is None
+
+    def _discard(self, worker):
+        with self.lock:
+            self.live -= 1
+            self.restarts += 1
+        try:
+            worker.close()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    can_create = self.live < self.size
+                    if can_create:
+                        self.live += 1
+                if can_create:
+                    try:
+                        return self.factory()
+                    except Exception:
+                        with self.lock:
+                            self.live -= 1
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Mystem 프로세스를 {self.checkout_timeout:g}초 동안 빌리지 못했습니다.")
+                try:
+                    worker = self.idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+            if self.is_healthy(worker):
+                return worker
+            self._discard(worker)
+
+    @contextmanager
+    def checkout(self):
+        start = time.perf_counter()
+        worker = self._acquire()
+        metrics.observe_stage("mystem.checkout", time.perf_counter() - start)
+        with self.lock:
+            self.in_use += 1
+        try:
+            yield worker
+        except BaseException:
+            with self.lock:
+                self.in_use -= 1
+            self._discard(worker)
+            raise
+        with self.lock:
+            self.in_use -= 1
+        self.idle.put(worker)
+
+    def analyze(self, text):
+        """프로세스 하나를 빌려 분석합니다. 프로세스 오류(파이프 끊김 등)면 새 프로세스로 한 번 더 시도합니다."""
+        for attempt in range(2):
+            try:
+                with self.checkout() as worker:
+                    return worker.analyze(text)
+            except TimeoutError:
+                raise
+            except (OSError, RuntimeError, ValueError):
+                if attempt:
+                    raise
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"size": self.size, "live": self.live, "in_use": self.in_use,
+                    "idle": self.idle.qsize(), "restarts": self.restarts}
+
+    def close(self):
+        """쉬고 있는 프로세스를 모두 종료합니다 (사용 중인 것은 돌아온 뒤 다시 쓰임)."""
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            with self.lock:
+                self.live -= 1
+            worker.close()
+
+
+_default_mystem = None
+_default_mystem_lock = threading.Lock()
+
+
+def get_mystem():
+    """기본 분석기 (set_mystem으로 지정하지 않았으면 처음 필요할 때 MystemPool을 만듭니다)."""
+    global _default_mystem
+    with _default_mystem_lock:
+        if _default_mystem is None:
+            _default_mystem = MystemPool()
+        return _default_mystem
+
+
+def set_mystem(analyzer):
+    """analyze(text)를 가진 분석기(MystemPool, Mystem 등)를 기본 분석기로 지정합니다."""
+    global _default_mystem
+    with _default_mystem_lock:
+        _default_mystem = analyzer
+
+
+# 텍스트 분석용 / 단어 하나 조회용 기본 백엔드 (지정하지 않으면 둘 다 Mystem)
+_text_backend = None
+_word_backend = None
+
+
+def get_backend():
+    global _text_backend
+    if _text_backend is None:
+        from .backends import MystemBackend
+        _text_backend = MystemBackend()
+    return _text_backend
+
+
+def get_word_backend():
+    return _word_backend or get_backend()
+
+
+def set_backend(backend, word_backend=None):
+    """기본 백엔드를 지정합니다. word_backend를 주지 않으면 단어 조회도 같은 백엔드를 씁니다."""
+    global _text_backend, _word_backend
+    _text_backend, _word_backend = backend, word_backend
+
+
+def text_hash(text: str) -> str:
+    """텍스트 내용으로 만든 캐시 키 (sha1)"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def pos_from_gr(grammar_info: str) -> str:
+    """Mystem 'gr' 태그를 POS_MAP 한국어 품사명으로 변환"""
+    parts = re.split(r'[,=]', grammar_info, 1)
+    pos_abbr_base = parts[0].strip()
+    pos_full = grammar_info.split(',')[0].strip()
+    if pos_full in POS_MAP:
+        return POS_MAP[pos_full]
+    return POS_MAP.get(pos_abbr_base, UNKNOWN_POS)
+
+
+def token_from_analysis(item: dict) -> dict:
+    """Mystem analyze 결과 항목 하나를 토큰 정보(lemma, gr, pos)로 변환"""
+    surface = item.get('text', '')
+    analyses = item.get('analysis')
+    if analyses:
+        gr = analyses[0].get('gr', '')
+        return {"text": surface, "lemma": analyses[0].get('lex', surface).strip(), "gr": gr, "pos": pos_from_gr(gr)}
+    return {"text": surface, "lemma": surface.strip(), "gr": "", "pos": UNKNOWN_POS}
+
+
+class LRUDict:
+    """스레드 안전한 크기 제한 LRU 딕셔너리. name을 주면 적중/실패/삭제 횟수를 metrics에 기록합니다."""
+
+    def __init__(self, maxsize, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            hit = key in self.data
+            if hit:
+                self.data.move_to_end(key)
+                value = self.data[key]
+        if self.name:
+            metrics.cache_event(self.name, "hit" if hit else "miss")
+        return value if hit else default
+
+    def set(self, key, value):
+        evicted = 0
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                evicted += 1
+        if self.name:
+            metrics.cache_event(self.name, "eviction", evicted)
+
+    def __len__(self):
+        return len(self.data)
+
+
+# (백엔드, 문장 해시) → 문장 기준 오프셋의 토큰 목록. 텍스트를 고쳐도 바뀌지 않은 문장은 다시 분석하지 않습니다.
+SENTENCE_TOKENS = LRUDict(maxsize=50_000, name="sentence_tokens")
+
+
+def tokenize_with_offsets(text: str, mystem=None) -> list:
+    """Mystem 한 번 호출로 단어 토큰(text, start, end, lemma, gr, pos) 목록을 만듭니다."""
+    tokens = []
+    cursor = 0
+    with metrics.timed("mystem"):
+        analysis = (mystem or get_mystem()).analyze(text)
+    for item in analysis:
+        surface = item.get('text', '')
+        start = text.find(surface, cursor) if surface else -1
+        if start == -1:
+            continue
+        cursor = start + len(surface)
+        if not re.fullmatch(r'\w+', surface, flags=re.UNICODE):
+            continue
+        token = token_from_analysis(item)
+        token["start"], token["end"] = start, cursor
+        tokens.append(token)
+    return tokens
+
+
+def analyze_sentences(sentences, backend=None) -> list:
+    """
+    문장별 토큰 목록을 반환합니다. 캐시에 없는 문장만 줄바꿈으로 이어 붙여
+    백엔드를 한 번 호출한 뒤, 오프셋으로 다시 문장별로 나눕니다.
+    """
+    backend = backend or get_backend()
+    results = [None] * len(sentences)
+    missing = {}
+    for i, sentence in enumerate(sentences):
+        cached = SENTENCE_TOKENS.get((backend.name, text_hash(sentence)))
+        if cached is not None:
+            results[i] = cached
+        else:
+            missing.setdefault(sentence, []).append(i)
+
+    if missing:
+        pending = list(missing)
+        starts, offset = [], 0
+        for sentence in pending:
+            starts.append(offset)
+            offset += len(sentence) + 1
+        per_sentence = [[] for _ in pending]
+        for token in backend.tokenize("\n".join(pending)):
+            k = bisect.bisect_right(starts, token["start"]) - 1
+            token["start"] -= starts[k]
+            token["end"] -= starts[k]
+            per_sentence[k].append(token)
+        for sentence, sentence_tokens in zip(pending, per_sentence):
+            SENTENCE_TOKENS.set((backend.name, text_hash(sentence)), sentence_tokens)
+            for i in missing[sentence]:
+                results[i] = sentence_tokens
+    return results
+
+
+def analyze_text(text: str, backend=None) -> dict:
+    """
+    텍스트 전체의 토큰 테이블을 만듭니다. 처음에는 백엔드를 한 번만 호출하고,
+    텍스트를 고친 뒤에는 바뀐 문장만 분석합니다.
+    {"hash", "tokens": [{text, start, end, lemma, gr, pos}],
+     "index": {소문자 표면형: 첫 토큰 위치}, "lemmas": {기본형: 빈도}}
+    """
+    spans = split_sentences(text)
+    per_sentence = analyze_sentences([text[start:end] for start, end in spans], backend)
+
+    tokens = []
+    index = {}
+    lemmas = Counter()
+    for (sentence_start, _), sentence_tokens in zip(spans, per_sentence):
+        for sentence_token in sentence_tokens:
+            token = dict(sentence_token)
+            token["start"] += sentence_start
+            token["end"] += sentence_start
+            index.setdefault(token["text"].lower(), len(tokens))
+            lemmas[token["lemma"]] += 1
+            tokens.append(token)
+
+    return {"hash": text_hash(text), "tokens": tokens, "index": index, "lemmas": dict(lemmas)}
+
+
+def lookup_token(word: str, token_table: Union[dict, None]) -> Union[dict, None]:
+    """토큰 테이블에서 단어(대소문자 무시)의 첫 번째 분석 결과를 찾습니다."""
+    if not token_table:
+        return None
+    idx = token_table["index"].get(word.lower())
+    return token_table["tokens"][idx] if idx is not None else None
+
+
+@functools.lru_cache(maxsize=10_000)
+def analyze_word_with(backend, word: str) -> dict:
+    return backend.analyze_word(word)
+
+
+def analyze_word(word: str) -> dict:
+    """토큰 테이블에 없는 단어(검색어 등) 조회 (단어 조회용 백엔드 사용)"""
+    return analyze_word_with(get_word_backend(), word)
+
+
+metrics.register_lru("analyze_word", analyze_word_with)
+
+
+def lemmatize_ru(word: str, token_table: Union[dict, None] = None) -> str:
+    if ' ' in word.strip():
+        return word.strip()
+    if re.fullmatch(r'\w+', word, flags=re.UNICODE):
+        token = lookup_token(word, token_table) or analyze_word(word)
+        return token["lemma"] or word
+    return word
+
+
+def get_pos_ru(word: str, token_table: Union[dict, None] = None) -> str:
+    if ' ' in word.strip():
+        return PHRASE_POS
+    if re.fullmatch(r'\w+', word, flags=re.UNICODE):
+        token = lookup_token(word, token_table) or analyze_word(word)
+        return token["pos"]
+    return UNKNOWN_POS
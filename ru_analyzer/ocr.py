@@ -0,0 +1,160 @@
+"""
+OCR 전처리: 업로드 이미지를 Vision API로 보내기 전에 정규화합니다.
+
+EXIF 회전 보정 → 최대 변 길이로 축소 → 흑백 변환 → JPEG 재압축.
+정규화된 픽셀의 해시를 OCR 결과 캐시 키로 사용하므로, 같은 페이지를 다시 찍거나
+다음 날 다시 올려도(원본 바이트가 달라도 픽셀이 같으면) 네트워크 호출 없이 결과를 재사용합니다.
+여러 페이지(이미지 여러 장, 페이지 스캔 ZIP)는 제한된 워커 풀에서 동시에 처리합니다.
+"""
+import hashlib
+import io
+import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import metrics
+
+# 교재 본문 OCR에 충분한 해상도 (긴 변 기준 픽셀)
+OCR_MAX_DIMENSION = 2048
+OCR_JPEG_QUALITY = 85
+# 전처리 방식이 바뀌면 올려서 OCR 결과 캐시를 무효화합니다.
+OCR_NORMALIZE_VERSION = 1
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+OCR_TIMEOUT = 30
+# 동시에 진행하는 Vision 요청 수
+OCR_MAX_WORKERS = 8
+
+# 캐시하면 안 되는 OCR 오류 결과의 접두어
+OCR_ERROR_PREFIXES = ("OCR API 클라이언트 초기화 실패", "Vision API 오류", "OCR 처리 중")
+# 예전 버전이 글자 없는 페이지에 대해 결과 대신 저장하던 안내 문구 (캐시에서 읽으면 ""로 바꿈)
+_LEGACY_NO_TEXT = "이미지에서 텍스트를 찾을 수 없습니다."
+
+
+def is_ocr_error(result) -> bool:
+    """오류 결과인지. 글자가 없는 페이지("")는 오류가 아니라 빈 결과입니다."""
+    return result is None or result.startswith(OCR_ERROR_PREFIXES)
+
+
+def normalize_image(image_bytes, max_dimension=OCR_MAX_DIMENSION, quality=OCR_JPEG_QUALITY):
+    """
+    (정규화된 JPEG 바이트, 픽셀 해시)를 반환합니다.
+    이미지를 열 수 없으면 원본 바이트와 원본 바이트 해시를 그대로 돌려줍니다.
+    """
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            img = ImageOps.exif_transpose(img)
+            img = img.convert("L")
+            img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+            pixel_hash = hashlib.sha256()
+            pixel_hash.update(f"v{OCR_NORMALIZE_VERSION}:{img.mode}:{img.size}".encode("ascii"))
+            pixel_hash.update(img.tobytes())
+
+            output = io.BytesIO()
+            img.save(output, format="JPEG", quality=quality, optimize=True)
+            return output.getvalue(), pixel_hash.hexdigest()
+    except Exception:
+        return image_bytes, hashlib.sha256(image_bytes).hexdigest()
+
+
+def request_ocr(image_bytes, client):
+    """Vision API text_detection 호출 (정규화된 이미지 바이트). 글자가 없는 페이지는 ""를 반환합니다."""
+    if client is None:
+        return "OCR API 클라이언트 초기화 실패. Secrets (GOOGLE_APPLICATION_CREDENTIALS_JSON) 설정을 확인해주세요."
+
+    from google.cloud import vision
+
+    start = time.perf_counter()
+    try:
+        image = vision.Image(content=image_bytes)
+        image_context = vision.ImageContext(language_hints=["ru"])
+
+        response = client.text_detection(
+            image=image,
+            image_context=image_context,
+            timeout=OCR_TIMEOUT
+        )
+        texts = response.text
+
+        if response.error.message:
+            metrics.observe_api("vision", time.perf_counter() - start, error=RuntimeError(response.error.message))
+            return f"Vision API 오류: {response.error.message}"
+        metrics.observe_api("vision", time.perf_counter() - start)
+
+        return texts or ""
+
+    except Exception as e:
+        metrics.observe_api("vision", time.perf_counter() - start, error=e)
+        error_msg = str(e)
+        # 오류 메시지 필터링 (InvalidCharacterError 방지)
+        if "HTTPConnection" in error_msg or "ConnectTimeoutError" in error_msg:
+            return "OCR 처리 중 인증/네트워크 시간 초과 오류가 발생했습니다. (GCP Secrets 및 할당량 확인 필요)"
+
+        return f"OCR 처리 중 오류 발생: {error_msg}"
+
+
+def ocr_image(image_bytes, client, store, max_dimension=OCR_MAX_DIMENSION):
+    """이미지를 정규화한 뒤 픽셀 해시로 OCR 결과 저장소(store)를 먼저 확인합니다. 오류 결과는 저장하지 않습니다."""
+    normalized_bytes, pixel_key = normalize_image(image_bytes, max_dimension=max_dimension)
+    cached = store.get(pixel_key)
+    if cached is not None:
+        return "" if cached == _LEGACY_NO_TEXT else cached
+
+    result = request_ocr(normalized_bytes, client)
+    if not is_ocr_error(result):
+        store.set(pixel_key, result)
+    return result
+
+
+def natural_sort_key(name):
+    """page_2.jpg가 page_10.jpg보다 앞에 오도록 숫자를 숫자로 비교"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+
+def collect_upload_pages(uploads):
+    """
+    (파일명, 바이트) 목록 → 페이지 순서대로의 (페이지 이름, 이미지 바이트) 목록.
+    업로드 순서를 유지하고, ZIP은 안의 이미지들을 이름의 자연 정렬 순서로 펼칩니다.
+    """
+    pages = []
+    for name, data in uploads:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                members = [
+                    info.filename for info in archive.infolist()
+                    if not info.is_dir()
+                    and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+                    and not any(part.startswith((".", "__MACOSX")) for part in info.filename.split("/"))
+                ]
+                for member in sorted(members, key=natural_sort_key):
+                    pages.append((f"{name}/{member}", archive.read(member)))
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            pages.append((name, data))
+    return pages
+
+
+def ocr_pages(pages, ocr_fn, max_workers=OCR_MAX_WORKERS, on_progress=None, on_page=None):
+    """
+    페이지들을 제한된 워커 풀에서 동시에 OCR하고, 결과를 페이지 순서대로 반환합니다.
+    on_progress(완료 페이지 수, 전체 페이지 수)와 on_page(페이지 번호, 결과)는 페이지가 끝날 때마다
+    호출한 스레드에서 불립니다.
+    """
+    results = [None] * len(pages)
+    if not pages:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pages))), thread_name_prefix="ocr") as pool:
+        futures = {pool.submit(ocr_fn, image_bytes): i for i, (_, image_bytes) in enumerate(pages)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = f"OCR 처리 중 오류 발생: {e}"
+            if on_page:
+                on_page(futures[future], results[futures[future]])
+            if on_progress:
+                on_progress(done, len(pages))
+    return results
@@ -0,0 +1,195 @@
+"""
+긴 텍스트(책 한 장 분량) 페이지 단위로 다루기.
+
+텍스트를 문장 N개씩 페이지로 나누고, 형태소 분석/강세/번역/하이라이팅은 화면에 보이는 페이지에만 합니다.
+문서 전체 검색과 단어 목록/단어장은 Document가 들고 있는 색인으로 답하므로 한 번의 rerun 비용과
+세션 메모리는 문서 길이가 아니라 페이지 크기에 비례합니다.
+- 표면형 → 페이지: 정규식으로 문서를 한 번 훑어 만듦 (형태소 분석 없음)
+- 표면형별 분석/기본형 통계: 페이지가 분석될 때마다 누적 (index_all()로 한꺼번에 채울 수도 있음)
+
+    document = Document(text, page_sentences=40)
+    page_table = analyze_text(document.page_text(0))
+    document.record_page(0, page_table)
+    document.find_pages("книгу")     # → [0, 3, 7]
+    document.token_table()           # lemmatize_ru/get_pos_ru/WordList에 넘길 문서 전체 표
+"""
+import bisect
+import re
+import threading
+from types import MappingProxyType
+
+from . import metrics
+from .glossary import normalize
+from .highlight import highlight_spans
+from .morphology import analyze_text, analyze_word, text_hash
+from .sentences import split_sentences
+
+_WORD_RE = re.compile(r"\w+(?:-\w+)*", flags=re.UNICODE)
+
+
+class Document:
+    """
+    페이지로 나눈 텍스트 + 문서 전체 색인. 여러 세션이 같은 객체를 공유해도 되도록 색인 갱신은 lock으로 보호합니다.
+    페이지 번호는 0부터 셉니다.
+    """
+
+    def __init__(self, text, page_sentences=40):
+        self.text = text
+        self.hash = text_hash(text)
+        self.page_sentences = max(1, int(page_sentences))
+        spans = split_sentences(text)
+        self.sentence_count = len(spans)
+        self.pages = [
+            (spans[i][0], spans[min(i + self.page_sentences, len(spans)) - 1][1])
+            for i in range(0, len(spans), self.page_sentences)
+        ] or [(0, len(text))]
+        self.page_starts = [start for start, _ in self.pages]
+        self.lock = threading.Lock()
+        self.indexed = set()      # 분석이 끝나 색인에 들어간 페이지
+        self.tokens = []          # 표면형마다 첫 분석 결과 하나 (문서 기준 위치)
+        self.index = {}           # 소문자 표면형 → tokens 위치
+        self.lemmas = {}          # 기본형 → 빈도
+        self.lemma_info = {}      # 기본형 → [품사, 첫 형태, 첫 위치]
+        self.lemma_pages = {}     # 기본형 → 등장 페이지 목록
+        self._table = None        # token_table() 결과 (색인된 페이지 수가 바뀔 때만 새로 만듦)
+        self._sorted_forms = None # 접두어 검색용 정렬된 표면형 (contains_lemma에서 처음 쓸 때 만듦)
+        with metrics.timed("document.forms"):
+            self.form_pages = self._build_form_pages()
+
+    def _build_form_pages(self) -> dict:
+        """정규화한 표면형 → 등장 페이지 목록 (오름차순, 중복 없음)"""
+        form_pages = {}
+        page, next_start = 0, self._next_page_start(0)
+        for m in _WORD_RE.finditer(self.text):
+            while m.start() >= next_start:
+                page += 1
+                next_start = self._next_page_start(page)
+            pages = form_pages.setdefault(normalize(m.group()), [])
+            if not pages or pages[-1] != page:
+                pages.append(page)
+        return form_pages
+
+    def _next_page_start(self, page):
+        return self.page_starts[page + 1] if page + 1 < len(self.page_starts) else len(self.text) + 1
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_text(self, page) -> str:
+        start, end = self.pages[page]
+        return self.text[start:end]
+
+    def page_of(self, offset) -> int:
+        return max(0, bisect.bisect_right(self.page_starts, offset) - 1)
+
+    def record_page(self, page, page_table):
+        """분석한 페이지의 토큰 테이블(analyze_text 결과)을 문서 색인에 더합니다. 이미 들어간 페이지는 무시합니다."""
+        offset = self.pages[page][0]
+        with self.lock:
+            if page in self.indexed:
+                return
+            self.indexed.add(page)
+            for token in page_table["tokens"]:
+                form = token["text"].lower()
+                if form not in self.index:
+                    self.index[form] = len(self.tokens)
+                    self.tokens.append({**token, "start": token["start"] + offset, "end": token["end"] + offset})
+                lemma = token["lemma"]
+                self.lemmas[lemma] = self.lemmas.get(lemma, 0) + 1
+                info = self.lemma_info.get(lemma)
+                if info is None or token["start"] + offset < info[2]:
+                    self.lemma_info[lemma] = [token["pos"], token["text"], token["start"] + offset]
+                pages = self.lemma_pages.setdefault(lemma, [])
+                if page not in pages:
+                    bisect.insort(pages, page)
+
+    def index_all(self, analyze=analyze_text, on_progress=None):
+        """
+        아직 분석하지 않은 페이지를 차례로 분석해 색인에 넣습니다. 페이지 토큰 테이블은 색인에 더한 뒤 버리므로
+        메모리에는 색인만 남습니다. on_progress(끝난 페이지 수, 전체 페이지 수)
+        """
+        for page in range(self.page_count):
+            if page not in self.indexed:
+                self.record_page(page, analyze(self.page_text(page)))
+            if on_progress is not None:
+                on_progress(page + 1, self.page_count)
+
+    @property
+    def indexed_count(self) -> int:
+        return len(self.indexed)
+
+    def token_table(self) -> dict:
+        """
+        analyze_text 결과와 같은 모양의 문서 전체 표 (표면형마다 토큰 하나, 읽기 전용). lemmatize_ru/get_pos_ru/WordList가
+        페이지를 넘겨도 같은 단어를 같은 기본형으로 보도록 합니다. 새 페이지가 색인될 때만 다시 만들고
+        그 밖의 rerun에서는 같은 객체를 돌려주므로 비용이 문서 크기에 비례하지 않습니다. hash는 색인이 늘어날 때마다 바뀝니다.
+        """
+        with self.lock:
+            hash_ = f"{self.hash}:{len(self.indexed)}"
+            if self._table is None or self._table["hash"] != hash_:
+                self._table = MappingProxyType({
+                    "hash": hash_,
+                    "tokens": tuple(MappingProxyType(token) for token in self.tokens),
+                    "index": MappingProxyType(dict(self.index)),
+                    "lemmas": MappingProxyType(dict(self.lemmas)),
+                })
+            return self._table
+
+    def lemma_rows(self) -> list:
+        """분석된 페이지 기준 기본형 통계 [{기본형, 품사, 빈도, 첫 형태, 첫 위치}] (vocabulary.build_vocabulary_from_rows용)"""
+        with self.lock:
+            return [
+                {"기본형": lemma, "품사": pos, "빈도": self.lemmas[lemma], "첫 형태": form, "첫 위치": start}
+                for lemma, (pos, form, start) in self.lemma_info.items()
+            ]
+
+    def contains_lemma(self, lemma, surface=None) -> bool:
+        """
+        기본형이 문서 어디에든 나오는지 (분석하지 않은 페이지 포함). 색인된 기본형 → 표면형(surface)/기본형 자체가
+        문서에 있는지 → 어간이 같은(접두어가 같은) 아직 분석하지 않은 표면형만 단어 단위로 분석해 확인합니다.
+        """
+        with self.lock:
+            if lemma in self.lemmas:
+                return True
+        target = normalize(lemma)
+        if target in self.form_pages or (surface is not None and normalize(surface) in self.form_pages):
+            return True
+        if self._sorted_forms is None:
+            self._sorted_forms = sorted(self.form_pages)
+        forms = self._sorted_forms
+        prefix = target[:max(3, len(target) - 3)]
+        i = bisect.bisect_left(forms, prefix)
+        while i < len(forms) and forms[i].startswith(prefix):
+            if forms[i] not in self.index and normalize(analyze_word(forms[i])["lemma"]) == target:
+                return True
+            i += 1
+        return False
+
+    def find_pages(self, query, lemma=None) -> list:
+        """
+        검색어가 나오는 페이지 목록. 단어는 표면형 색인(대소문자/ё 무시)으로, 구는 모든 단어가 있는 페이지를
+        고른 뒤 원문에서 다시 확인합니다. lemma를 주면 분석된 페이지 중 같은 기본형이 나오는 페이지도 포함합니다.
+        """
+        terms = _WORD_RE.findall(normalize(query))
+        pages = set()
+        if terms:
+            pages = set(self.form_pages.get(terms[0], ()))
+            for term in terms[1:]:
+                pages &= set(self.form_pages.get(term, ()))
+            if len(terms) > 1:
+                pages = {page for page in pages if highlight_spans(self.page_text(page), [query])}
+        if lemma:
+            with self.lock:
+                pages.update(self.lemma_pages.get(lemma, ()))
+        return sorted(pages)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "pages": self.page_count,
+                "indexed": len(self.indexed),
+                "sentences": self.sentence_count,
+                "forms": len(self.form_pages),
+                "lemmas": len(self.lemmas),
+            }
@@ -0,0 +1,116 @@
+"""
+백그라운드 미리 가져오기 큐.
+
+텍스트를 불러오면 내용어(명사/동사/형용사)를 우선순위대로 넣어 두고, 백그라운드 스레드 하나가
+batch_size개씩 꺼내 fetch_batch(items)로 조회합니다. 나중에 넣은 텍스트(가장 최근에 연 텍스트)가
+먼저 처리되고, 같은 텍스트 안에서는 넣은 순서(순위)대로 처리됩니다.
+이미 알고 있는 항목(is_known)은 꺼낼 때 건너뛰므로 같은 단어를 두 번 조회하지 않습니다.
+
+할당량/사용자 요청 우선 처리는 fetch_batch 쪽(GeminiExecutor.run_background)이 맡습니다.
+"""
+import heapq
+import itertools
+import threading
+
+from . import metrics
+from .wordlist import build_lemma_rows
+
+# 미리 가져올 품사 (전치사/접속사/불변화사 등은 제외)
+PREFETCH_POS = ("명사", "동사", "형용사")
+
+
+class Prefetcher:
+    def __init__(self, fetch_batch, is_known=None, batch_size=25, max_queue=2000, name="prefetch"):
+        self.fetch_batch = fetch_batch
+        self.is_known = is_known
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.name = name
+        self.heap = []            # (우선순위, 순번, 항목)
+        self.priority = {}        # 항목 → 현재 우선순위 (힙에 남은 옛 우선순위 항목은 꺼낼 때 버림)
+        self.generation = 0
+        self.counter = itertools.count()
+        self.counts = {"fetched": 0, "skipped": 0, "failed": 0, "dropped": 0, "restarts": 0}
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def enqueue(self, items) -> int:
+        """
+        items(우선순위 높은 순)를 큐 맨 앞에 넣습니다. 이미 대기 중인 항목은 새 순위로 옮깁니다.
+        큐가 max_queue를 넘으면 우선순위가 가장 낮은 항목부터 버립니다. 새로 넣은 항목 수를 반환합니다.
+        """
+        added = 0
+        with self.condition:
+            self.generation += 1
+            for rank, item in enumerate(items):
+                priority = (-self.generation, rank)
+                if item not in self.priority:
+                    added += 1
+                self.priority[item] = priority
+                heapq.heappush(self.heap, (priority, next(self.counter), item))
+            if len(self.priority) > self.max_queue:
+                self._trim()
+            # 처음이거나, 예상 못 한 오류로 작업 스레드가 끝났으면 새로 띄움
+            if self.thread is None or not self.thread.is_alive():
+                if self.thread is not None:
+                    self.counts["restarts"] += 1
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return added
+
+    def _trim(self):
+        keep = sorted(self.priority.items(), key=lambda kv: kv[1])[:self.max_queue]
+        self.counts["dropped"] += len(self.priority) - len(keep)
+        self.priority = dict(keep)
+        self.heap = [(priority, next(self.counter), item) for item, priority in keep]
+        heapq.heapify(self.heap)
+
+    def _next_batch(self) -> list:
+        with self.condition:
+            while not self.priority:
+                self.condition.wait()
+            batch = []
+            while self.heap and len(batch) < self.batch_size:
+                priority, _, item = heapq.heappop(self.heap)
+                if self.priority.get(item) != priority:
+                    continue  # 이미 처리했거나 다른 순위로 옮겨진 항목
+                del self.priority[item]
+                batch.append(item)
+            return batch
+
+    def _count(self, key, n):
+        with self.condition:
+            self.counts[key] += n
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            # is_known(캐시 조회)/fetch_batch 어느 쪽에서 오류가 나도 그 묶음만 실패로 세고 스레드는 계속 돎
+            try:
+                if self.is_known is not None:
+                    unknown = [item for item in batch if not self.is_known(item)]
+                    self._count("skipped", len(batch) - len(unknown))
+                    batch = unknown
+                if not batch:
+                    continue
+                with metrics.timed(self.name):
+                    self.fetch_batch(batch)
+                self._count("fetched", len(batch))
+            except Exception:
+                self._count("failed", len(batch))
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {"queued": len(self.priority), **self.counts}
+
+
+def prefetch_items(token_table, limit):
+    """
+    텍스트의 내용어 (첫 형태, 기본형, 품사)를 텍스트 안 빈도 → 처음 나온 위치 순으로.
+    텍스트에 실제로 나온 형태로 조회하므로 그 형태를 누르면 영구 캐시에서 격 분석까지 바로 나옵니다.
+    """
+    return [
+        (row["첫 형태"].lower(), row["기본형"], row["품사"])
+        for row in build_lemma_rows(token_table) if row["품사"] in PREFETCH_POS
+    ][:limit]
@@ -0,0 +1,29 @@
+"""
+문장 단위 분할. 번역 메모리, 증분 분석 등에서 공통으로 사용합니다.
+"""
+import re
+
+# 문장부호 뒤 공백 또는 줄바꿈을 문장 경계로 봅니다.
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?…])\s+|\s*\n\s*')
+
+
+def split_sentences(text: str) -> list:
+    """문장 구간 (시작, 끝) 목록. 구간 사이의 공백/줄바꿈은 포함하지 않습니다."""
+    spans = []
+    start = len(text) - len(text.lstrip())
+    for m in SENTENCE_BOUNDARY_RE.finditer(text):
+        if m.start() > start:
+            spans.append((start, m.start()))
+        start = max(start, m.end())
+    end = len(text.rstrip())
+    if end > start:
+        spans.append((start, end))
+    return spans
+
+
+def sentence_separator(text: str, spans: list, i: int) -> str:
+    """i번째 문장 뒤의 구분자: 원문에 줄바꿈이 있으면 줄바꿈, 아니면 공백 하나"""
+    if i + 1 >= len(spans):
+        return ""
+    gap = text[spans[i][1]:spans[i + 1][0]]
+    return "\n" if "\n" in gap else " "
@@ -0,0 +1,100 @@
+"""
+ruaccent로 강세 위치 찾기 (외부 사이트 없이 로컬 CPU 추론).
+
+ruaccent는 강세 모음 앞에 '+'를 넣은 문장을 돌려줍니다 ('св+инцовая'). 이 결과를 원문 문장에
+맞춰 정렬해 '강세 모음의 문장 내 위치' 목록으로 바꾸고, 문장 해시마다 캐시합니다.
+화면에는 get_highlighted_html(..., stress_marks=위치)로 모음 뒤에 결합 양음 부호(U+0301)를 붙입니다.
+
+    annotator = StressAnnotator(load_accentizer())
+    marks = annotator.annotate(text)       # 텍스트 기준 강세 모음 위치 (정렬된 튜플)
+"""
+import threading
+
+from . import metrics
+from .morphology import LRUDict, text_hash
+from .sentences import split_sentences
+
+VOWELS = set("аеёиоуыэюяАЕЁИОУЫЭЮЯ")
+
+
+def load_accentizer(omograph_model_size="turbo2", use_dictionary=True, device="CPU"):
+    """ruaccent 모델을 불러옵니다 (처음 한 번은 Hugging Face에서 모델 파일을 내려받음)."""
+    from ruaccent import RUAccent
+
+    accentizer = RUAccent()
+    accentizer.load(omograph_model_size=omograph_model_size, use_dictionary=use_dictionary, device=device)
+    return accentizer
+
+
+def _same_letter(a, b) -> bool:
+    a, b = a.lower(), b.lower()
+    return a == b or {a, b} == {"е", "ё"}
+
+
+def _is_cyrillic(ch) -> bool:
+    return "а" <= ch.lower() <= "я" or ch in "ёЁ"
+
+
+def stress_offsets(sentence, accented) -> tuple:
+    """
+    ruaccent 결과('+' 표기)를 원문 문장에 맞춰 강세 모음의 위치 목록으로 바꿉니다.
+    ruaccent는 허용 목록 밖의 글자('–', '…', '%', '№' 등)와 문장부호 앞 공백을 지우고 е를 ё로 바꾸기도 하므로,
+    원문에서 짝이 없는 글자는 키릴 문자가 아닌 한 건너뛰며 글자 단위로 다시 맞춥니다. ё는 늘 강세이므로 표시하지 않습니다.
+
+    >>> stress_offsets("Он сказал – привет, дом.", "+Он сказ+ал прив+ет, д+ом.")
+    (0, 7, 16, 21)
+    >>> stress_offsets("Ну… ладно.", "Ну л+адно.")
+    (5,)
+    """
+    offsets = []
+    i = 0
+    stressed = False
+    for ch in accented:
+        if ch == "+":
+            stressed = True
+            continue
+        # 결과에서 사라진 원문 글자(공백/문장부호/기호)는 건너뜀. 키릴 문자는 지워지지 않으므로 거기서 멈춤
+        j = i
+        while j < len(sentence) and not _same_letter(sentence[j], ch) and not _is_cyrillic(sentence[j]):
+            j += 1
+        if j < len(sentence) and _same_letter(sentence[j], ch):
+            if stressed and sentence[j] in VOWELS and sentence[j] not in "ёЁ":
+                offsets.append(j)
+            i = j + 1
+            stressed = False
+        elif not _is_cyrillic(ch):
+            # 원문에 없는 글자(ruaccent가 넣은 공백 등)는 무시하고 강세 표시는 다음 글자로 넘김
+            continue
+        else:
+            stressed = False
+    return tuple(offsets)
+
+
+class StressAnnotator:
+    """
+    프로세스 전체가 공유하는 강세 분석기. 문장 해시 → 문장 기준 강세 위치를 LRU로 캐시하므로
+    텍스트를 고쳐도 바뀐 문장만 모델에 넣습니다. ruaccent 객체는 스레드 안전하지 않아 lock으로 직렬화합니다.
+    """
+
+    def __init__(self, accentizer, cache_size=50_000):
+        self.accentizer = accentizer
+        self.cache = LRUDict(maxsize=cache_size, name="stress")
+        self.lock = threading.Lock()
+
+    def annotate(self, text) -> tuple:
+        spans = split_sentences(text)
+        keys = [text_hash(text[start:end]) for start, end in spans]
+        found = {key: self.cache.get(key) for key in set(keys)}
+
+        # 캐시에 없는 문장만 lock 안에서 한 문장씩 모델에 통과시킴 (같은 문장이 여러 번 나와도 한 번)
+        missing = {key: text[start:end] for key, (start, end) in zip(keys, spans) if found[key] is None}
+        if missing:
+            with metrics.timed("stress"), self.lock:
+                for key, sentence in missing.items():
+                    found[key] = stress_offsets(sentence, self.accentizer.process_all(sentence))
+                    self.cache.set(key, found[key])
+
+        offsets = []
+        for key, (start, _) in zip(keys, spans):
+            offsets.extend(start + offset for offset in found[key])
+        return tuple(offsets)
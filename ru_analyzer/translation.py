@@ -0,0 +1,343 @@
+"""
+문장 단위 증분 번역 + 번역 메모리.
+
+텍스트를 문장으로 나누고, 번역 메모리(문장 해시 → 번역)에 없는 문장만 모아
+여러 청크로 나누어 동시에 Gemini에 보냅니다. 텍스트 일부를 고치거나 단어를 하나 더
+선택해도 바뀐 문장만 다시 번역합니다.
+
+translate_sentences_stream은 같은 일을 스트리밍 응답(generate_content_stream)으로 하며,
+번역문이 도착하는 대로 on_update(html)로 중간 결과를 넘겨 줍니다.
+"""
+import json
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from .highlight import SELECTED_CLASS, highlight_spans
+from .morphology import text_hash
+from .sentences import sentence_separator, split_sentences
+
+# 프롬프트/출력 형식이 바뀌면 올려서 번역 메모리를 무효화합니다.
+TRANSLATION_MEMORY_VERSION = 1
+# 한 번의 요청에 담을 원문 길이(문자 수) 상한
+TRANSLATION_CHUNK_CHARS = 1500
+TRANSLATION_MODEL = "gemini-2.0-flash"
+
+PHRASE_START = "<PHRASE_START>"
+PHRASE_END = "<PHRASE_END>"
+PHRASE_MARKER_RE = re.compile(f"({re.escape(PHRASE_START)}|{re.escape(PHRASE_END)})")
+
+# 스트리밍 응답의 문장 번호 줄: "[3] 번역문"
+STREAM_LINE_RE = re.compile(r"^\[(\d+)\][ \t]?")
+# 아직 번역이 오지 않은 문장 자리
+PENDING_SENTENCE_HTML = '<span style="color: #bbb;">…</span>'
+
+TRANSLATION_SYSTEM_INSTRUCTION = '''너는 번역가이다. 요청된 러시아어 텍스트를 문맥에 맞는 자연스러운 한국어로 번역하고, 절대로 다른 설명, 옵션, 질문, 부가적인 텍스트를 출력하지 않는다. 오직 최종 번역 텍스트만 출력한다.'''
+
+
+def sentence_highlights(sentence, highlight_words) -> list:
+    """문장 안에 실제로 등장하는 선택 단어/구만 골라냅니다 (번역 메모리 키의 일부)."""
+    return sorted({sentence[start:end] for start, end in highlight_spans(sentence, highlight_words)})
+
+
+def translation_memory_key(sentence, highlights) -> str:
+    return text_hash(json.dumps([TRANSLATION_MEMORY_VERSION, sentence, highlights], ensure_ascii=False))
+
+
+def phrase_markup_to_html(translated: str) -> str:
+    """
+    <PHRASE_START>/<PHRASE_END> 마크업을 span 태그로 변환. 청크 안에서 짝이 맞지 않으면 바로잡습니다:
+    앞에서부터 깊이를 세어 여는 마커가 없는 닫는 마커만 버리고, 끝까지 열려 있는 span은 닫아 줍니다.
+    """
+    parts = []
+    depth = 0
+    for piece in PHRASE_MARKER_RE.split(translated):
+        if piece == PHRASE_START:
+            depth += 1
+            parts.append(f'<span class="{SELECTED_CLASS}">')
+        elif piece == PHRASE_END:
+            if depth:
+                depth -= 1
+                parts.append('</span>')
+        else:
+            parts.append(piece)
+    parts.append('</span>' * depth)
+    return "".join(parts)
+
+
+def partial_markup_to_html(translated: str) -> str:
+    """
+    스트리밍 중인 번역문 변환. 청크 경계에서 잘린 마커 조각('<PHRASE_ST' 등)은 다음 조각이
+    올 때까지 숨기고, 아직 닫히지 않은 마크업은 임시로 닫아 줍니다.
+    """
+    cut = translated.rfind("<")
+    if cut != -1:
+        tail = translated[cut:]
+        if tail not in (PHRASE_START, PHRASE_END) and (PHRASE_START.startswith(tail) or PHRASE_END.startswith(tail)):
+            translated = translated[:cut]
+    return phrase_markup_to_html(translated)
+
+
+def single_translation_prompt(russian_text, highlights) -> str:
+    if highlights:
+        phrases_to_highlight = ", ".join([f"'{w}'" for w in highlights])
+        return f"""
+        **반드시 아래 러시아어 단어/구의 한국어 번역이 등장하면, 그 한국어 번역 단어/구를 `{PHRASE_START}`와 `{PHRASE_END}` 마크업으로 감싸야 해.**
+
+        러시아어 텍스트: '{russian_text}'
+        마크업 대상 러시아어 단어/구: {phrases_to_highlight}
+        """
+    return f"원본 러시아어 텍스트: '{russian_text}'"
+
+
+def chunk_translation_request(items) -> dict:
+    """
+    (문장, 마크업 대상) 목록 → generate_content 인자.
+    문장이 하나면 기존 단일 텍스트 프롬프트, 여러 개면 문자열 배열(JSON) 응답을 요청합니다.
+    """
+    if len(items) == 1:
+        sentence, highlights = items[0]
+        return {
+            "model": TRANSLATION_MODEL,
+            "contents": single_translation_prompt(sentence, highlights),
+            "config": {"system_instruction": TRANSLATION_SYSTEM_INSTRUCTION},
+        }
+
+    payload = [
+        {"id": i, "text": sentence, **({"highlight": highlights} if highlights else {})}
+        for i, (sentence, highlights) in enumerate(items, start=1)
+    ]
+    prompt = (
+        f"아래 JSON 배열의 러시아어 문장 {len(items)}개를 앞뒤 문맥을 고려해 순서대로 번역하고, "
+        "문장마다 번역문 하나씩 같은 순서의 문자열 배열로만 출력해라. "
+        f"'highlight'가 있는 문장은 그 러시아어 단어/구의 한국어 번역을 `{PHRASE_START}`와 `{PHRASE_END}`로 감싸야 해.\n"
+        f"{json.dumps(payload, ensure_ascii=False)}"
+    )
+    return {
+        "model": TRANSLATION_MODEL,
+        "contents": prompt,
+        "config": {
+            "system_instruction": TRANSLATION_SYSTEM_INSTRUCTION,
+            "response_mime_type": "application/json",
+            "response_schema": {"type": "array", "items": {"type": "string"}},
+        },
+    }
+
+
+def stream_translation_request(items) -> dict:
+    """
+    스트리밍용 generate_content_stream 인자. 여러 문장이면 JSON 대신 "[번호] 번역문" 줄 형식을
+    요청해 문장이 끝나는 대로 화면에 보여 줄 수 있게 합니다.
+    """
+    if len(items) == 1:
+        return chunk_translation_request(items)
+
+    numbered = "\n".join(f"[{i}] {' '.join(sentence.split())}" for i, (sentence, _) in enumerate(items, start=1))
+    targets = "\n".join(
+        f"- {i}번 문장: " + ", ".join(f"'{w}'" for w in highlights)
+        for i, (_, highlights) in enumerate(items, start=1) if highlights
+    )
+    prompt = (
+        f"아래 러시아어 문장 {len(items)}개를 앞뒤 문맥을 고려해 순서대로 번역해라. "
+        "문장마다 한 줄씩, 원문과 같은 번호 `[n]`으로 시작하고 그 뒤에 번역문만 출력해라.\n"
+        f"{numbered}"
+    )
+    if targets:
+        prompt += (
+            f"\n\n아래 문장에서는 해당 러시아어 단어/구의 한국어 번역을 `{PHRASE_START}`와 `{PHRASE_END}`로 감싸야 해.\n"
+            f"{targets}"
+        )
+    return {
+        "model": TRANSLATION_MODEL,
+        "contents": prompt,
+        "config": {"system_instruction": TRANSLATION_SYSTEM_INSTRUCTION},
+    }
+
+
+def split_numbered_translation(text, count, final=False) -> list:
+    """
+    "[번호] 번역문" 줄 형식의 (부분) 응답 → 문장별 번역 목록 (아직 나오지 않은 문장은 None).
+    번호 없는 줄은 앞 문장에 이어 붙이고, 스트리밍 중 마지막 줄이 '[1'처럼 잘린 번호면 무시합니다.
+    """
+    results = [None] * count
+    current = None
+    lines = text.split("\n")
+    for n, line in enumerate(lines):
+        match = STREAM_LINE_RE.match(line)
+        if match and 1 <= int(match.group(1)) <= count:
+            current = int(match.group(1)) - 1
+            results[current] = line[match.end():]
+        elif not final and n == len(lines) - 1 and re.fullmatch(r"\[\d*", line):
+            continue
+        elif current is not None and line.strip():
+            results[current] += " " + line.strip()
+    if final:
+        results = [r.strip() if r is not None and r.strip() else None for r in results]
+    return results
+
+
+class TranslationStream:
+    """청크 하나의 스트리밍 번역. 실행기 스레드가 run()으로 채우고, 화면 스레드가 translations()로 읽습니다."""
+
+    def __init__(self, items):
+        self.items = items
+        self.text = ""
+        self.lock = threading.Lock()
+
+    def run(self, client, request):
+        with self.lock:
+            self.text = ""  # 재시도하면 처음부터 다시 받음
+        for part in client.models.generate_content_stream(**request):
+            with self.lock:
+                self.text += getattr(part, "text", None) or ""
+
+    def translations(self, final=False) -> list:
+        with self.lock:
+            text = self.text
+        if len(self.items) == 1:
+            if final:
+                return [text.strip() or None]
+            return [text or None]
+        return split_numbered_translation(text, len(self.items), final)
+
+
+def parse_chunk_translation(items, response_text) -> list:
+    if len(items) == 1:
+        return [response_text.strip()]
+    translations = json.loads(response_text)
+    if not isinstance(translations, list) or len(translations) != len(items):
+        raise ValueError(f"번역 결과 개수 불일치 (요청 {len(items)}개)")
+    return [str(t).strip() for t in translations]
+
+
+def chunk_items(items, max_chars=TRANSLATION_CHUNK_CHARS) -> list:
+    """번역할 문장들을 원문 길이 합이 max_chars를 넘지 않는 청크로 나눕니다 (순서 유지)."""
+    chunks, current, current_chars = [], [], 0
+    for item in items:
+        if current and current_chars + len(item[0]) > max_chars:
+            chunks.append(current)
+            current, current_chars = [], 0
+        current.append(item)
+        current_chars += len(item[0])
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def translate_sentences(russian_text, highlight_words, client, submit, memory) -> str:
+    """
+    문장 단위로 번역 메모리를 확인하고, 없는 문장만 청크로 묶어 동시에 번역합니다.
+    - submit(fn, **kwargs): Future를 돌려주는 실행기 (예: GeminiExecutor.submit)
+    - memory: get(key)/set(key, value)를 가진 번역 메모리 (예: PersistentCache)
+    번역이 끝난 청크는 실패한 청크가 있어도 메모리에 저장되며, 실패가 있으면 첫 예외를 다시 던집니다.
+    반환값은 하이라이트 span이 적용된 HTML 문자열입니다.
+    """
+    spans, keys, translations, missing = _prepare_translation(russian_text, highlight_words, memory)
+
+    futures = [
+        (chunk, submit(client.models.generate_content, **chunk_translation_request(chunk)))
+        for chunk in chunk_items(missing)
+    ]
+    first_error = None
+    for chunk, future in futures:
+        try:
+            results = parse_chunk_translation(chunk, future.result().text)
+        except Exception as e:
+            first_error = first_error or e
+            continue
+        for item, translated in zip(chunk, results):
+            key = translation_memory_key(*item)
+            memory.set(key, translated)
+            translations[key] = translated
+    if first_error is not None:
+        raise first_error
+    return _join_translations(russian_text, spans, keys, translations)
+
+
+def _prepare_translation(russian_text, highlight_words, memory):
+    """문장 구간, 문장별 메모리 키, 메모리에서 찾은 번역 {키: 번역 또는 None}, 번역할 (문장, 마크업 대상) 목록"""
+    spans = split_sentences(russian_text)
+    items = []
+    for start, end in spans:
+        sentence = russian_text[start:end]
+        items.append((sentence, sentence_highlights(sentence, highlight_words)))
+
+    keys = [translation_memory_key(sentence, highlights) for sentence, highlights in items]
+    translations = {key: memory.get(key) for key in set(keys)}
+    missing = list({key: item for key, item in zip(keys, items) if translations[key] is None}.values())
+    return spans, keys, translations, missing
+
+
+def _join_translations(russian_text, spans, keys, translations, to_html=phrase_markup_to_html) -> str:
+    parts = []
+    for i, key in enumerate(keys):
+        translated = translations.get(key)
+        parts.append(PENDING_SENTENCE_HTML if translated is None else to_html(translated))
+        parts.append(sentence_separator(russian_text, spans, i))
+    return "".join(parts)
+
+
+def translate_sentences_stream(russian_text, highlight_words, client, submit, memory, on_update, interval=0.1) -> str:
+    """
+    translate_sentences의 스트리밍 버전. 메모리에 있는 문장은 바로, 나머지는 청크별 스트리밍 응답이
+    도착하는 대로 on_update(html)를 호출합니다 (interval초마다, 호출한 스레드에서 — Streamlit placeholder 갱신용).
+    스트림이 끝날 때마다 완성된 문장은 메모리에 저장하고, 그 스트림 응답에서 빠진 문장은 곧바로 한 번의
+    일반(청크) 요청으로 묶어 실행기에 넘기므로 다른 청크의 스트림/재요청과 동시에 진행됩니다.
+    """
+    spans, keys, translations, missing = _prepare_translation(russian_text, highlight_words, memory)
+    streams = [TranslationStream(chunk) for chunk in chunk_items(missing)]
+    futures = {submit(stream.run, client, stream_translation_request(stream.items)): stream for stream in streams}
+    retries = {}  # 재요청 Future → 빠진 문장 목록
+
+    last_html = None
+
+    def render():
+        nonlocal last_html
+        current = dict(translations)
+        for stream in streams:
+            for item, translated in zip(stream.items, stream.translations()):
+                key = translation_memory_key(*item)
+                if translated is not None and current.get(key) is None:
+                    current[key] = translated
+        html = _join_translations(russian_text, spans, keys, current, to_html=partial_markup_to_html)
+        if html != last_html:
+            last_html = html
+            on_update(html)
+
+    def store(items, results):
+        for item, translated in zip(items, results):
+            key = translation_memory_key(*item)
+            memory.set(key, translated)
+            translations[key] = translated
+
+    first_error = None
+    pending = set(futures)
+    render()
+    while pending:
+        done, pending = wait(pending, timeout=interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                if future in retries:
+                    store(retries[future], parse_chunk_translation(retries[future], future.result().text))
+                    continue
+                future.result()
+            except Exception as e:
+                first_error = first_error or e
+                continue
+            stream = futures[future]
+            complete, retry = [], []
+            for item, translated in zip(stream.items, stream.translations(final=True)):
+                if translated is None:
+                    retry.append(item)
+                else:
+                    complete.append((item, translated))
+            store([item for item, _ in complete], [translated for _, translated in complete])
+            if retry:
+                retry_future = submit(client.models.generate_content, **chunk_translation_request(retry))
+                retries[retry_future] = retry
+                pending.add(retry_future)
+        render()
+
+    if first_error is not None:
+        raise first_error
+    return _join_translations(russian_text, spans, keys, translations)
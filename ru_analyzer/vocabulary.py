@@ -0,0 +1,73 @@
+"""
+텍스트 전체 단어장 만들기: 토큰 테이블을 기본형별로 묶어 빈도/첫 위치/품사를 구하고,
+고빈도 기본형 목록과 비교해 이미 알 만한 단어를 걸러 냅니다.
+"""
+import functools
+from pathlib import Path
+
+import pandas as pd
+
+FREQ_LIST_PATH = Path(__file__).parent / "data" / "ru_lemma_freq.txt"
+
+# 단어장에 넣는 실질 품사 (전치사/접속사/불변화사 등은 제외)
+CONTENT_POS = ('명사', '동사', '형용사', '부사', '비교급 형용사', '비교급 부사', '동사부사')
+
+VOCABULARY_COLUMNS = ("기본형", "품사", "빈도", "첫 형태", "첫 위치", "빈도 순위")
+
+
+@functools.lru_cache(maxsize=4)
+def load_frequency_ranks(path=FREQ_LIST_PATH) -> dict:
+    """고빈도 기본형 목록 → {기본형: 순위(1부터)}. '#'으로 시작하는 줄은 주석입니다."""
+    ranks = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            lemma = line.strip()
+            if lemma and not lemma.startswith("#"):
+                ranks.setdefault(lemma, len(ranks) + 1)
+    return ranks
+
+
+def build_vocabulary(token_table, ranks=None, exclude_top=0, content_only=True, min_count=1) -> pd.DataFrame:
+    """
+    토큰 테이블 → 기본형별 단어장 DataFrame (빈도 내림차순, 같은 빈도는 먼저 나온 순서).
+    - exclude_top: 고빈도 목록 상위 N위 안의 기본형은 '아는 단어'로 보고 제외 (0이면 제외 안 함)
+    - content_only: 명사/동사/형용사/부사 등 실질 품사만 포함
+    """
+    tokens = pd.DataFrame(token_table["tokens"], columns=["text", "start", "lemma", "pos"])
+    if tokens.empty:
+        return pd.DataFrame(columns=list(VOCABULARY_COLUMNS))
+    if content_only:
+        tokens = tokens[tokens["pos"].isin(CONTENT_POS)]
+
+    vocab = tokens.groupby("lemma", sort=False).agg(
+        품사=("pos", "first"),
+        빈도=("lemma", "size"),
+        **{"첫 형태": ("text", "first"), "첫 위치": ("start", "min")},
+    )
+    vocab.index.name = "기본형"
+    return _rank_vocabulary(vocab.reset_index(), ranks, exclude_top, min_count)
+
+
+def build_vocabulary_from_rows(lemma_rows, ranks=None, exclude_top=0, content_only=True, min_count=1) -> pd.DataFrame:
+    """
+    이미 기본형별로 묶인 통계(paging.Document.lemma_rows) → build_vocabulary와 같은 단어장 DataFrame.
+    긴 문서는 토큰 전체 대신 이 통계만 들고 있으므로 단어장 비용이 토큰 수가 아니라 기본형 수에 비례합니다.
+    """
+    vocab = pd.DataFrame(lemma_rows, columns=["기본형", "품사", "빈도", "첫 형태", "첫 위치"])
+    if vocab.empty:
+        return pd.DataFrame(columns=list(VOCABULARY_COLUMNS))
+    if content_only:
+        vocab = vocab[vocab["품사"].isin(CONTENT_POS)]
+    return _rank_vocabulary(vocab.reset_index(drop=True), ranks, exclude_top, min_count)
+
+
+def _rank_vocabulary(vocab, ranks, exclude_top, min_count) -> pd.DataFrame:
+    ranks = ranks if ranks is not None else load_frequency_ranks()
+    rank = vocab["기본형"].map(ranks)
+    keep = vocab["빈도"].to_numpy() >= min_count
+    if exclude_top:
+        keep &= ~(rank.to_numpy(dtype=float) <= exclude_top)  # NaN(목록에 없음)은 항상 남김
+    vocab["빈도 순위"] = rank.astype("Int64")
+
+    vocab = vocab[keep]
+    return vocab.sort_values(["빈도", "첫 위치"], ascending=[False, True], kind="stable").reset_index(drop=True)
@@ -0,0 +1,169 @@
+"""
+단어 목록(기본형 기준) 만들기. 파일 기록은 ru_analyzer.export가 맡습니다.
+"""
+import threading
+
+from .export import EXPORT_COLUMNS, export_bytes, quizlet_lines
+from .morphology import lemmatize_ru
+
+# 단어 정보로 쓰면 안 되는(캐시/목록에서 제외할) 오류 응답의 접두어
+GEMINI_ERROR_PREFIXES = ("API 키 없음", "API 할당량 초과 오류", "API 호출 또는 JSON 파싱 오류")
+
+WORD_LIST_COLUMNS = ("기본형", "대표 뜻")
+LEMMA_LIST_COLUMNS = ("기본형", "품사", "빈도", "첫 형태", "첫 위치")
+
+
+def is_error_info(info) -> bool:
+    """API 키 없음/할당량 초과/파싱 오류 등 정상 단어 정보가 아닌 응답인지 확인"""
+    ko_meanings = info.get("ko_meanings") if isinstance(info, dict) else None
+    return not ko_meanings or str(ko_meanings[0]).startswith(GEMINI_ERROR_PREFIXES)
+
+
+def word_list_row(lemma, info) -> dict:
+    """단어 정보 하나 → 단어 목록 행 (동사는 불완료상 / 완료상 표기)"""
+    pos = info.get("pos", "품사")
+
+    if pos == '동사' and info.get("aspect_pair"):
+        imp = info['aspect_pair'].get('imp', lemma)
+        perf = info['aspect_pair'].get('perf', '정보 없음')
+        base_form = f"{imp} / {perf}"
+    else:
+        base_form = lemma
+
+    short = "; ".join(info["ko_meanings"][:2])
+    short = f"({pos}) {short}"
+    return {"기본형": base_form, "대표 뜻": short}
+
+
+def build_word_rows(selected_words, word_info, token_table=None) -> list:
+    """선택한 단어 순서대로, 기본형이 겹치지 않게 정상 단어 정보만 목록으로 만듭니다."""
+    rows = []
+    processed_lemmas = set()
+    if not (word_info and selected_words):
+        return rows
+
+    for tok in selected_words:
+        lemma = lemmatize_ru(tok, token_table)
+        if lemma not in processed_lemmas and lemma in word_info:
+            info = word_info[lemma]
+            # API 오류가 없는 정상적인 데이터만 리스트에 추가
+            if not is_error_info(info):
+                rows.append(word_list_row(lemma, info))
+                processed_lemmas.add(lemma)
+    return rows
+
+
+def export_row(lemma, info) -> dict:
+    """내보내기용 행: 단어 목록 행 + 첫 예문 (러시아어 — 한국어)"""
+    row = word_list_row(lemma, info)
+    examples = info.get("examples") or []
+    first = examples[0] if examples and isinstance(examples[0], dict) else {}
+    row["예문"] = f"{first.get('ru', '')} — {first.get('ko', '')}" if first else ""
+    return row
+
+
+def _info_ref(word_info, lemma):
+    """단어 정보가 바뀌었는지 비교할 값 (SessionWordInfo는 저장소 키, dict는 객체 id)"""
+    refs = getattr(word_info, "refs", None)
+    if refs is not None:
+        return refs.get(lemma)
+    info = word_info.get(lemma)
+    return None if info is None else id(info)
+
+
+class WordList:
+    """
+    세션의 누적 단어 목록을 증분으로 유지합니다 (build_word_rows와 같은 결과).
+    - 선택 단어/단어 정보/텍스트가 그대로면 sync()는 아무것도 다시 계산하지 않음
+    - 단어 → 기본형 변환과 행 생성은 새로 들어온 단어/바뀐 정보에 대해서만 수행
+    - 내보내기 바이트는 형식별로 한 번만 만들고 목록이 바뀔 때까지 재사용
+    """
+
+    def __init__(self):
+        self.table_hash = None
+        self.token_lemmas = {}   # 선택 단어 → 기본형 (현재 텍스트 기준)
+        self.row_cache = {}      # 기본형 → (정보 참조, 행 또는 None)
+        self.signature = None
+        self.rows = []
+        self.frame = None
+        self.exports = {}
+        self.lock = threading.Lock()
+
+    def sync(self, selected_words, word_info, token_table=None) -> list:
+        refs = getattr(word_info, "refs", None)
+        info_signature = tuple(refs.items()) if refs is not None else tuple((k, id(v)) for k, v in word_info.items())
+        table_hash = token_table["hash"] if token_table else None
+        signature = (tuple(selected_words), info_signature, table_hash)
+        if signature == self.signature:
+            return self.rows
+
+        if table_hash != self.table_hash:
+            self.table_hash = table_hash
+            self.token_lemmas = {}
+
+        rows, seen, row_cache = [], set(), {}
+        for token in selected_words:
+            lemma = self.token_lemmas.get(token)
+            if lemma is None:
+                lemma = self.token_lemmas[token] = lemmatize_ru(token, token_table)
+            if lemma in seen:
+                continue
+            ref = _info_ref(word_info, lemma)
+            if ref is None:
+                continue
+            cached = self.row_cache.get(lemma)
+            if cached is None or cached[0] != ref:
+                info = word_info.get(lemma)
+                # API 오류가 없는 정상적인 데이터만 목록에 추가
+                cached = (ref, export_row(lemma, info) if info and not is_error_info(info) else None)
+            row_cache[lemma] = cached
+            if cached[1] is not None:
+                rows.append(cached[1])
+                seen.add(lemma)
+
+        with self.lock:
+            self.row_cache = row_cache
+            self.rows = rows
+            self.signature = signature
+            self.frame = None
+            self.exports = {}
+        return rows
+
+    def dataframe(self, columns=WORD_LIST_COLUMNS):
+        """화면 표시용 DataFrame (목록이 바뀔 때만 새로 만듦)"""
+        if self.frame is None:
+            import pandas as pd
+            self.frame = pd.DataFrame(self.rows, columns=list(EXPORT_COLUMNS))
+        return self.frame[list(columns)]
+
+    def export(self, fmt, deck_name="러시아어 단어장") -> bytes:
+        """현재 목록을 fmt 형식(quizlet/csv/xlsx/apkg) 바이트로. 다운로드 버튼의 지연 생성 함수로 써도 안전합니다."""
+        with self.lock:
+            rows, exports = self.rows, self.exports
+            cached = exports.get((fmt, deck_name))
+        if cached is None:
+            cached = export_bytes(rows, fmt, deck_name)
+            with self.lock:
+                if self.exports is exports:
+                    exports[(fmt, deck_name)] = cached
+        return cached
+
+
+def build_lemma_rows(token_table) -> list:
+    """토큰 테이블 → 기본형별 빈도 목록 (뜻 정보 없이, 배치 처리용)"""
+    by_lemma = {}
+    for token in token_table["tokens"]:
+        row = by_lemma.get(token["lemma"])
+        if row is None:
+            by_lemma[token["lemma"]] = {
+                "기본형": token["lemma"], "품사": token["pos"], "빈도": 1,
+                "첫 형태": token["text"], "첫 위치": token["start"],
+            }
+        else:
+            row["빈도"] += 1
+    return sorted(by_lemma.values(), key=lambda r: (-r["빈도"], r["첫 위치"]))
+
+
+def quizlet_text(rows) -> str:
+    """Quizlet '가져오기'용 텍스트 (단어<TAB>뜻, 한 줄에 하나)"""
+    return quizlet_lines(rows)
@@ -3,15 +3,56 @@ import re
 import os
 import json
 import pandas as pd
-from pymystem3 import Mystem
 from google import genai
 from google.cloud import vision
 import io
 import urllib.parse
-from typing import Union
+import time
+import multiprocessing
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ru_analyzer.brackets import (
+    init_bracket_worker,
+    iter_bracket_rows,
+    iter_bracket_rows_parallel,
+    iter_text_lines,
+    make_bracket_lemmatizer,
+    save_to_excel,
+)
+from ru_analyzer.highlight import get_highlighted_html
+from ru_analyzer.cache import PersistentCache
+from ru_analyzer.gemini import WORD_INFO_BATCH_SIZE, GeminiExecutor, WordInfoFetcher
+from ru_analyzer import metrics
+from ru_analyzer.backends import Pymorphy2Backend, create_backend
+from ru_analyzer.incremental import carry_over_state
+from ru_analyzer.lemma_store import LemmaStore, SessionWordInfo
+from ru_analyzer.morphology import (
+    MystemPool,
+    analyze_text,
+    default_pool_size,
+    get_backend,
+    get_pos_ru,
+    lemmatize_ru,
+    set_backend,
+    set_mystem,
+    text_hash,
+)
+from ru_analyzer.ocr import OCR_MAX_DIMENSION, OCR_MAX_WORKERS, collect_upload_pages, is_ocr_error, ocr_image, ocr_pages
+from ru_analyzer.paging import Document
+from ru_analyzer.stress import StressAnnotator, load_accentizer
+from ru_analyzer.translation import translate_sentences, translate_sentences_stream
+from ru_analyzer.vocabulary import FREQ_LIST_PATH, build_vocabulary, build_vocabulary_from_rows, load_frequency_ranks
+from ru_analyzer.export import EXPORT_DEPENDENCIES, EXPORT_FORMATS, export_available
+from ru_analyzer.glossary import Glossary
+from ru_analyzer.prefetch import Prefetcher, prefetch_items
+from ru_analyzer.wordlist import WordList, is_error_info, quizlet_text, word_list_row
 # ---------------------- 0. 초기 설정 및 상수 ----------------------
 
-mystem = Mystem()
+# 이번 rerun 전체 소요 시간 측정용 (12. 성능 지표)
+RERUN_STARTED = time.perf_counter()
+
 YOUTUBE_VIDEO_ID = "wJ65i_gDfT0" 
 IMAGE_FILE_PATH = "banner.png"
 
@@ -19,6 +60,29 @@ IMAGE_FILE_PATH = "banner.png"
 DEFAULT_TEST_TEXT = "Человек идёт по улице. Это тестовая строка. Хорошо. Я часто читаю эту книгу."
 NEW_DEFAULT_TEXT = "Том живёт в Санкт-Петербурге уже несколько месяцев..." # (필요하다면 이것도 유지)
 
+# 단어 목록이 이보다 길면 Quizlet 복사용 텍스트 상자 대신 TSV 파일 다운로드만 제공
+QUIZLET_TEXT_MAX_ROWS = 300
+
+def get_setting(name, default=None):
+    """Secrets → 환경 변수 → 기본값 순서로 설정값을 읽습니다."""
+    try:
+        return st.secrets.get(name, os.getenv(name, default))
+    except Exception:  # secrets.toml이 없는 로컬 환경
+        return os.getenv(name, default)
+
+# 모든 세션이 함께 쓰는 단어 정보 저장소. 세션의 word_info에는 기본형 → 저장소 키만 남고,
+# 메모리 예산(LEMMA_STORE_MAX_MB)을 넘어 밀려난 정보는 영구 캐시에서 다시 읽어 옵니다.
+@st.cache_resource(show_spinner=False)
+def get_lemma_store():
+    return LemmaStore(
+        max_bytes=int(float(get_setting("LEMMA_STORE_MAX_MB", 64)) * 1024 * 1024),
+        loader=lambda key: get_word_info_fetcher().load_stored(key),
+    )
+
+def new_word_info():
+    """세션용 {기본형: 단어 정보} (dict처럼 사용)"""
+    return SessionWordInfo(get_lemma_store())
+
 # --- 세션 상태 초기화 함수 (AttributeError 방지) ---
 def initialize_session_state():
     if "selected_words" not in st.session_state:
@@ -26,7 +90,7 @@ def initialize_session_state():
     if "clicked_word" not in st.session_state:
         st.session_state.clicked_word = None
     if "word_info" not in st.session_state:
-        st.session_state.word_info = {}
+        st.session_state.word_info = new_word_info()
     if "current_search_query" not in st.session_state:
         st.session_state.current_search_query = ""
     if "ocr_output_text" not in st.session_state:
@@ -39,6 +103,8 @@ def initialize_session_state():
         st.session_state.last_processed_text = ""
     if "last_processed_query" not in st.session_state:
         st.session_state.last_processed_query = ""
+    if "vocab_infos" not in st.session_state:
+        st.session_state.vocab_infos = new_word_info()
 
 # ---------------------- 0.1. 페이지 설정 및 배너 삽입 ----------------------
 
@@ -47,13 +113,46 @@ initialize_session_state()
 
 st.set_page_config(page_title="러시아어 텍스트 분석기", layout="wide")
 
+# 원본 배너(2000px PNG, 약 1.7MB) 대신 화면 너비에 맞게 줄인 이미지를 프로세스당 한 번만 만들어 씀
+BANNER_MAX_WIDTH = 1200
+
+@st.cache_resource(show_spinner=False)
+def get_banner_image(path, max_width=BANNER_MAX_WIDTH):
+    """줄이고 다시 압축한 배너 바이트 (투명도가 없으면 JPEG, 있으면 PNG). 파일이 없으면 FileNotFoundError"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.thumbnail((max_width, image.height))
+        output = io.BytesIO()
+        if image.mode in ("RGBA", "LA") and image.getchannel("A").getextrema()[0] < 255:
+            image.save(output, format="PNG", optimize=True)
+        else:
+            image.convert("RGB").save(output, format="JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
 try:
-    st.image(IMAGE_FILE_PATH, use_column_width=True)
+    st.image(get_banner_image(IMAGE_FILE_PATH), use_column_width=True)
 except FileNotFoundError:
     st.warning(f"배너 이미지 파일 ({IMAGE_FILE_PATH})을 찾을 수 없습니다. GitHub 저장소에 이미지를 업로드하고 파일명을 확인해주세요.")
     st.markdown("###")
 
 
+# ---------------------- 0.15. 부분 rerun 단위 (st.fragment) ----------------------
+
+def page_fragment(name):
+    """
+    st.fragment + 실행 시간 기록(metrics 'fragment.<name>').
+    fragment 안의 위젯을 조작하면 스크립트 전체가 아니라 그 fragment만 다시 실행됩니다.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with metrics.timed(f"fragment.{name}"):
+                return fn(*args, **kwargs)
+        return st.fragment(run)
+    return decorate
+
+
 # ---------------------- 0.2. YouTube 임베드 함수 ----------------------
 
 def youtube_embed_html(video_id: str):
@@ -76,45 +175,60 @@ def youtube_embed_html(video_id: str):
     return html_code
 
 
-# ---------------------- 품사 변환 딕셔너리 및 Mystem 함수 ----------------------
-POS_MAP = {
-    'S': '명사', 'V': '동사', 'A': '형용사', 'ADV': '부사', 'PR': '전치사',
-    'CONJ': '접속사', 'INTJ': '감탄사', 'PART': '불변화사', 'NUM': '수사',
-    'APRO': '대명사적 형용사', 'ANUM': '서수사', 'SPRO': '대명사',
-    'PRICL': '동사부사',
-    'COMP': '비교급', 'A=cmp': '비교급 형용사', 'ADV=cmp': '비교급 부사',
-    'ADVB': '부사',
-    'NONLEX': '비단어',      
-    'INIT': '머리글자',      
-    'P': '불변화사/전치사', 
-    'ADJ': '형용사',         
-    'N': '명사',             
-}
-
-@st.cache_data(show_spinner=False)
-def lemmatize_ru(word: str) -> str:
-    if ' ' in word.strip():
-        return word.strip()
-    if re.fullmatch(r'\w+', word, flags=re.UNICODE):
-        lemmas = mystem.lemmatize(word)
-        return (lemmas[0] if lemmas else word).strip()
-    return word
-
-@st.cache_data(show_spinner=False)
-def get_pos_ru(word: str) -> str:
-    if ' ' in word.strip():
-        return '구 형태' 
-    if re.fullmatch(r'\w+', word, flags=re.UNICODE):
-        analysis = mystem.analyze(word)
-        if analysis and 'analysis' in analysis[0] and analysis[0]['analysis']:
-            grammar_info = analysis[0]['analysis'][0]['gr']
-            parts = re.split(r'[,=]', grammar_info, 1)
-            pos_abbr_base = parts[0].strip()
-            pos_full = grammar_info.split(',')[0].strip()
-            if pos_full in POS_MAP:
-                return POS_MAP[pos_full]
-            return POS_MAP.get(pos_abbr_base, '품사') 
-    return '품사'
+# ---------------------- 형태소 분석 (ru_analyzer.morphology) ----------------------
+
+# 서버 프로세스 하나에 Mystem 프로세스 풀 하나. 여러 학생의 분석 요청이 한 파이프 뒤에 줄 서지 않도록
+# 코어 수만큼 Mystem을 두고 요청마다 하나씩 빌려 씁니다.
+@st.cache_resource(show_spinner=False)
+def get_mystem_pool():
+    return MystemPool(
+        size=int(get_setting("MYSTEM_WORKERS", default_pool_size())),
+        checkout_timeout=float(get_setting("MYSTEM_CHECKOUT_TIMEOUT", 30)),
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_morph_analyzer():
+    import pymorphy2
+    return pymorphy2.MorphAnalyzer()
+
+def make_morph_backend(name):
+    # pymorphy2 사전은 괄호 엑셀 변환과 같은 MorphAnalyzer를 공유
+    if name == "pymorphy2":
+        return Pymorphy2Backend(get_morph_analyzer())
+    return create_backend(name)
+
+# 텍스트 분석(MORPH_BACKEND)과 단어 하나 조회(MORPH_WORD_BACKEND, 검색어 등)에 쓸 백엔드.
+# 예: 텍스트는 문맥을 보는 Mystem, 단어 조회는 파이프 왕복이 없는 pymorphy2
+@st.cache_resource(show_spinner=False)
+def get_morph_backends():
+    text_backend = get_setting("MORPH_BACKEND", "mystem")
+    word_backend = get_setting("MORPH_WORD_BACKEND", text_backend)
+    return make_morph_backend(text_backend), make_morph_backend(word_backend)
+
+set_mystem(get_mystem_pool())
+set_backend(*get_morph_backends())
+
+@st.cache_data(show_spinner="텍스트 형태소 분석 중...", max_entries=20)
+def analyze_text_cached(text_key: str, backend_name: str, _text: str) -> dict:
+    """텍스트 해시(text_key)와 백엔드 이름을 키로 토큰 테이블을 캐시합니다. 원문(_text)은 해싱하지 않습니다."""
+    metrics.mark_miss("analyze_text_cached")
+    return analyze_text(_text)
+
+def get_token_table(text: str) -> dict:
+    with metrics.timed("morphology"), metrics.cached_call("analyze_text_cached"):
+        return analyze_text_cached(text_hash(text), get_backend().name, text)
+
+# 긴 텍스트는 문장 PAGE_SENTENCES개씩 페이지로 나눠 보이는 페이지만 분석/번역합니다.
+LARGE_DOC_MIN_CHARS = 20_000
+PAGE_SENTENCES = 40
+
+@st.cache_resource(show_spinner="긴 텍스트를 페이지로 나누는 중...", max_entries=8)
+def get_document(text_key: str, page_sentences: int, _text: str) -> Document:
+    """텍스트 해시별 페이지 분할 + 문서 색인 (같은 텍스트를 연 세션끼리 색인을 공유)"""
+    return Document(_text, page_sentences)
+
+def large_document_mode(text) -> bool:
+    return len(text) >= int(get_setting("LARGE_DOC_MIN_CHARS", LARGE_DOC_MIN_CHARS))
 
 # ---------------------- OCR 클라이언트 및 함수 ----------------------
 
@@ -155,166 +269,121 @@ def get_vision_client():
         st.error(f"Vision API 클라이언트 초기화 오류: {e}")
         return None
 
-# 🌟 TTL=3600초 (1시간) 설정 및 타임아웃 30초 추ㅊ
-@st.cache_data(show_spinner="이미지에서 텍스트 추출 중...", ttl=3600)
-def detect_text_from_image(image_bytes):
-    
-    client = get_vision_client()
-    
-    if client is None:
-        return "OCR API 클라이언트 초기화 실패. Secrets (GOOGLE_APPLICATION_CREDENTIALS_JSON) 설정을 확인해주세요."
+@st.cache_resource(show_spinner=False)
+def get_ocr_store():
+    """정규화된 픽셀 해시 → OCR 결과 (재시작/다음 날 재업로드에도 유지)"""
+    return PersistentCache(
+        get_setting("OCR_CACHE_PATH", "ocr_cache.sqlite3"),
+        table="ocr_results",
+        ttl=float(get_setting("OCR_CACHE_TTL", 60 * 60 * 24 * 90)),  # 기본 90일
+        max_entries=int(get_setting("OCR_CACHE_MAX_ENTRIES", 20000)),
+    )
 
-    try:
-        image = vision.Image(content=image_bytes)
-        image_context = vision.ImageContext(language_hints=["ru"])
-        
-        # 🌟 타임아웃 30초 설정 추가
-        response = client.text_detection(
-            image=image, 
-            image_context=image_context,
-            timeout=30 
-        )
-        texts = response.text
-            
-        if response.error.message:
-            return f"Vision API 오류: {response.error.message}"
-            
-        return texts if texts else "이미지에서 텍스트를 찾을 수 없습니다."
 
-    except Exception as e:
-        error_msg = str(e)
-        # 🌟 오류 메시지 필터링 (InvalidCharacterError 방지)
-        if "HTTPConnection" in error_msg or "ConnectTimeoutError" in error_msg:
-            return "OCR 처리 중 인증/네트워크 시간 초과 오류가 발생했습니다. (GCP Secrets 및 할당량 확인 필요)"
-            
-        return f"OCR 처리 중 오류 발생: {error_msg}"
-
-
-# ---------------------- 1. Gemini 연동 함수 (TTL 및 JSON Schema 적용) ----------------------
-
-def get_word_info_schema(is_verb: bool):
-    """Gemini 응답의 JSON 스키마: grammatical_info(격 정보) 필드 추가"""
-    schema = {
-        "type": "object",
-        "properties": {
-            "ko_meanings": {"type": "array", "items": {"type": "string"}, "description": "단어의 한국어 뜻 목록"},
-            "grammatical_info": {"type": "string", "description": "단어의 문법적 분석 (예: 명사 대격, 형용사 생격, 동사 현재 3인칭 등)"},
-            "examples": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "ru": {"type": "string", "description": "러시아어 예문"},
-                        "ko": {"type": "string", "description": "한국어 번역"}
-                    },
-                    "required": ["ru", "ko"]
-                },
-                "description": "최대 두 개의 예문과 그 번역"
-            }
-        },
-        "required": ["ko_meanings", "grammatical_info", "examples"]
-    }
+# ---------------------- 0.9. Gemini 호출 실행기 (ru_analyzer.gemini) ----------------------
 
-    if is_verb:
-        schema['properties']['aspect_pair'] = {
-            "type": "object",
-            "properties": {
-                "imp": {"type": "string", "description": "불완료상 동사"},
-                "perf": {"type": "string", "description": "완료상 동사"}
-            },
-            "required": ["imp", "perf"]
-        }
-        schema['required'].append('aspect_pair')
-    
-    return schema
+# 모든 Gemini 호출(단어 정보/번역/미리 가져오기)이 함께 쓰는 실행기: 동시성 제한 + 토큰 버킷 + 재시도
+@st.cache_resource(show_spinner=False)
+def get_gemini_executor():
+    return GeminiExecutor(
+        max_workers=int(get_setting("GEMINI_MAX_CONCURRENCY", 4)),
+        requests_per_minute=float(get_setting("GEMINI_RPM", 15)),
+        max_retries=int(get_setting("GEMINI_MAX_RETRIES", 4)),
+        background_reserve=int(get_setting("GEMINI_PREFETCH_RESERVE", 1)),
+    )
 
-@st.cache_data(show_spinner=False, ttl=300)
-def fetch_from_gemini(word, lemma, pos):
-    client = get_gemini_client()
-    if not client:
-        return {"ko_meanings": ["API 키 없음"], "grammatical_info": "분석 불가", "examples": []}
-    
-    is_verb = (pos == '동사')
-    
-    # 격 변화 분석을 강조하는 시스템 인스트럭션
-    system_instruction = (
-        "너는 러시아어-한국어 학습 도우미이다. 요청된 단어의 정보를 JSON으로만 출력한다. "
-        "중요: 입력된 단어(word)가 명사/형용사/대명사라면 해당 형태가 문장에서 어떤 '격(Case)'으로 쓰였는지(예: 주격, 생격, 역격, 대격, 조격, 전치격) 분석하여 'grammatical_info'에 적어라. "
-        "동사라면 시제와 인칭을 적어라. 한국어 뜻은 간단히 핵심만 제공한다."
+
+# ---------------------- 1. 단어 정보 조회 (영구 캐시 → Gemini, ru_analyzer.gemini) ----------------------
+
+@st.cache_resource(show_spinner=False)
+def get_word_info_cache():
+    return PersistentCache(
+        get_setting("WORD_CACHE_PATH", "word_info_cache.sqlite3"),
+        table="word_info",
+        ttl=float(get_setting("WORD_CACHE_TTL", 60 * 60 * 24 * 30)),  # 기본 30일
+        max_entries=int(get_setting("WORD_CACHE_MAX_ENTRIES", 50000)),
     )
-    
-    config = {
-        "system_instruction": system_instruction,
-        "response_mime_type": "application/json",
-        "response_schema": get_word_info_schema(is_verb),
-    }
-    
-    prompt = f"러시아어 단어: {word}. 기본형: {lemma}. 품사: {pos}. 정보를 요청합니다."
 
-    try:
-        res = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config=config
-        )
-        
-        data = json.loads(res.text) 
-        
-        if 'examples' in data and len(data['examples']) > 2:
-            data['examples'] = data['examples'][:2]
-            
-        return data
-    
-    except Exception as e:
-        error_msg = str(e)
-        if "RESOURCE_EXHAUSTED" in error_msg:
-             return {"ko_meanings": [f"API 할당량 초과 오류: {error_msg.split(',')[0]}..."], "examples": []}
-        return {"ko_meanings": [f"API 호출 또는 JSON 파싱 오류: {error_msg}"], "examples": []}
+# 로컬 용어집 (FTS5): 성공한 조회 결과를 기본형/표면형/한국어 뜻으로 색인. 검색창의 1차 응답 + 자동 완성
+@st.cache_resource(show_spinner=False)
+def get_glossary():
+    return Glossary(get_setting("GLOSSARY_PATH", "glossary.sqlite3"))
 
+@st.cache_resource(show_spinner=False)
+def get_word_info_fetcher():
+    """단어 하나(fetch)/여러 개 일괄(fetch_many) 조회. API 키가 없으면 "API 키 없음" 정보를 돌려줌"""
+    return WordInfoFetcher(get_gemini_client(), get_gemini_executor(), get_word_info_cache(), get_glossary())
 
-# ---------------------- 2. 텍스트 번역 함수 (TTL 10분 설정) ----------------------
 
-# 🌟 TTL=600초 (10분) 설정: 캐시를 사용하여 API 호출 횟수 관리
-@st.cache_data(show_spinner="텍스트를 한국어로 번역하는 중...", ttl=60 * 10)
-def translate_text(russian_text, highlight_words):
-    client = get_gemini_client()
-    if not client:
-        return "Gemini API 키가 설정되지 않아 번역을 수행할 수 없습니다."
-        
-    phrases_to_highlight = ", ".join([f"'{w}'" for w in highlight_words])
-    
-    SYSTEM_INSTRUCTION = '''너는 번역가이다. 요청된 러시아어 텍스트를 문맥에 맞는 자연스러운 한국어로 번역하고, 절대로 다른 설명, 옵션, 질문, 부가적인 텍스트를 출력하지 않는다. 오직 최종 번역 텍스트만 출력한다.'''
+# ---------------------- 1.3. 내용어 뜻 미리 가져오기 (백그라운드, 남는 할당량만 사용) ----------------------
 
-    if phrases_to_highlight:
-        translation_prompt = f"""
-        **반드시 아래 러시아어 단어/구의 한국어 번역이 등장하면, 그 한국어 번역 단어/구를 `<PHRASE_START>`와 `<PHRASE_END>` 마크업으로 감싸야 해.**
+@st.cache_resource(show_spinner=False)
+def get_prefetcher():
+    """API 키가 없거나 PREFETCH_WORD_INFO가 꺼져 있으면 None"""
+    fetcher = get_word_info_fetcher()
+    if not fetcher.client or str(get_setting("PREFETCH_WORD_INFO", "1")).lower() in ("0", "false", "no"):
+        return None
+    glossary = get_glossary()
+    return Prefetcher(
+        fetcher.prefetch_batch,
+        is_known=lambda item: glossary.contains(item[1], item[2]),
+        batch_size=WORD_INFO_BATCH_SIZE,
+        max_queue=int(get_setting("PREFETCH_MAX_QUEUE", 2000)),
+    )
 
-        러시아어 텍스트: '{russian_text}'
-        마크업 대상 러시아어 단어/구: {phrases_to_highlight}
-        """
-    else:
-        translation_prompt = f"원본 러시아어 텍스트: '{russian_text}'"
 
-    try:
-        res = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=translation_prompt,
-            config={"system_instruction": SYSTEM_INSTRUCTION}
-        )
-        translated = res.text.strip()
-        
-        # 후처리: 마크업을 HTML Span 태그로 변환
-        selected_class = "word-selected"
-        translated = translated.replace("<PHRASE_START>", f'<span class="{selected_class}">')
-        translated = translated.replace("<PHRASE_END>", '</span>')
+# ---------------------- 2. 텍스트 번역 함수 (문장 단위 번역 메모리) ----------------------
+
+# 문장 단위 번역 메모리 (문장 해시 → 번역). 텍스트를 고치면 바뀐 문장만 다시 번역합니다.
+@st.cache_resource(show_spinner=False)
+def get_translation_memory():
+    return PersistentCache(
+        get_setting("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3"),
+        table="translation_memory",
+        ttl=float(get_setting("TRANSLATION_MEMORY_TTL", 60 * 60 * 24 * 30)),  # 기본 30일
+        max_entries=int(get_setting("TRANSLATION_MEMORY_MAX_ENTRIES", 200000)),
+    )
+
+def translation_html(html):
+    return f'<div class="text-container" style="color: #333; font-weight: 500;">{html}</div>'
 
-        return translated
+def translation_stream_enabled():
+    return str(get_setting("TRANSLATION_STREAM", "1")).lower() not in ("0", "false", "no")
 
+def translate_text(russian_text, highlight_words, placeholder=None):
+    """
+    placeholder(st.empty())를 주고 스트리밍이 켜져 있으면(TRANSLATION_STREAM, 기본값 켬)
+    번역문이 도착하는 대로 placeholder에 중간 결과를 그립니다. 반환값은 완성된 번역 HTML입니다.
+    """
+    client = get_gemini_client()
+    if not client:
+        return "Gemini API 키가 설정되지 않아 번역을 수행할 수 없습니다."
+
+    try:
+        if placeholder is not None and translation_stream_enabled():
+            with metrics.timed("translation"):
+                return translate_sentences_stream(
+                    russian_text,
+                    highlight_words,
+                    client,
+                    get_gemini_executor().submit,
+                    get_translation_memory(),
+                    on_update=lambda html: placeholder.markdown(translation_html(html), unsafe_allow_html=True),
+                )
+        with st.spinner("텍스트를 한국어로 번역하는 중..."), metrics.timed("translation"):
+            return translate_sentences(
+                russian_text,
+                highlight_words,
+                client,
+                get_gemini_executor().submit,
+                get_translation_memory(),
+            )
     except Exception as e:
         return f"번역 오류 발생: {e}"
 
 
 # ---------------------- 3. 전역 스타일 정의 ----------------------
+# (전체 rerun 때만 주입됩니다. 검색/단어 목록 등 fragment 단위 rerun에서는 다시 보내지 않음)
 
 st.markdown("""
 <style>
@@ -395,143 +464,147 @@ def load_default_text():
     st.session_state.translated_text = ""
     st.session_state.selected_words = []
     st.session_state.clicked_word = None
-    st.session_state.word_info = {}
+    st.session_state.word_info = new_word_info()
     st.session_state.current_search_query = ""
 
 
 # ---------------------- 5. 하이라이팅 로직 함수 정의 ----------------------
-def get_highlighted_html(text_to_process, highlight_words):
-    selected_class = "word-selected"
-    display_html = text_to_process
-    
-    highlight_candidates = sorted(
-        [word for word in highlight_words if word.strip()],
-        key=len,
-        reverse=True
-    )
-
-    for phrase in highlight_candidates:
-        escaped_phrase = re.escape(phrase)
-        
-        if ' ' in phrase:
-            # 구(Phrase) 검색
-            display_html = re.sub(
-                f'({escaped_phrase})',
-                f'<span class="{selected_class}">\\1</span>',
-                display_html
-            )
-        else:
-            # 단어(Word) 검색 (\b는 단어 경계)
-            pattern = re.compile(r'\b' + escaped_phrase + r'\b')
-            display_html = pattern.sub(
-                f'<span class="{selected_class}">{phrase}</span>',
-                display_html
-            )
-    
-    return f'<div class="text-container">{display_html}</div>'
+# (ru_analyzer.highlight.get_highlighted_html 사용)
 
 
 # ---------------------- 6. UI 배치 및 메인 로직 ----------------------
 
 # --- 6.1. OCR 및 텍스트 입력 섹션 ---
 st.subheader("이미지에서 텍스트 추출(업데이트 예정)")
-uploaded_file = st.file_uploader("JPG, PNG 등 이미지를 업로드하세요", type=["jpg", "jpeg", "png"])
+uploaded_files = st.file_uploader(
+    "JPG, PNG 등 이미지 또는 페이지 스캔 ZIP을 업로드하세요 (여러 개 선택 가능, 업로드 순서 = 페이지 순서)",
+    type=["jpg", "jpeg", "png", "zip"],
+    accept_multiple_files=True,
+)
 
-if uploaded_file is not None:
-    image_bytes = uploaded_file.getvalue()
-    ocr_result = detect_text_from_image(image_bytes) 
-    
-    # OCR 결과 출력 로직
-    if ocr_result and not ocr_result.startswith(("OCR API 클라이언트 초기화 실패", "Vision API 오류", "OCR 처리 중 오류 발생")):
-        st.session_state.ocr_output_text = ocr_result
-        st.session_state.input_text_area = ocr_result
-        st.session_state.translated_text = ""
-        st.success("이미지에서 텍스트 추출 완료!")
-    else:
-        st.error(ocr_result)
+if uploaded_files:
+    # 새로 올린 파일일 때만 OCR 실행 (rerun마다 텍스트 영역을 덮어쓰지 않도록)
+    upload_key = tuple(getattr(f, "file_id", None) or (f.name, f.size) for f in uploaded_files)
+    if upload_key != st.session_state.get("last_ocr_upload"):
+        pages = collect_upload_pages([(f.name, f.getvalue()) for f in uploaded_files])
+        client = get_vision_client()
+        store = get_ocr_store()
+        max_dimension = int(get_setting("OCR_MAX_DIMENSION", OCR_MAX_DIMENSION))
+
+        # 전체 진행 막대 + 페이지마다 끝나는 대로 상태 한 줄 (완료 순서대로)
+        progress_bar = st.progress(0.0, text=f"페이지 OCR 0/{len(pages)}")
+        page_status = st.status(f"페이지 OCR ({len(pages)} 페이지)", expanded=len(pages) > 1)
+
+        def show_page_status(index, result):
+            name = pages[index][0]
+            if is_ocr_error(result):
+                page_status.write(f"❌ {name}: 오류")
+            elif not result.strip():
+                page_status.write(f"⚪ {name}: 텍스트 없음")
+            else:
+                page_status.write(f"✅ {name}: {len(result):,}자")
+
+        with metrics.timed("ocr"):
+            ocr_results = ocr_pages(
+                pages,
+                lambda image_bytes: ocr_image(image_bytes, client, store, max_dimension),
+                max_workers=int(get_setting("OCR_MAX_WORKERS", OCR_MAX_WORKERS)),
+                on_progress=lambda done, total: progress_bar.progress(done / total, text=f"페이지 OCR {done}/{total}"),
+                on_page=show_page_status,
+            )
+        progress_bar.empty()
+
+        # 글자가 없는 페이지(삽화, 빈 페이지)는 본문에 넣지 않고 오류 페이지와 따로 알림
+        page_texts = [result for result in ocr_results if not is_ocr_error(result) and result.strip()]
+        failed_pages = [(name, result) for (name, _), result in zip(pages, ocr_results) if is_ocr_error(result)]
+        empty_pages = [name for (name, _), result in zip(pages, ocr_results) if not is_ocr_error(result) and not result.strip()]
+        page_status.update(
+            label=f"페이지 OCR 완료: 텍스트 {len(page_texts)}, 텍스트 없음 {len(empty_pages)}, 오류 {len(failed_pages)}",
+            state="error" if failed_pages else "complete",
+            expanded=False,
+        )
+
+        # OCR 결과 출력 로직
+        if page_texts:
+            ocr_text = "\n\n".join(page_texts)
+            st.session_state.ocr_output_text = ocr_text
+            st.session_state.input_text_area = ocr_text
+            st.session_state.translated_text = ""
+            st.success(f"이미지에서 텍스트 추출 완료! ({len(page_texts)}/{len(pages)} 페이지)")
+        elif not pages:
+            st.error("업로드한 파일에서 이미지를 찾을 수 없습니다.")
+        for name in empty_pages:
+            st.warning(f"{name}: 이미지에서 텍스트를 찾을 수 없습니다.")
+        for name, result in failed_pages:
+            st.error(f"{name}: {result}")
+        st.session_state.last_ocr_upload = upload_key
 # ---------------------- [추가] 6.0. 러시아어 괄호 텍스트 엑셀 변환 기능 ----------------------
 
-def to_plural_nominative(word):
-    parsed = morph.parse(word)[0] # 기존 코드의 mystem 대신 pymorphy2 사용 권장 (복수주격 변환용)
-    if "plur" in parsed.tag and "nomn" not in parsed.tag:
-        for form in parsed.lexeme:
-            if "plur" in form.tag and "nomn" in form.tag:
-                return form.word
-    return word
-
-def save_to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Processed Data')
-        ws = writer.sheets['Processed Data']
-        ws.column_dimensions['A'].width = 100
-        ws.column_dimensions['B'].width = 50
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=1):
-            for cell in row:
-                cell.alignment = cell.alignment.copy(wrap_text=True)
-    return output.getvalue()
+@st.cache_resource(show_spinner=False)
+def get_bracket_lemmatizer():
+    """괄호 단어 기본형 변환 함수 (MorphAnalyzer와 메모이즈 결과를 프로세스 단위로 유지)"""
+    return make_bracket_lemmatizer(get_morph_analyzer())
+
+@st.cache_resource(show_spinner=False)
+def get_bracket_process_pool():
+    """대용량 교재용 프로세스 풀. 워커마다 pymorphy2를 한 번씩 로드합니다."""
+    workers = int(get_setting("BRACKET_WORKERS", os.cpu_count() or 1))
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_bracket_worker,
+    )
 
-# UI 부분
-with st.expander("📂 괄호 텍스트 분석 및 엑셀 다운로드 (교재 정리용)"):
-    st.write("텍스트 파일(.txt)을 업로드하면 괄호 안의 단어를 분석하여 엑셀 파일로 만들어드립니다.")
-    excel_upload = st.file_uploader("분석할 TXT 파일을 선택하세요", type=["txt"], key="excel_uploader")
+# 이 크기 이상이면 기본으로 멀티코어 처리
+PARALLEL_BRACKET_MIN_BYTES = 1_000_000
+
+# UI 부분 (업로드/체크박스를 바꿔도 이 부분만 다시 실행)
+@page_fragment("brackets")
+def bracket_exporter():
+    with st.expander("📂 괄호 텍스트 분석 및 엑셀 다운로드 (교재 정리용)"):
+        st.write("텍스트 파일(.txt)을 업로드하면 괄호 안의 단어를 분석하여 엑셀 파일로 만들어드립니다.")
+        excel_upload = st.file_uploader("분석할 TXT 파일을 선택하세요", type=["txt"], key="excel_uploader")
     
-    if excel_upload:
-        from io import BytesIO
-        import pymorphy2
-        
-        # pymorphy2는 루프 밖에서 선언하거나 캐싱하는 것이 좋지만, 
-        # 일단 기능 통합을 위해 내부에서 선언합니다.
-        morph_py = pymorphy2.MorphAnalyzer()
-        
-        content = excel_upload.getvalue().decode("utf-8")
-        processed_data = []
-        
-        # 분석 로직 실행
-        with st.spinner('엑셀 파일 생성 중...'):
-            lines = content.splitlines()
-            for line in lines:
-                if not line.strip(): continue
-                sentences = re.split(r'(?<!\w\.\w.)(?<![А-Яа-я]\.)(?<![A-Za-z]\.)(?<!\.\d)[.!?]\s+', line.strip())
-                for sentence in sentences:
-                    if not sentence: continue
-                    original_bracket_contents = []
-
-                    def lemmatize_brackets(match):
-                        original_text = match.group(1)
-                        words = original_text.split()
-                        # russian_prepositions는 상단에 정의되어 있어야 함
-                        filtered_words = [w for w in words if w.lower() not in russian_prepositions]
-                        if not filtered_words: return ""
-                        
-                        lemmatized_words = []
-                        for word in filtered_words:
-                            p = morph_py.parse(word)[0]
-                            lex = p.normal_form
-                            if "PRTF" in p.tag: lex = f"{lex} (형동사)"
-                            if "GRND" in p.tag: lex = f"{lex} (부동사)"
-                            if "plur" in p.tag: # 복수 주격 변환
-                                for form in p.lexeme:
-                                    if "plur" in form.tag and "nomn" in form.tag:
-                                        lex = form.word
-                            lemmatized_words.append(lex)
-                        original_bracket_contents.append(original_text)
-                        return f"({', '.join(lemmatized_words)})"
-
-                    proc_sent = re.sub(r'\((.*?)\)', lemmatize_brackets, sentence)
-                    if original_bracket_contents:
-                        processed_data.append({
-                            "Sentence": proc_sent.strip(),
-                            "Original Words": ", ".join(original_bracket_contents),
-                        })
-            
-            if processed_data:
-                df_excel = pd.DataFrame(processed_data)
-                excel_bytes = save_to_excel(df_excel)
+        if excel_upload:
+            # 같은 업로드 파일이면 rerun 때 다시 분석하지 않음
+            upload_id = getattr(excel_upload, "file_id", None) or (excel_upload.name, excel_upload.size)
+            use_parallel = st.checkbox(
+                "멀티코어 병렬 처리 (대용량 교재용)",
+                value=excel_upload.size >= PARALLEL_BRACKET_MIN_BYTES,
+                key="bracket_parallel",
+            )
+            export = st.session_state.get("bracket_export")
+            if not export or export["upload_id"] != upload_id:
+                with st.spinner('엑셀 파일 생성 중...'):
+                    lines = iter_text_lines(excel_upload)
+                    if use_parallel:
+                        progress_bar = st.progress(0.0, text="괄호 분석 진행 중...")
+                        total_bytes = max(excel_upload.size, 1)
+                        rows = iter_bracket_rows_parallel(
+                            lines,
+                            get_bracket_process_pool(),
+                            on_progress=lambda done: progress_bar.progress(min(done / total_bytes, 1.0), text="괄호 분석 진행 중..."),
+                        )
+                    else:
+                        rows = iter_bracket_rows(lines, get_bracket_lemmatizer())
+                    try:
+                        with metrics.timed("bracket_export"):
+                            excel_bytes, row_count = save_to_excel(rows)
+                    except BrokenProcessPool:
+                        # 워커가 죽은 풀은 버리고 다음 실행 때 새로 만듭니다.
+                        get_bracket_process_pool.clear()
+                        st.error("병렬 처리 중 워커 프로세스가 종료되었습니다. 다시 시도하거나 병렬 처리를 끄세요.")
+                        st.stop()
+                    if use_parallel:
+                        progress_bar.empty()
+                export = {"upload_id": upload_id, "excel_bytes": excel_bytes, "row_count": row_count}
+                st.session_state.bracket_export = export
+
+            if export["row_count"]:
                 st.success("변환 완료!")
                 st.download_button(
                     label="📥 분석된 엑셀 파일 다운로드",
-                    data=excel_bytes,
+                    data=export["excel_bytes"],
                     file_name=f"analysis_{excel_upload.name.replace('.txt', '')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     use_container_width=True
@@ -539,6 +612,8 @@ with st.expander("📂 괄호 텍스트 분석 및 엑셀 다운로드 (교재 
             else:
                 st.warning("괄호()가 포함된 문장을 찾지 못했습니다.")
 
+bracket_exporter()
+
 # ----------------------------------------------------------------------------------
 
 st.subheader("분석 대상 텍스트") # 이 줄이 원래 코드의 295번 줄입니다.
@@ -550,50 +625,148 @@ current_text = st.text_area(
 )
 
 
-# 텍스트가 수정되면 상태 업데이트 및 번역/분석 상태 초기화
+# 긴 텍스트는 페이지 단위: 분석/강세/하이라이팅/번역은 보이는 페이지만, 검색/단어 목록은 문서 전체 색인으로
+document = None
+view_text = current_text
+if large_document_mode(current_text):
+    document = get_document(text_hash(current_text), int(get_setting("PAGE_SENTENCES", PAGE_SENTENCES)), current_text)
+    if document.page_count > 1:
+        if st.session_state.get("doc_page", 1) > document.page_count:
+            st.session_state.doc_page = 1
+        col_page, col_page_info = st.columns([1, 3])
+        with col_page:
+            page = st.number_input("페이지", min_value=1, max_value=document.page_count, key="doc_page")
+        with col_page_info:
+            st.caption(
+                f"긴 텍스트라 페이지 단위로 보여 줍니다: 문장 {document.sentence_count}개, "
+                f"{document.page_count}페이지 (페이지당 {document.page_sentences}문장)"
+            )
+        view_text = document.page_text(page - 1)
+    else:
+        document = None
+
+# 보이는 텍스트를 형태소 분석 (텍스트 해시 기준 캐시, 수정 후에는 바뀐 문장만 분석)
+page_table = get_token_table(view_text)
+if document is not None:
+    # 분석한 페이지를 문서 색인에 더하고, 단어 조회/목록은 문서 전체 표로 (페이지를 넘겨도 같은 기본형)
+    document.record_page(page - 1, page_table)
+    token_table = document.token_table()
+else:
+    token_table = page_table
+
+# 텍스트가 수정되면 바뀐 부분에만 해당하는 선택/단어 정보를 정리하고 나머지는 유지
 if current_text != st.session_state.last_processed_text:
+    if st.session_state.last_processed_text:
+        carried = carry_over_state(
+            st.session_state.last_processed_text,
+            current_text,
+            token_table,
+            st.session_state.selected_words,
+            st.session_state.word_info,
+            st.session_state.clicked_word,
+            # 긴 텍스트는 아직 분석하지 않은 페이지에 남은 단어도 지우지 않도록 문서 전체 표면형으로 확인
+            contains_lemma=document.contains_lemma if document is not None else None,
+        )
+        st.session_state.selected_words = carried["selected_words"]
+        st.session_state.word_info = carried["word_info"]
+        st.session_state.clicked_word = carried["clicked_word"]
+    # 번역은 번역 메모리 덕분에 바뀐 문장만 다시 요청됩니다.
     st.session_state.translated_text = ""
-    st.session_state.selected_words = []
-    st.session_state.clicked_word = None
-    st.session_state.word_info = {}
-    st.session_state.current_search_query = ""
 
+# 새 텍스트(긴 텍스트는 새 페이지)의 내용어 뜻을 백그라운드에서 미리 조회 (클릭/검색 시 용어집에서 바로 응답)
+prefetcher = get_prefetcher()
+if prefetcher is not None and st.session_state.get("prefetched_text_hash") != page_table["hash"]:
+    prefetcher.enqueue(prefetch_items(page_table, int(get_setting("PREFETCH_MAX_WORDS", 300))))
+    st.session_state.prefetched_text_hash = page_table["hash"]
 
-# --- 6.2. 단어 검색창 및 로직 ---
-st.divider()
-st.subheader("단어/구 검색")
-manual_input = st.text_input("단어 또는 구를 입력하고 Enter (예: 'идёт по улице')", key="current_search_query")
 
-if manual_input and manual_input != st.session_state.get("last_processed_query"):
-    if manual_input not in st.session_state.selected_words:
-        st.session_state.selected_words.append(manual_input)
+# --- 6.2. 단어 검색창 및 로직 ---
+SEARCH_PAGE_LINKS = 20
+
+def set_search_query(query):
+    st.session_state.current_search_query = query
+
+def go_to_page(page):
+    st.session_state.doc_page = page
+
+def render_search(token_table, document=None):
+    st.divider()
+    st.subheader("단어/구 검색")
+    manual_input = st.text_input("단어 또는 구를 입력하고 Enter (예: 'идёт по улице')", key="current_search_query")
+
+    # 용어집 자동 완성: 이전에 누군가 조회한 단어 중 접두어(러시아어/한국어 뜻)가 맞는 후보
+    if manual_input:
+        suggestions = [s for s in get_glossary().suggest(manual_input) if s["lemma"] != manual_input]
+        if suggestions:
+            st.caption("📒 용어집에서 찾은 단어")
+            suggestion_cols = st.columns(min(len(suggestions), 4))
+            for i, suggestion in enumerate(suggestions):
+                with suggestion_cols[i % len(suggestion_cols)]:
+                    st.button(
+                        f"{suggestion['lemma']} · {suggestion['meaning']}",
+                        key=f"glossary_suggestion_{i}",
+                        on_click=set_search_query,
+                        args=(suggestion["lemma"],),
+                        use_container_width=True,
+                    )
+
+    if manual_input and manual_input != st.session_state.get("last_processed_query"):
+        if manual_input not in st.session_state.selected_words:
+            st.session_state.selected_words.append(manual_input)
     
-    st.session_state.clicked_word = manual_input
+        st.session_state.clicked_word = manual_input
     
-    with st.spinner(f"'{manual_input}'에 대한 정보 분석 중..."):
-        clean_input = manual_input
-        lemma = lemmatize_ru(clean_input)
-        pos = get_pos_ru(clean_input)
-        try:
-            info = fetch_from_gemini(clean_input, lemma, pos)
+        with st.spinner(f"'{manual_input}'에 대한 정보 분석 중..."):
+            clean_input = manual_input
+            lemma = lemmatize_ru(clean_input, token_table)
+            pos = get_pos_ru(clean_input, token_table)
+            try:
+                # 영구 캐시 → 로컬 용어집 (네트워크 없이) → Gemini
+                info = get_word_info_fetcher().fetch(clean_input, lemma, pos)
             
-            # 기본형(lemma) 기준으로 정보 저장. 단, 현재 검색어(token)가 다르면 업데이트
-            if lemma not in st.session_state.word_info or st.session_state.word_info.get(lemma, {}).get('loaded_token') != clean_input:
-                st.session_state.word_info[lemma] = {**info, "loaded_token": clean_input, "pos": pos}
-        except Exception as e:
-            st.error(f"Gemini 오류: {e}")
+                # 기본형(lemma) 기준으로 정보 저장. 단, 현재 검색어(token)가 다르면 업데이트
+                if lemma not in st.session_state.word_info or st.session_state.word_info.get(lemma, {}).get('loaded_token') != clean_input:
+                    st.session_state.word_info[lemma] = {**info, "loaded_token": clean_input, "pos": pos}
+            except Exception as e:
+                st.error(f"Gemini 오류: {e}")
             
-    st.session_state.last_processed_query = manual_input
+        st.session_state.last_processed_query = manual_input
+
+    # 긴 텍스트: 검색어가 나오는 페이지로 이동 (표면형 색인 + 분석된 페이지의 같은 기본형)
+    if document is not None and manual_input:
+        pages = document.find_pages(manual_input, lemmatize_ru(manual_input, token_table))
+        if pages:
+            st.caption(f"📄 '{manual_input}'이(가) 나오는 페이지 {len(pages)}개")
+            page_cols = st.columns(min(len(pages), 10))
+            for i, page in enumerate(pages[:SEARCH_PAGE_LINKS]):
+                with page_cols[i % len(page_cols)]:
+                    # 페이지 번호는 부분 rerun 범위 밖이므로 페이지 전체를 다시 그림
+                    if st.button(
+                        str(page + 1),
+                        key=f"search_page_{page}",
+                        on_click=go_to_page,
+                        args=(page + 1,),
+                        disabled=page + 1 == st.session_state.get("doc_page"),
+                        use_container_width=True,
+                    ):
+                        st.rerun()
+        else:
+            st.caption(f"📄 문서에서 '{manual_input}'을(를) 찾지 못했습니다.")
 
-st.markdown("---")
+    st.markdown("---")
 
 
 # ---------------------- 7. 텍스트 하이라이팅 및 상세 정보 레이아웃 ----------------------
 
-left, right = st.columns([2, 1])
-
+# ruaccent 강세 모델 (프로세스당 한 번 로드, 문장 해시별 결과 캐시는 모든 세션이 공유)
+@st.cache_resource(show_spinner="강세 모델을 불러오는 중...")
+def get_stress_annotator():
+    return StressAnnotator(
+        load_accentizer(omograph_model_size=get_setting("STRESS_MODEL_SIZE", "turbo2")),
+        cache_size=int(get_setting("STRESS_CACHE_SIZE", 50_000)),
+    )
 
-with left:
+def source_text_panel(current_text):
     st.subheader("러시아어 텍스트 원문")
     
     # --- TTS 버튼 및 강세 링크 ---
@@ -615,9 +788,18 @@ with left:
         )
         st.info("⬆️ 음성 듣기 및 강세 확인을 위해 외부 사이트 링크를 사용합니다. 새 탭으로 열립니다.")
 
+    # 강세 표시: 텍스트 전체를 로컬 모델로 한 번에 분석 (바뀐 문장만 다시 분석)
+    stress_marks = None
+    if st.toggle("강세 표시 (ruaccent, 외부 사이트 없이)", key="show_stress"):
+        try:
+            with st.spinner("강세 분석 중..."):
+                stress_marks = get_stress_annotator().annotate(current_text)
+        except Exception as e:
+            st.warning(f"강세 모델을 사용할 수 없습니다: {e}")
 
     # 러시아어 텍스트 하이라이팅 출력 (current_text 사용)
-    ru_html = get_highlighted_html(current_text, st.session_state.selected_words)
+    with metrics.timed("render.highlight"):
+        ru_html = get_highlighted_html(current_text, st.session_state.selected_words, stress_marks)
     st.markdown(ru_html, unsafe_allow_html=True)
     
     st.markdown("---")
@@ -627,7 +809,7 @@ with left:
     def reset_all_state():
         st.session_state.selected_words = []
         st.session_state.clicked_word = None
-        st.session_state.word_info = {}
+        st.session_state.word_info = new_word_info()
         st.session_state.current_search_query = ""
         st.session_state.input_text_area = DEFAULT_TEST_TEXT
         st.session_state.ocr_output_text = ""
@@ -635,18 +817,21 @@ with left:
         st.session_state.last_processed_text = ""
 
 
-    st.button("선택 및 검색 초기화", key="reset_button", on_click=reset_all_state)
+    # 텍스트 입력란(부분 rerun 범위 밖)까지 초기화되므로 페이지 전체를 다시 그림
+    if st.button("선택 및 검색 초기화", key="reset_button", on_click=reset_all_state):
+        st.rerun()
     
 
 # ---------------------- 7.2. 단어 상세 정보 (right 컬럼) ----------------------
-with right:
+@page_fragment("detail")
+def detail_panel(token_table):
     st.subheader("단어 상세 정보")
     
     current_token = st.session_state.clicked_word
     
     if current_token:
         clean_token = current_token
-        lemma = lemmatize_ru(clean_token)
+        lemma = lemmatize_ru(clean_token, token_table)
         info = st.session_state.word_info.get(lemma, {})
 
         if info and "ko_meanings" in info:
@@ -696,40 +881,50 @@ with right:
                 
                 individual_words = clean_token.split() 
                 
+                token_rows = []
                 for word in individual_words:
                     processed_word = re.sub(r'[.,!?;:"]', '', word) 
                     
                     if not processed_word:
                         continue
                         
-                    token_lemma = lemmatize_ru(processed_word)
-                    token_pos = get_pos_ru(processed_word)
+                    token_lemma = lemmatize_ru(processed_word, token_table)
+                    token_pos = get_pos_ru(processed_word, token_table)
+                    token_rows.append((word, token_lemma, token_pos))
+
+                # 정보가 없는 낱말들은 한 번의 Gemini 요청으로 일괄 조회
+                to_fetch = []
+                for word, token_lemma, token_pos in token_rows:
                     token_info = st.session_state.word_info.get(token_lemma)
-                    
                     if not token_info or token_info.get('pos') == '구 형태':
-                        try:
-                            loaded_info = fetch_from_gemini(token_lemma, token_lemma, token_pos)
-                            
-                            if loaded_info.get("ko_meanings") and not loaded_info["ko_meanings"][0].startswith(("API 할당량 초과 오류", "API 호출 또는 JSON 파싱 오류")):
-                                st.session_state.word_info[token_lemma] = {
-                                    **loaded_info, 
-                                    "loaded_token": token_lemma, 
-                                    "pos": token_pos
-                                }
-                                token_info = st.session_state.word_info[token_lemma]
-                            else:
-                                st.markdown(f"**{word}** (`{token_lemma}`) → 뜻 정보 로드 실패 또는 오류")
-                                continue
-                        except Exception as e:
-                            st.markdown(f"**{word}** (`{token_lemma}`) → API 호출 오류")
-                            continue
-
-                    if token_info:
-                        token_pos = token_info.get("pos", "품사")
-                        token_meanings = token_info.get("ko_meanings", [])
-                        display_meaning = "; ".join(token_meanings[:1])
-                        
-                        st.markdown(f"**{word}** (`{token_lemma}` - {token_pos}) → **{display_meaning}**")
+                        to_fetch.append((token_lemma, token_lemma, token_pos))
+
+                to_fetch = list(dict.fromkeys(to_fetch))
+                if to_fetch:
+                    try:
+                        fetched = get_word_info_fetcher().fetch_many(to_fetch)
+                    except Exception as e:
+                        fetched = [{"ko_meanings": [f"API 호출 또는 JSON 파싱 오류: {e}"], "examples": []}] * len(to_fetch)
+                    for (token_lemma, _, token_pos), loaded_info in zip(to_fetch, fetched):
+                        if loaded_info.get("ko_meanings") and not loaded_info["ko_meanings"][0].startswith(("API 할당량 초과 오류", "API 호출 또는 JSON 파싱 오류")):
+                            st.session_state.word_info[token_lemma] = {
+                                **loaded_info, 
+                                "loaded_token": token_lemma, 
+                                "pos": token_pos
+                            }
+
+                for word, token_lemma, token_pos in token_rows:
+                    token_info = st.session_state.word_info.get(token_lemma)
+
+                    if not token_info or token_info.get('pos') == '구 형태':
+                        st.markdown(f"**{word}** (`{token_lemma}`) → 뜻 정보 로드 실패 또는 오류")
+                        continue
+
+                    token_pos = token_info.get("pos", "품사")
+                    token_meanings = token_info.get("ko_meanings", [])
+                    display_meaning = "; ".join(token_meanings[:1])
+                    
+                    st.markdown(f"**{word}** (`{token_lemma}` - {token_pos}) → **{display_meaning}**")
                     
             # --- 3. 외부 검색 링크 ---
             st.markdown("---")
@@ -755,83 +950,195 @@ with right:
 
 
 # ---------------------- 8. 하단: 누적 목록 + CSV ----------------------
-st.divider()
-st.subheader("단어 목록 (기본형 기준)")
+@page_fragment("word_list")
+def word_list_panel(token_table, document=None):
+    """단어 목록 + 단어장/내보내기. 이 안의 위젯(슬라이더, 내려받기 등)은 이 부분만 다시 실행합니다."""
+    st.divider()
+    st.subheader("단어 목록 (기본형 기준)")
+
+    # --- 8.0. 텍스트 전체 단어장 (형태소 분석 한 번 + 뜻 일괄 조회) ---
+    with st.expander("📚 이 텍스트 전체로 단어장 만들기"):
+        freq_ranks = load_frequency_ranks(get_setting("VOCAB_FREQ_LIST_PATH", FREQ_LIST_PATH))
+        col_top, col_filter = st.columns(2)
+        with col_top:
+            exclude_top = st.slider(
+                "고빈도 상위 N위 기본형은 아는 단어로 보고 제외",
+                min_value=0, max_value=len(freq_ranks), value=min(100, len(freq_ranks)), step=10,
+                key="vocab_exclude_top",
+            )
+        with col_filter:
+            min_count = st.number_input("최소 등장 횟수", min_value=1, value=1, key="vocab_min_count")
+            content_only = st.checkbox("명사/동사/형용사/부사만", value=True, key="vocab_content_only")
+
+        if document is not None:
+            # 긴 텍스트: 토큰 전체 대신 문서 색인의 기본형 통계로 (아직 안 본 페이지는 버튼을 눌러 분석)
+            if document.indexed_count < document.page_count:
+                st.caption(f"지금까지 분석한 {document.indexed_count}/{document.page_count}페이지 기준입니다.")
+                if st.button("나머지 페이지도 분석해 문서 전체 단어장 만들기", key="vocab_index_all"):
+                    progress_bar = st.progress(0.0, text="페이지 분석 중...")
+                    with metrics.timed("document.index"):
+                        document.index_all(
+                            on_progress=lambda done, total: progress_bar.progress(done / total, text=f"페이지 분석 중... {done}/{total}"),
+                        )
+                    progress_bar.empty()
+                    # 이 부분에 넘어온 문서 전체 표가 바뀌었으므로 페이지 전체를 다시 그림
+                    st.rerun()
+            vocab_df = build_vocabulary_from_rows(document.lemma_rows(), freq_ranks, exclude_top, content_only, min_count)
+        else:
+            vocab_df = build_vocabulary(token_table, freq_ranks, exclude_top, content_only, min_count)
+        vocab_infos = st.session_state.vocab_infos
+        missing_vocab = [
+            (lemma, lemma, pos) for lemma, pos in zip(vocab_df["기본형"], vocab_df["품사"])
+            if lemma not in vocab_infos
+        ]
+
+        col_fill, col_add = st.columns(2)
+        with col_fill:
+            if st.button(f"뜻 채우기 ({len(missing_vocab)}개 일괄 조회)", disabled=not missing_vocab, use_container_width=True):
+                progress_bar = st.progress(0.0, text="뜻 조회 중...")
+                fetched = get_word_info_fetcher().fetch_many(
+                    missing_vocab,
+                    on_progress=lambda done, total: progress_bar.progress(done / total, text=f"뜻 조회 중... {done}/{total}"),
+                )
+                progress_bar.empty()
+                failed = 0
+                for (lemma, _, pos), info in zip(missing_vocab, fetched):
+                    if is_error_info(info):
+                        failed += 1
+                    else:
+                        vocab_infos[lemma] = {**info, "loaded_token": lemma, "pos": pos}
+                if failed:
+                    st.warning(f"{failed}개 단어의 뜻을 불러오지 못했습니다. 잠시 후 다시 시도하세요.")
+        with col_add:
+            if st.button("뜻이 있는 단어를 아래 단어 목록에 추가", disabled=not vocab_infos, use_container_width=True):
+                for lemma in vocab_df["기본형"]:
+                    if lemma in vocab_infos:
+                        st.session_state.word_info.setdefault(lemma, vocab_infos[lemma])
+                        if lemma not in st.session_state.selected_words:
+                            st.session_state.selected_words.append(lemma)
+                # 원문 하이라이팅도 바뀌므로 페이지 전체를 다시 그림
+                st.rerun()
+
+        vocab_df["뜻"] = [
+            word_list_row(lemma, vocab_infos[lemma])["대표 뜻"] if lemma in vocab_infos else ""
+            for lemma in vocab_df["기본형"]
+        ]
+        st.caption(f"기본형 {len(vocab_df)}개 (전체 토큰 {sum(token_table['lemmas'].values())}개)")
+        st.dataframe(vocab_df, hide_index=True, use_container_width=True)
+        st.download_button(
+            "📥 단어장 CSV 다운로드",
+            data=vocab_df.to_csv(index=False).encode("utf-8-sig"),
+            file_name="vocabulary.csv",
+            mime="text/csv",
+        )
 
-selected = st.session_state.selected_words
-word_info = st.session_state.word_info
+    selected = st.session_state.selected_words
+    word_info = st.session_state.word_info
+
+    # 선택 단어/단어 정보/텍스트가 그대로면 행과 DataFrame을 다시 만들지 않음
+    if "word_list" not in st.session_state:
+        st.session_state.word_list = WordList()
+    word_list = st.session_state.word_list
+    rows = word_list.sync(selected, word_info, token_table)
+
+    # 데이터프레임 표시
+    if rows:
+        st.dataframe(word_list.dataframe(), hide_index=True)
+
+        # --- 8.4. 내보내기: 파일은 버튼을 누를 때 만들어짐 (목록이 바뀌기 전까지 재사용) ---
+        st.caption(f"단어 {len(rows)}개")
+        export_cols = st.columns(len(EXPORT_FORMATS))
+        for col, (fmt, (label, ext, mime)) in zip(export_cols, EXPORT_FORMATS.items()):
+            with col:
+                # 선택 패키지(genanki/openpyxl)가 없는 서버에서는 누른 뒤에 실패하지 않도록 버튼을 끔
+                available = export_available(fmt)
+                st.download_button(
+                    f"📥 {label}",
+                    data=lambda fmt=fmt: word_list.export(fmt),
+                    file_name=f"word_list.{ext}",
+                    mime=mime,
+                    key=f"word_list_export_{fmt}",
+                    on_click="ignore",
+                    disabled=not available,
+                    help=None if available else f"서버에 '{EXPORT_DEPENDENCIES[fmt]}' 패키지가 설치되어 있지 않습니다.",
+                    use_container_width=True,
+                )
 
-# 🌟 중요: rows를 조건문 밖에서 빈 리스트로 먼저 초기화합니다.
-rows = []
+        # --- 8.5. Quizlet 연동 섹션 ---
+        st.markdown("#### 🎓 Quizlet으로 단어장 만들기")
 
-if word_info and selected:
-    processed_lemmas = set()
-    
-    for tok in selected:
-        clean_tok = tok
-        lemma = lemmatize_ru(clean_tok)
-        if lemma not in processed_lemmas and lemma in word_info:
-            info = word_info[lemma]
-            # API 오류가 없는 정상적인 데이터만 리스트에 추가
-            if info.get("ko_meanings") and not info["ko_meanings"][0].startswith(("API 할당량 초과 오류", "API 호출 또는 JSON 파싱 오류")):
-                pos = info.get("pos", "품사")
-                
-                if pos == '동사' and info.get("aspect_pair"):
-                    imp = info['aspect_pair'].get('imp', lemma)
-                    perf = info['aspect_pair'].get('perf', '정보 없음')
-                    base_form = f"{imp} / {perf}"
-                else:
-                    base_form = lemma
+        col_copy, col_link = st.columns([2, 1])
+        with col_copy:
+            if len(rows) <= QUIZLET_TEXT_MAX_ROWS:
+                st.text_area("아래 텍스트를 복사해서 Quizlet '가져오기'에 붙여넣으세요:",
+                             value=quizlet_text(rows), height=100)
+            else:
+                st.caption(f"단어가 {QUIZLET_TEXT_MAX_ROWS}개를 넘으면 'Quizlet (TSV)' 파일을 내려받아 '가져오기'에 붙여넣으세요.")
+        with col_link:
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.link_button("🚀 Quizlet 사이트로 이동", "https://quizlet.com/create-set", use_container_width=True)
+    else:
+        st.info("검색창에 단어를 입력하여 분석하면 여기에 목록이 만들어집니다.")
 
-                short = "; ".join(info["ko_meanings"][:2])
-                short = f"({pos}) {short}"
 
-                rows.append({"기본형": base_form, "대표 뜻": short})
-                processed_lemmas.add(lemma)
+# ---------------------- 8.9. 검색 ~ 단어 목록 (부분 rerun 단위) ----------------------
 
-# 데이터프레임 표시
-if rows:
-    df = pd.DataFrame(rows)
-    st.dataframe(df, hide_index=True)
-    
-    # --- 8.5. Quizlet 연동 섹션 ---
-    st.markdown("#### 🎓 Quizlet으로 단어장 만들기")
-    
-    # Quizlet용 텍스트 생성
-    quizlet_text = ""
-    for row in rows:
-        quizlet_text += f"{row['기본형']}\t{row['대표 뜻']}\n"
-    
-    col_copy, col_link = st.columns([2, 1])
-    with col_copy:
-        st.text_area("아래 텍스트를 복사해서 Quizlet '가져오기'에 붙여넣으세요:", 
-                     value=quizlet_text, height=100)
-    with col_link:
-        st.markdown("<br>", unsafe_allow_html=True)
-        st.link_button("🚀 Quizlet 사이트로 이동", "https://quizlet.com/create-set", use_container_width=True)
-else:
-    st.info("검색창에 단어를 입력하여 분석하면 여기에 목록이 만들어집니다.")
+@page_fragment("study")
+def study_section(view_text, token_table, document=None):
+    """
+    검색창, 원문 하이라이팅, 상세 정보, 단어 목록. 검색어를 입력하면 페이지 전체가 아니라 이 부분만
+    다시 실행됩니다 (배너/CSS, OCR, 괄호 변환, 텍스트 분석, 번역은 그대로).
+    긴 텍스트는 view_text(보이는 페이지)만 그리고, 검색/단어 목록은 document 색인을 씁니다.
+    """
+    render_search(token_table, document)
+
+    left, right = st.columns([2, 1])
+    with left:
+        source_text_panel(view_text)
+    with right:
+        detail_panel(token_table)
+
+    word_list_panel(token_table, document)
+
+study_section(view_text, token_table, document)
 
 
 # ---------------------- 9. 하단: 한국어 번역본 ----------------------
-st.divider()
-st.subheader("한국어 번역본")
 
-if st.session_state.translated_text == "" or current_text != st.session_state.last_processed_text:
-    st.session_state.translated_text = translate_text(
-        current_text,
-        st.session_state.selected_words
-    )
-    st.session_state.last_processed_text = current_text
+@page_fragment("translation")
+def translation_panel(current_text, view_text):
+    """
+    번역본. 텍스트가 바뀐 전체 rerun 때만 다시 확인합니다 (검색/단어 목록 조작과 무관).
+    긴 텍스트는 보이는 페이지(view_text)만 번역하며, 페이지를 넘길 때마다 그 페이지를 번역합니다.
+    """
+    st.divider()
+    st.subheader("한국어 번역본")
+
+    # 스트리밍 번역은 이 자리에 도착하는 대로 그려지고, 끝나면 완성본으로 바뀝니다.
+    placeholder = st.empty()
+    if (
+        st.session_state.translated_text == ""
+        or current_text != st.session_state.last_processed_text
+        or view_text != st.session_state.get("translated_view_text")
+    ):
+        st.session_state.translated_text = translate_text(
+            view_text,
+            st.session_state.selected_words,
+            placeholder,
+        )
+        st.session_state.last_processed_text = current_text
+        st.session_state.translated_view_text = view_text
 
-translated_text = st.session_state.translated_text
+    translated_text = st.session_state.translated_text
 
-if translated_text.startswith("Gemini API 키가 설정되지"):
-    st.error(translated_text)
-elif translated_text.startswith("번역 오류 발생"):
-    st.error(translated_text)
-else:
-    st.markdown(f'<div class="text-container" style="color: #333; font-weight: 500;">{translated_text}</div>', unsafe_allow_html=True)
+    if translated_text.startswith("Gemini API 키가 설정되지"):
+        placeholder.error(translated_text)
+    elif translated_text.startswith("번역 오류 발생"):
+        placeholder.error(translated_text)
+    else:
+        placeholder.markdown(translation_html(translated_text), unsafe_allow_html=True)
+
+translation_panel(current_text, view_text)
 
 
 # ---------------------- 10. 홍보 영상 삽입 (페이지 맨 아래로 이동) ----------------------
@@ -860,3 +1167,84 @@ st.markdown("""
     관련 법령에 따라 민사상 손해배상 청구 및 형사상 처벌을 받을 수 있습니다.
 </div>
 """, unsafe_allow_html=True)
+
+
+# ---------------------- 12. 성능 지표 (디버그) ----------------------
+
+metrics.observe_stage("rerun", time.perf_counter() - RERUN_STARTED)
+# 설정하면 node_exporter textfile collector / 외부 수집기가 읽을 수 있도록 주기적으로 파일에 기록
+metrics.maybe_write_files(
+    get_setting("METRICS_TEXTFILE_PATH"),
+    get_setting("METRICS_JSON_PATH"),
+    min_interval=float(get_setting("METRICS_WRITE_INTERVAL", 15)),
+)
+
+def metrics_debug_enabled():
+    """Secrets/환경 변수 DEBUG_METRICS=1 이거나 주소에 ?debug=1 이 있으면 디버그 패널 표시"""
+    if str(get_setting("DEBUG_METRICS", "")).lower() in ("1", "true", "yes"):
+        return True
+    return st.query_params.get("debug") == "1"
+
+def to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+if metrics_debug_enabled():
+    with st.expander("🛠 성능 지표 (디버그)"):
+        snap = metrics.snapshot()
+        st.caption(f"서버 프로세스 기준 누적값 (모든 세션 합계, {snap['uptime_s'] / 60:.1f}분)")
+        pool_stats = get_mystem_pool().stats()
+        st.caption(
+            f"Mystem 풀: {pool_stats['live']}/{pool_stats['size']}개 실행 중 "
+            f"(사용 중 {pool_stats['in_use']}, 대기 {pool_stats['idle']}, 재시작 {pool_stats['restarts']})"
+        )
+        store_stats = get_lemma_store().stats()
+        st.caption(
+            f"단어 정보 저장소: {store_stats['entries']}개, "
+            f"{store_stats['bytes'] / 2**20:.1f} / {store_stats['max_bytes'] / 2**20:.0f} MB"
+        )
+        st.caption(f"용어집: {get_glossary().stats()['entries']}개 단어")
+        if document is not None:
+            doc_stats = document.stats()
+            st.caption(
+                f"문서 색인: {doc_stats['indexed']}/{doc_stats['pages']}페이지 분석, "
+                f"표면형 {doc_stats['forms']}개, 기본형 {doc_stats['lemmas']}개"
+            )
+        if prefetcher is not None:
+            prefetch_stats = prefetcher.stats()
+            st.caption(
+                f"미리 가져오기: 대기 {prefetch_stats['queued']}, 조회 {prefetch_stats['fetched']}, "
+                f"건너뜀 {prefetch_stats['skipped']}, 실패 {prefetch_stats['failed']}, 버림 {prefetch_stats['dropped']}, "
+                f"재시작 {prefetch_stats['restarts']}"
+            )
+
+        st.markdown("**단계별 소요 시간 (ms)**")
+        st.dataframe(pd.DataFrame([
+            {"단계": name, "횟수": h["count"], "평균": to_ms(h["mean_s"]),
+             "p50": to_ms(h["p50_s"]), "p95": to_ms(h["p95_s"]), "최대": to_ms(h["max_s"])}
+            for name, h in sorted(snap["stages"].items())
+        ]), hide_index=True, use_container_width=True)
+
+        st.markdown("**캐시 적중/실패/삭제**")
+        st.dataframe(pd.DataFrame([
+            {"캐시": name, "적중": c["hit"], "실패": c["miss"], "삭제": c["eviction"],
+             "적중률": None if c["hit_ratio"] is None else f"{c['hit_ratio']:.0%}"}
+            for name, c in sorted(snap["caches"].items())
+        ]), hide_index=True, use_container_width=True)
+
+        st.markdown("**외부 API (재시도 포함 요청 단위)**")
+        st.dataframe(pd.DataFrame([
+            {"API": name,
+             "요청": (a["latency"] or {}).get("count", 0),
+             "평균(ms)": to_ms((a["latency"] or {}).get("mean_s")),
+             "p95(ms)": to_ms((a["latency"] or {}).get("p95_s")),
+             **a["results"]}
+            for name, a in sorted(snap["api"].items())
+        ]), hide_index=True, use_container_width=True)
+
+        col_json, col_prom = st.columns(2)
+        with col_json:
+            st.download_button("📥 JSON", json.dumps(snap, ensure_ascii=False, indent=2),
+                               file_name="metrics.json", mime="application/json", use_container_width=True)
+        with col_prom:
+            st.download_button("📥 Prometheus 텍스트", metrics.to_prometheus(),
+                               file_name="ru_analyzer.prom", mime="text/plain", use_container_width=True)